@@ -0,0 +1,220 @@
+"""Synthetic data and measurement helpers for the benchmark commands.
+
+``seed_benchmark_data`` fills the database with instructors, courses,
+lessons, students, enrollments and lesson progress using bulk inserts,
+then rebuilds every derived table (resume pointers, activity and streaks,
+course rollups, leaderboards, achievements) from those rows, since bulk
+inserts skip the signals and services that normally maintain them. All
+synthetic rows hang off users named ``bench-*`` whose email is at the
+reserved ``EMAIL_DOMAIN`` (``.invalid`` can never receive mail, so no real
+account uses it), and ``delete_benchmark_data`` removes only those.
+"""
+from __future__ import annotations
+
+import math
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import Course, Lesson
+from enrollments.models import Enrollment, LessonProgress, progress_percentage, refresh_resume_pointers
+from enrollments.rollups import rebuild_course_stats
+from users.achievements import award_achievements
+from users.activity import rebuild_streaks
+from users.leaderboards import rebuild_leaderboards
+from users.models import DailyActivity, Profile
+
+User = get_user_model()
+
+PREFIX = "bench-"
+EMAIL_DOMAIN = "benchmark.invalid"
+PASSWORD = "bench-password"
+CATEGORIES = [value for value, _ in Course.CATEGORY_CHOICES]
+LEVELS = [value for value, _ in Course.LEVEL_CHOICES]
+
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99 (nearest rank), mean and max of ``samples``, rounded to 0.01."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+
+    def rank(p: float) -> float:
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(50), 2),
+        "p95": round(rank(95), 2),
+        "p99": round(rank(99), 2),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def benchmark_users():
+    return User.objects.filter(username__startswith=PREFIX, email__endswith=f"@{EMAIL_DOMAIN}")
+
+
+@transaction.atomic
+def delete_benchmark_data() -> int:
+    """Delete every synthetic user and, by cascade, their courses and progress.
+
+    The leaderboards are rebuilt afterwards, since deleting entries leaves
+    gaps in the ranks of everyone who stays.
+    """
+    deleted, _ = benchmark_users().delete()
+    if deleted:
+        rebuild_leaderboards()
+    return deleted
+
+
+def _create_users(kind: str, count: int, password: str, batch_size: int) -> list[int]:
+    role = "instructor" if kind == "instructor" else "student"
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"{PREFIX}{kind}-{n}",
+                email=f"{kind}-{n}@{EMAIL_DOMAIN}",
+                first_name=kind.title(),
+                last_name=str(n),
+                password=password,
+            )
+            for n in range(count)
+        ],
+        batch_size=batch_size,
+    )
+    Profile.objects.bulk_create([Profile(user_id=user.pk, role=role) for user in users], batch_size=batch_size)
+    return [user.pk for user in users]
+
+
+@transaction.atomic
+def seed_benchmark_data(
+    instructors: int = 10,
+    courses_per_instructor: int = 5,
+    lessons_per_course: int = 10,
+    students: int = 1000,
+    enrollments_per_student: int = 3,
+    completion: float = 0.5,
+    days: int = 30,
+    seed: int = 0,
+    batch_size: int = 1000,
+) -> dict:
+    """Create a synthetic dataset; returns the number of rows per table.
+
+    Each student enrolls in ``enrollments_per_student`` random courses and has
+    completed, on average, ``completion`` of each course's lessons in order,
+    spread over the last ``days`` days. Fails if benchmark data already exists.
+    """
+    if benchmark_users().exists():
+        raise ValueError("Benchmark data already exists; delete it first.")
+    rng = random.Random(seed)
+    now = timezone.now()
+    # One hash for everyone; hashing thousands of passwords would dominate the run
+    password = make_password(PASSWORD)
+
+    instructor_ids = _create_users("instructor", instructors, password, batch_size)
+    student_ids = _create_users("student", students, password, batch_size)
+
+    courses = Course.objects.bulk_create(
+        [
+            Course(
+                title=f"Benchmark Course {i}.{n}",
+                slug=f"{PREFIX}course-{i}-{n}",
+                description="Synthetic course for benchmarks.",
+                instructor_id=instructor_id,
+                category=rng.choice(CATEGORIES),
+                level=rng.choice(LEVELS),
+                status="published",
+                is_free=n % 3 == 0,
+                price=0 if n % 3 == 0 else 49,
+                discounted_price=0 if n % 3 == 0 else 29,
+            )
+            for i, instructor_id in enumerate(instructor_ids)
+            for n in range(courses_per_instructor)
+        ],
+        batch_size=batch_size,
+    )
+    lessons = Lesson.objects.bulk_create(
+        [
+            Lesson(course=course, title=f"Lesson {order}", content="Synthetic lesson content. " * 20, order=order)
+            for course in courses
+            for order in range(1, lessons_per_course + 1)
+        ],
+        batch_size=batch_size,
+    )
+    lessons_by_course: dict[int, list[Lesson]] = defaultdict(list)
+    for lesson in lessons:
+        lessons_by_course[lesson.course_id].append(lesson)
+
+    # Decide everything in memory first so progress and completion agree
+    plans = []
+    for student_id in student_ids:
+        for course in rng.sample(courses, min(enrollments_per_student, len(courses))):
+            course_lessons = lessons_by_course[course.pk]
+            done = min(len(course_lessons), max(0, round(rng.gauss(completion, 0.25) * len(course_lessons))))
+            # Lessons are completed after enrolling, between then and now
+            enrolled_at = now - timedelta(days=rng.uniform(0, days))
+            finished = sorted(enrolled_at + (now - enrolled_at) * rng.random() for _ in range(done))
+            plans.append((student_id, course, enrolled_at, finished))
+
+    enrollments = Enrollment.objects.bulk_create(
+        [
+            Enrollment(
+                user_id=student_id,
+                course=course,
+                progress=progress_percentage(len(finished), len(lessons_by_course[course.pk])),
+                is_completed=bool(finished) and len(finished) == len(lessons_by_course[course.pk]),
+                completed_at=finished[-1] if finished and len(finished) == len(lessons_by_course[course.pk]) else None,
+                last_accessed_at=finished[-1] if finished else None,
+            )
+            for student_id, course, _, finished in plans
+        ],
+        batch_size=batch_size,
+    )
+    # enrolled_at is auto_now_add, so bulk_create stamped every row with now
+    for enrollment, (_, _, enrolled_at, _) in zip(enrollments, plans):
+        enrollment.enrolled_at = enrolled_at
+    Enrollment.objects.bulk_update(enrollments, ["enrolled_at"], batch_size=batch_size)
+
+    progress = []
+    activity: dict[tuple[int, object], int] = defaultdict(int)
+    for enrollment, (student_id, course, _, finished) in zip(enrollments, plans):
+        for index, lesson in enumerate(lessons_by_course[course.pk]):
+            completed_at = finished[index] if index < len(finished) else None
+            progress.append(LessonProgress(
+                enrollment_id=enrollment.pk,
+                lesson_id=lesson.pk,
+                completed=completed_at is not None,
+                completed_at=completed_at,
+            ))
+            if completed_at is not None:
+                activity[student_id, timezone.localdate(completed_at)] += 1
+        if len(progress) >= batch_size:
+            LessonProgress.objects.bulk_create(progress, batch_size=batch_size)
+            progress = []
+    LessonProgress.objects.bulk_create(progress, batch_size=batch_size)
+    DailyActivity.objects.bulk_create(
+        [DailyActivity(user_id=user_id, date=day, lessons_completed=count) for (user_id, day), count in activity.items()],
+        batch_size=batch_size,
+    )
+
+    refresh_resume_pointers(Enrollment.objects.filter(course__in=courses))
+    rebuild_streaks(student_ids, batch_size=batch_size)
+    rebuild_course_stats([course.pk for course in courses])
+    rebuild_leaderboards()
+    award_achievements(student_ids)
+
+    return {
+        "instructors": len(instructor_ids),
+        "students": len(student_ids),
+        "courses": len(courses),
+        "lessons": len(lessons),
+        "enrollments": len(enrollments),
+        "lesson_progress": sum(len(lessons_by_course[course.pk]) for _, course, _, _ in plans),
+        "daily_activity": len(activity),
+    }
@@ -0,0 +1,106 @@
+"""Deferred, batched model signal handlers.
+
+A deferred handler does not run inside ``save()``. Instead the instances that
+triggered the signal are collected for the current transaction and the
+handler runs once, via ``transaction.on_commit``, with all of them. Outside an
+atomic block the handler runs immediately with a single instance, which is
+the same moment an ordinary receiver would have run.
+
+Usage::
+
+    @deferred_receiver(post_save, sender=Enrollment, condition=lambda created, **kwargs: created)
+    def setup_progress(enrollments):
+        ...  # one query for all enrollments
+
+Handlers receive a list of instances (one per primary key, the most recently
+saved copy wins). They must be idempotent and tolerate rows that no longer
+exist, because instances saved inside a rolled-back savepoint are not
+removed from the pending batch.
+"""
+from __future__ import annotations
+
+import threading
+import weakref
+from collections.abc import Callable
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_state = threading.local()
+
+
+def _pending(using: str) -> dict:
+    batches = getattr(_state, "batches", None)
+    if batches is None:
+        batches = _state.batches = {}
+    return batches.setdefault(using, {})
+
+
+def _scheduled(using: str) -> weakref.WeakValueDictionary:
+    """The flush each handler has waiting in ``on_commit`` on this connection.
+
+    Only Django's list of commit callbacks holds a flush strongly, so when a
+    rollback discards that list the entry disappears with it.
+    """
+    scheduled = getattr(_state, "scheduled", None)
+    if scheduled is None:
+        scheduled = _state.scheduled = {}
+    return scheduled.setdefault(using, weakref.WeakValueDictionary())
+
+
+class _Flush:
+    def __init__(self, deferred: DeferredHandler, using: str):
+        self.deferred = deferred
+        self.using = using
+
+    def __call__(self) -> None:
+        scheduled = _scheduled(self.using)
+        if scheduled.get(self.deferred) is self:
+            del scheduled[self.deferred]
+        self.deferred.flush(self.using)
+
+
+class DeferredHandler:
+    def __init__(self, handler: Callable, condition: Callable | None = None):
+        self.handler = handler
+        self.condition = condition
+
+    def __call__(self, sender, instance, using=DEFAULT_DB_ALIAS, **kwargs) -> None:
+        if kwargs.get("raw"):
+            return  # fixture loading
+        if self.condition is not None and not self.condition(instance=instance, **kwargs):
+            return
+
+        batch = _pending(using).setdefault(self, {})
+        scheduled = _scheduled(using)
+        if scheduled.get(self) is None:
+            # Anything still pending belonged to a transaction that rolled back
+            batch.clear()
+            batch[instance.pk] = instance
+            flush = scheduled[self] = _Flush(self, using)
+            transaction.on_commit(flush, using=using)
+        else:
+            batch[instance.pk] = instance
+
+    def flush(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        batch = _pending(using).pop(self, {})
+        if batch:
+            self.handler(list(batch.values()))
+
+
+def deferred_receiver(signal, sender, condition: Callable | None = None, dispatch_uid: str | None = None):
+    """Connect the decorated batch handler to ``signal`` as a deferred handler.
+
+    ``condition`` receives the signal's keyword arguments (``instance``,
+    ``created``, ...) and decides whether the instance joins the batch.
+    """
+    def decorator(handler: Callable) -> DeferredHandler:
+        deferred = DeferredHandler(handler, condition)
+        signal.connect(
+            deferred,
+            sender=sender,
+            weak=False,
+            dispatch_uid=dispatch_uid or f"{handler.__module__}.{handler.__qualname__}",
+        )
+        return deferred
+
+    return decorator
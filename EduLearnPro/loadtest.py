@@ -0,0 +1,251 @@
+"""Concurrent user journeys for the ``load_test`` command.
+
+Each virtual user is one ``bench-student-*`` account (see
+``EduLearnPro.benchmarking``) repeating a journey: browse the catalog, open
+a course, go through payment and enroll, then open lessons and mark each
+one complete. Virtual users run as threads, optionally spread over several
+processes, and send requests either in-process through the test client or
+over HTTP to a running server. Every request is recorded as one sample
+``(step, ms, status, outcome)``, where outcome is ``ok``, ``error`` or
+``locked`` (SQLite gave up waiting for the write lock: "database is
+locked").
+
+Over HTTP, sessions are created directly in the session store, so the
+server must be able to load them: they are kept in the database unless
+``SHARED_CACHE`` is set, so sharing this project's database is enough; with
+a shared cache the server must use the same one, or keep
+``SESSION_CACHE_WRITE_THROUGH`` on so the database copy is found. Logging in through the
+login view would run into its rate limit.
+
+This module avoids importing models at import time so worker processes
+started with ``spawn`` can set Django up first (see ``init_worker``).
+"""
+from __future__ import annotations
+
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import Cookie, CookieJar, eff_request_host
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connections
+from django.test import Client
+
+STEPS = ("catalog", "detail", "payment", "pay", "lesson", "complete")
+IDEMPOTENCY_KEY = re.compile(r'name="idempotency_key" value="([0-9a-f]+)"')
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+LOCKED = "database is locked"
+
+_request_errors = threading.local()
+
+
+def init_worker() -> None:
+    """``ProcessPoolExecutor`` initializer; a no-op when the process was forked."""
+    if not apps.ready:
+        django.setup()
+
+
+def _remember_error(sender, **kwargs):
+    _request_errors.last = sys.exc_info()[1]
+
+
+class LoadClient(Client):
+    """Test client that sends requests straight to its handler.
+
+    ``Client.request`` connects global signal receivers for every request
+    (rendered templates, exceptions), so with many threads each request
+    would also copy every other thread's template contexts and could raise
+    their exceptions. Handler errors are picked up per thread instead.
+    """
+
+    def request(self, **request):
+        response = self.handler(self._base_environ(**request))
+        if response.cookies:
+            self.cookies.update(response.cookies)
+        return response
+
+
+class ClientTransport:
+    """Requests through the test client, in this process."""
+
+    def __init__(self, user):
+        got_request_exception.connect(_remember_error, dispatch_uid="loadtest-errors")
+        self.client = LoadClient()
+        self.client.defaults["HTTP_HOST"] = "127.0.0.1:8000"
+        self.client.force_login(user)
+
+    def request(self, method: str, path: str, data=None, headers=None) -> tuple[int, str]:
+        extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in (headers or {}).items()}
+        _request_errors.last = None
+        response = getattr(self.client, method)(path, data or {}, **extra)
+        if response.status_code >= 500 and _request_errors.last is not None:
+            raise _request_errors.last
+        return response.status_code, response.content.decode(errors="replace")
+
+    def close(self) -> None:
+        connections.close_all()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # surfaces the 3xx as an HTTPError, like the test client
+
+
+class HTTPTransport:
+    """Requests over HTTP to ``base_url`` with a per-user cookie jar."""
+
+    def __init__(self, user, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+        # force_login stores the session; the server loads it by its key
+        client = Client()
+        client.force_login(user)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.cookies.set_cookie(_cookie(settings.SESSION_COOKIE_NAME, session_key, self.base_url))
+
+    def _csrf_cookie(self) -> str:
+        return next((cookie.value for cookie in self.cookies if cookie.name == settings.CSRF_COOKIE_NAME), "")
+
+    def request(self, method: str, path: str, data=None, headers=None) -> tuple[int, str]:
+        headers = dict(headers or {})
+        body = None
+        if method == "post":
+            headers.setdefault("X-CSRFToken", self._csrf_cookie())
+            headers["Referer"] = self.base_url + path
+            body = urllib.parse.urlencode(data or {}).encode()
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method.upper())
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read().decode(errors="replace")
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read().decode(errors="replace")
+
+    def close(self) -> None:
+        connections.close_all()
+
+
+def _cookie(name: str, value: str, url: str) -> Cookie:
+    # The jar matches cookies against the effective host ("localhost.local")
+    _, host = eff_request_host(urllib.request.Request(url))
+    return Cookie(
+        version=0, name=name, value=value, port=None, port_specified=False,
+        domain=host, domain_specified=False, domain_initial_dot=False,
+        path="/", path_specified=True, secure=False, expires=None, discard=False,
+        comment=None, comment_url=None, rest={},
+    )
+
+
+class VirtualUser:
+    def __init__(self, transport, plan: dict, lessons: int, think: float, rng: random.Random):
+        self.transport = transport
+        self.plan = plan
+        self.lessons = lessons
+        self.think = think
+        self.rng = rng
+        self.samples: list[tuple[str, float, int, str]] = []
+        self.enrolled = set(plan["enrolled"])
+
+    def step(self, name: str, method: str, path: str, data=None, headers=None) -> tuple[int, str] | None:
+        """Send one request and record it; ``None`` means the journey cannot go on."""
+        started = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, data, headers)
+        except OperationalError as exc:
+            outcome, status, body = ("locked" if LOCKED in str(exc) else "error"), 500, ""
+        except Exception:
+            outcome, status, body = "error", 0, ""
+        else:
+            if status >= 500 and LOCKED in body:  # the debug page names the exception
+                outcome = "locked"
+            else:
+                outcome = "error" if status >= 400 else "ok"
+        self.samples.append((name, (time.perf_counter() - started) * 1000, status, outcome))
+        if self.think:
+            time.sleep(self.think)
+        return (status, body) if outcome == "ok" else None
+
+    def journey(self) -> bool:
+        courses = self.plan["courses"]
+        fresh = [slug for slug in courses if slug not in self.enrolled]
+        slug = self.rng.choice(fresh or list(courses))
+        urls = self.plan["urls"]
+
+        if self.step("catalog", "get", urls["catalog"]) is None:
+            return False
+        if self.step("detail", "get", urls["detail"].format(slug=slug)) is None:
+            return False
+        if slug not in self.enrolled:
+            page = self.step("payment", "get", urls["payment"].format(slug=slug))
+            if page is None:
+                return False
+            key = IDEMPOTENCY_KEY.search(page[1])
+            token = CSRF_TOKEN.search(page[1])
+            data = {"idempotency_key": key.group(1) if key else ""}
+            if token:
+                data["csrfmiddlewaretoken"] = token.group(1)
+            if self.step("pay", "post", urls["pay"].format(slug=slug), data) is None:
+                return False
+            self.enrolled.add(slug)
+
+        xhr = {"X-Requested-With": "XMLHttpRequest"}
+        for lesson_id in courses[slug][:self.lessons]:
+            if self.step("lesson", "get", urls["lesson"].format(slug=slug, pk=lesson_id)) is None:
+                return False
+            if self.step("complete", "post", urls["complete"].format(pk=lesson_id), headers=xhr) is None:
+                return False
+        return True
+
+
+def _run_user(plan: dict, user_id: int, options: dict, start: threading.Barrier) -> dict:
+    from django.contrib.auth import get_user_model
+
+    try:
+        user = get_user_model().objects.get(pk=user_id)
+        if options["base_url"]:
+            transport = HTTPTransport(user, options["base_url"])
+        else:
+            transport = ClientTransport(user)
+    except Exception:
+        start.abort()  # release the other threads instead of leaving them waiting
+        raise
+    vu = VirtualUser(
+        transport,
+        {**plan, "enrolled": plan["enrolled"].get(user_id, [])},
+        options["lessons"],
+        options["think"],
+        random.Random(f"{options['seed']}-{user_id}"),
+    )
+    completed = failed = 0
+    try:
+        start.wait()
+        for _ in range(options["journeys"]):
+            if vu.journey():
+                completed += 1
+            else:
+                failed += 1
+    finally:
+        transport.close()
+    return {"samples": vu.samples, "completed": completed, "failed": failed}
+
+
+def run_users(plan: dict, user_ids: list[int], options: dict) -> dict:
+    """Run one virtual user per id as threads; returns their merged samples."""
+    start = threading.Barrier(len(user_ids))
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as pool:
+        results = list(pool.map(lambda user_id: _run_user(plan, user_id, options, start), user_ids))
+    return {
+        "samples": [sample for result in results for sample in result["samples"]],
+        "completed": sum(result["completed"] for result in results),
+        "failed": sum(result["failed"] for result in results),
+    }
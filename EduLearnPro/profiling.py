@@ -0,0 +1,164 @@
+"""Helpers for the ``profile_url`` command.
+
+``StackSampler`` snapshots the main thread's Python stack at a fixed
+wall-clock interval and counts identical stacks, which is the "collapsed"
+format read by flamegraph.pl, speedscope and similar tools. cProfile cannot
+produce this itself because it only records caller/callee pairs, not whole
+stacks. Samples are taken from a ``SIGALRM`` handler, which runs in the
+sampled thread; a sampling thread would only get the GIL when the main
+thread releases it (mostly inside SQLite), which overcounts the database.
+Each sample is also attributed to the ORM (any database frame on the
+stack, including queries run lazily from a template), template rendering
+or other Python code. Platforms without ``SIGALRM`` (Windows) cannot
+sample; check ``SAMPLING_SUPPORTED`` first.
+
+``QueryRecorder`` is an ``execute_wrapper`` that groups queries by their
+SQL (with placeholders, so repeated lookups fold together) and records
+the project code and templates that issued them.
+"""
+from __future__ import annotations
+
+import os
+import signal
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.template.base import Template
+
+from . import timing
+
+ORM_PATHS = (f"{os.sep}django{os.sep}db{os.sep}", f"{os.sep}sqlite3{os.sep}")
+TEMPLATE_PATHS = (f"{os.sep}django{os.sep}template{os.sep}",)
+# Every template, including each {% include %}, renders through this frame
+TEMPLATE_RENDER = Template._render.__code__
+# Instrumentation wrappers, never the code that issued a query
+INSTRUMENTATION = {os.path.abspath(timing.__file__), os.path.abspath(__file__)}
+
+
+@lru_cache(maxsize=None)
+def short_path(filename: str) -> str:
+    """``filename`` relative to the project or to the installed package root."""
+    base = os.path.join(str(settings.BASE_DIR), "")
+    marker = f"{os.sep}site-packages{os.sep}"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    if filename.startswith(base):
+        return filename[len(base):]
+    return os.path.basename(filename)
+
+
+def is_project_file(filename: str) -> bool:
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and "site-packages" not in filename
+        and filename not in INSTRUMENTATION
+    )
+
+
+@lru_cache(maxsize=None)
+def _label(code) -> str:
+    return f"{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def classify(filenames: list[str]) -> str:
+    if any(any(part in name for part in ORM_PATHS) for name in filenames):
+        return "orm"
+    if any(any(part in name for part in TEMPLATE_PATHS) for name in filenames):
+        return "template"
+    return "python"
+
+
+SAMPLING_SUPPORTED = hasattr(signal, "SIGALRM") and hasattr(signal, "setitimer")
+
+
+class StackSampler:
+    """Sample the main thread's stack every ``interval`` seconds while entered (Unix only)."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.categories: Counter[str] = Counter()
+        self._sampling = False
+
+    def _sample(self, signum, frame) -> None:
+        if self._sampling:  # the previous sample is still being taken
+            return
+        self._sampling = True
+        try:
+            labels, filenames = [], []
+            while frame is not None:
+                labels.append(_label(frame.f_code))
+                filenames.append(frame.f_code.co_filename)
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+                self.categories[classify(filenames)] += 1
+        finally:
+            self._sampling = False
+
+    def __enter__(self):
+        self._previous = signal.signal(signal.SIGALRM, self._sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous)
+
+    def write_collapsed(self, path: Path) -> None:
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()), encoding="utf-8")
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count: Counter[str] = Counter()
+        self.ms: defaultdict[str, float] = defaultdict(float)
+        self.origins: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.templates: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.ms[sql] += (time.perf_counter() - started) * 1000
+            self.count[sql] += 1
+            origin, template = self._source(sys._getframe(1))
+            self.origins[sql][origin] += 1
+            if template:
+                self.templates[sql][template] += 1
+
+    @staticmethod
+    def _source(frame) -> tuple[str, str | None]:
+        """Innermost project line, and the templates being rendered, outermost first.
+
+        A template that extends another renders its blocks inside the
+        parent's frame, so the chain reads e.g. ``courses/list.html > base.html``.
+        """
+        origin, templates = None, []
+        while frame is not None:
+            code = frame.f_code
+            if origin is None and is_project_file(code.co_filename):
+                origin = f"{short_path(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+            elif code is TEMPLATE_RENDER:
+                templates.append(str(frame.f_locals["self"].origin.template_name))
+            frame = frame.f_back
+        return origin or "?", " > ".join(reversed(templates)) or None
+
+    def breakdown(self, requests: int) -> list[dict]:
+        """One entry per distinct statement, most total time first."""
+        return [
+            {
+                "sql": sql,
+                "per_request": round(self.count[sql] / requests, 2),
+                "total_ms": round(self.ms[sql], 2),
+                "mean_ms": round(self.ms[sql] / self.count[sql], 3),
+                "origins": dict(self.origins[sql].most_common(3)),
+                "templates": dict(self.templates[sql].most_common(3)),
+            }
+            for sql in sorted(self.ms, key=self.ms.get, reverse=True)
+        ]
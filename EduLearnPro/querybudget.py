@@ -0,0 +1,85 @@
+"""Per-view SQL query budgets.
+
+``@query_budget(n)`` counts the queries a view issues on every database
+(including template rendering done inside the view, and reads routed to a
+replica), optionally only for some HTTP ``methods``.
+Going over budget is logged; with
+``QUERY_BUDGET_STRICT`` (defaults to ``DEBUG``) it raises so regressions are
+caught in development and tests. Queries inside ``unbudgeted()`` are left out,
+for one-off repairs such as creating a missing row the first time a view
+sees an old account.
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+_budget: ContextVar[_QueryCounter | None] = ContextVar("query_budget", default=None)
+
+
+@contextmanager
+def count_queries():
+    """Count the queries run inside the block on every database connection."""
+    counter = _QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+@contextmanager
+def unbudgeted():
+    """Leave the queries run inside the block out of the current view's budget."""
+    counter = _budget.get()
+    spent = counter.count if counter is not None else 0
+    try:
+        yield
+    finally:
+        if counter is not None:
+            counter.count = spent
+
+
+def query_budget(max_queries: int, methods: tuple[str, ...] | None = None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is not None and request.method not in methods:
+                return view(request, *args, **kwargs)
+            with count_queries() as counter:
+                token = _budget.set(counter)
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    _budget.reset(token)
+            if counter.count > max_queries:
+                message = f"{view.__qualname__} ran {counter.count} queries (budget {max_queries}) for {request.path}"
+                if getattr(settings, "QUERY_BUDGET_STRICT", settings.DEBUG):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
@@ -0,0 +1,163 @@
+"""Token-bucket rate limiting for expensive endpoints.
+
+``@ratelimit`` guards a view with a per-IP bucket and, optionally, a bucket
+per identifier (the submitted email or username), so a burst is rejected
+with ``429`` and ``Retry-After`` before the view hashes a password or sends
+an email. Rates are written ``"<tokens>/<period>"`` where the period is
+``s``, ``m``, ``h`` or ``d``, optionally with a multiplier (``"5/15m"``): the
+bucket holds that many tokens and refills them evenly over the period.
+
+Buckets live in the ``RATELIMIT_CACHE`` cache (``default``). Every app
+server shares them only if that cache is shared (Redis via ``REDIS_URL``);
+with the default in-memory cache, or if the cache is unavailable, each
+process keeps its own buckets, so a client can get the rate once per
+process. ``RATELIMIT_ENABLED = False`` turns limiting off.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+RATE_RE = re.compile(r"^(\d+)/(\d*)([smhd])$")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+LOCAL_MAX_BUCKETS = 10_000
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """``"5/15m"`` -> ``(5, 900)``: capacity and refill period in seconds."""
+    match = RATE_RE.match(rate.replace(" ", ""))
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}; expected e.g. '10/m' or '5/15m'.")
+    tokens, multiplier, unit = match.groups()
+    return int(tokens), int(multiplier or 1) * PERIODS[unit]
+
+
+class _LocalBuckets:
+    """Bounded in-process bucket store used when the shared cache fails."""
+
+    def __init__(self, max_size: int = LOCAL_MAX_BUCKETS):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            return self.buckets.get(key)
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            self.buckets[key] = value
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_size:
+                self.buckets.popitem(last=False)
+
+
+_local = _LocalBuckets()
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: str):
+        self.name = name
+        self.capacity, self.period = parse_rate(rate)
+        self.refill_per_second = self.capacity / self.period
+
+    def _key(self, value: str) -> str:
+        digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+        return f"ratelimit:{self.name}:{digest}"
+
+    def consume(self, value: str, now: float | None = None) -> int:
+        """Take one token for ``value``; return 0 if allowed, else seconds to wait.
+
+        The read-modify-write is not atomic, so concurrent requests may
+        occasionally both get the last token; the limit is a guard against
+        bursts, not an exact quota.
+        """
+        now = time.time() if now is None else now
+        key = self._key(value)
+        store = caches[getattr(settings, "RATELIMIT_CACHE", "default")]
+        try:
+            state = store.get(key)
+        except Exception as exc:
+            logger.warning("Rate limit cache unavailable (%s); using in-process buckets", exc)
+            store, state = _local, _local.get(key)
+
+        tokens, updated = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        try:
+            store.set(key, (tokens, now), self.period)
+        except Exception:
+            _local.set(key, (tokens, now))
+        if allowed:
+            return 0
+        return max(1, math.ceil((1 - tokens) / self.refill_per_second))
+
+
+def client_ip(request) -> str:
+    return request.META.get("REMOTE_ADDR") or "unknown"
+
+
+def ratelimited_response(request, retry_after: int):
+    message = "Too many attempts. Please wait a moment and try again."
+    if request.GET.get("format") == "json" or request.headers.get("Accept", "").startswith("application/json"):
+        response = JsonResponse({"error": message, "retry_after": retry_after}, status=429)
+    else:
+        response = render(request, "ratelimited.html", {"message": message, "retry_after": retry_after}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def ratelimit(
+    name: str,
+    *,
+    per_ip: str | None = None,
+    per_identifier: str | None = None,
+    identifier: str | Callable | None = None,
+    methods: tuple[str, ...] = ("POST",),
+):
+    """Rate-limit a view by client IP and/or by an identifier.
+
+    ``identifier`` is the POST field holding the identifier or a callable
+    ``(request) -> str | None``. Identifiers are compared case-insensitively.
+    Only requests whose method is in ``methods`` spend tokens.
+    """
+    ip_bucket = TokenBucket(f"{name}:ip", per_ip) if per_ip else None
+    identifier_bucket = TokenBucket(f"{name}:id", per_identifier) if per_identifier and identifier else None
+
+    def get_identifier(request):
+        value = identifier(request) if callable(identifier) else request.POST.get(identifier)
+        return (value or "").strip().lower()
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and getattr(settings, "RATELIMIT_ENABLED", True):
+                retry_after = ip_bucket.consume(client_ip(request)) if ip_bucket else 0
+                if not retry_after and identifier_bucket:
+                    value = get_identifier(request)
+                    if value:
+                        retry_after = identifier_bucket.consume(value)
+                if retry_after:
+                    logger.info("Rate limited %s for %s", name, client_ip(request))
+                    return ratelimited_response(request, retry_after)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,108 @@
+"""Read-replica routing.
+
+Reads go to a replica only where the code opts in with ``use_replica``,
+as a view decorator or a ``with`` block around read-only queries. Everything
+else, every write, and every read inside a transaction stays on
+``default``. Replicas are the aliases listed in ``DATABASE_REPLICAS``
+(one is picked at random per query); with none configured the router
+changes nothing.
+
+Replicas lag behind the primary, so ``ReplicaMiddleware`` gives
+read-your-writes: once a request writes (or uses an unsafe method), the rest
+of it reads from the primary, and the response sets a cookie that keeps
+the client on the primary for ``REPLICA_PIN_SECONDS``. Sessions always
+use the primary, since a lagging session read would log the user out.
+
+Code that caches what it reads should not use a replica: after an
+invalidation it could cache rows from before the write for the whole
+timeout.
+"""
+from __future__ import annotations
+
+import random
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "primary_db"
+PIN_SECONDS = 15
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+PRIMARY_ONLY_APPS = {"sessions"}
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+_request: ContextVar[RequestState | None] = ContextVar("replica_request", default=None)
+
+
+class RequestState:
+    def __init__(self, pinned: bool):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+class use_replica(ContextDecorator):
+    """Let reads in this view or block go to a replica: ``@use_replica()`` or ``with use_replica():``."""
+
+    def _recreate_cm(self):
+        return type(self)()  # one per call, so concurrent requests don't share a token
+
+    def __enter__(self):
+        self._token = _replica_reads.set(True)
+        return self
+
+    def __exit__(self, *exc_info):
+        _replica_reads.reset(self._token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        state = _request.get()
+        if state is not None and state.pinned:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        aliases = replicas()
+        return random.choice(aliases) if aliases else None
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.pinned = state.wrote = True
+        # Explicit, or saving an instance read from a replica would write there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return False if db in replicas() else None
+
+
+class ReplicaMiddleware:
+    """Keep a client on the primary for a while after it writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", PIN_SECONDS)
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        state = RequestState(pinned=unsafe or PIN_COOKIE in request.COOKIES)
+        token = _request.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        if unsafe or state.wrote:
+            response.set_cookie(PIN_COOKIE, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        return response
@@ -0,0 +1,97 @@
+"""Session engine keeping sessions in the shared cache.
+
+Use with ``SESSION_ENGINE = "EduLearnPro.sessions"``. When ``SHARED_CACHE``
+is set, sessions are read from and written to ``SESSION_CACHE_ALIAS``; with
+``SESSION_CACHE_WRITE_THROUGH = True`` (the default) every write also goes
+to ``django_session`` so sessions survive a cache flush, as with Django's
+``cached_db`` engine. With it off the database is never touched, which
+needs a persistent cache.
+
+Without a shared cache each process would see its own copy, and a logout
+handled by one process would leave the session alive in the others, so
+sessions are then read from and written to the database only.
+
+Either way a request only writes the session when its data actually
+changed: views that reassign a key to the value it already holds mark the
+session modified, but saving it again would be a wasted write.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+
+class SessionStore(CachedDBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self.use_cache = getattr(settings, "SHARED_CACHE", False)
+        self.write_through = getattr(settings, "SESSION_CACHE_WRITE_THROUGH", True)
+        self._stored = None  # (session key, serialized data) as last loaded or saved
+
+    def _snapshot(self, data) -> tuple[str | None, bytes]:
+        return self._session_key, self.serializer().dumps(data)
+
+    def load(self):
+        if not self.use_cache:
+            data = DBStore.load(self)
+        elif self.write_through:
+            data = super().load()
+        else:
+            try:
+                data = self._cache.get(self.cache_key)
+            except Exception:
+                data = None
+            if data is None:
+                self._session_key = None
+                data = {}
+        if self._session_key is not None:
+            self._stored = self._snapshot(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if (
+            not must_create
+            and self._stored is not None
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+            and self._stored == self._snapshot(data)
+        ):
+            return
+        if not self.use_cache:
+            DBStore.save(self, must_create)
+        elif self.write_through:
+            super().save(must_create)
+        elif self.session_key is None:
+            return self.create()
+        else:
+            if must_create:
+                stored = self._cache.add(self.cache_key, data, self.get_expiry_age())
+                if not stored:
+                    raise CreateError
+            elif self._cache.get(self.cache_key) is None:
+                # Deleted by a concurrent logout; don't bring it back
+                raise UpdateError
+            else:
+                self._cache.set(self.cache_key, data, self.get_expiry_age())
+        self._stored = self._snapshot(data)
+
+    def exists(self, session_key):
+        if not self.use_cache:
+            return DBStore.exists(self, session_key)
+        if self.write_through:
+            return super().exists(session_key)
+        return bool(session_key) and (self.cache_key_prefix + session_key) in self._cache
+
+    def delete(self, session_key=None):
+        self._stored = None
+        if not self.use_cache:
+            return DBStore.delete(self, session_key)
+        if self.write_through:
+            return super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.cache_key_prefix + session_key)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,7 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'EduLearnPro.timing.ServerTimingMiddleware',  # first, so it measures everything below
     'django.middleware.security.SecurityMiddleware',
+    'EduLearnPro.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,6 +77,9 @@ WSGI_APPLICATION = 'EduLearnPro.wsgi.application'
 # Email Configuration
 # Option 1: For testing (emails print to console) - Uncomment the line below:
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Or write each email to a file under EMAIL_FILE_PATH:
+# EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
 
 # Option 2: For production (sends actual emails via SMTP)
 # For Gmail: Use App Password (not your regular password)
@@ -101,6 +107,14 @@ DEFAULT_FROM_EMAIL = "sujaymandal4560@gmail.com"  # Sender email address
 # Yahoo: smtp.mail.yahoo.com, port 587
 # Custom SMTP: Use your provider's SMTP settings
 
+# Outgoing email is queued in the database and delivered by
+# `python manage.py send_outbox --loop` over one reused connection
+EMAIL_OUTBOX_BACKEND = None  # None = EMAIL_BACKEND
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_DELAY = 30  # seconds before the first retry, doubling each time
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -108,12 +122,76 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Local stand-in read replica: a copy of db.sqlite3 refreshed by
+    # `manage.py sync_replica`. Tests read it through the default database.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+# Views and blocks marked with EduLearnPro.replicas.use_replica read from one of
+# DATABASE_REPLICAS; a client that writes stays on the primary for
+# REPLICA_PIN_SECONDS. Replicas are off unless listed in the DATABASE_REPLICAS
+# environment variable (comma-separated aliases, e.g. DATABASE_REPLICAS=replica).
+# Keep the local replica current with `manage.py sync_replica --loop` while
+# it is enabled: a copy that stops updating serves stale pages.
+DATABASE_ROUTERS = ['EduLearnPro.replicas.ReplicaRouter']
+DATABASE_REPLICAS = [alias.strip() for alias in os.environ.get('DATABASE_REPLICAS', '').split(',') if alias.strip()]
+REPLICA_PIN_SECONDS = 15
+
 
 AUTH_USER_MODEL = 'users.User'
 
+# Set REDIS_URL (e.g. redis://127.0.0.1:6379/0, needs the redis package) to
+# give every app server one shared cache. Without it each process keeps its
+# own in-memory cache: fine for cached pages, but state that must be seen by
+# every process (sessions, password reset codes) then stays in the database.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED_CACHE = bool(REDIS_URL)
+
+# Token-bucket limits on login, registration, OTP and certificate verification
+# views (see EduLearnPro.ratelimit). Buckets live in this cache alias, so
+# without a shared cache each process enforces the rates on its own.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'default'
+
+# Sessions are only written when they change (see EduLearnPro/sessions.py).
+# They live in the cache only when SHARED_CACHE is set (the database
+# otherwise). Write-through keeps a copy in the database so sessions survive
+# a cache restart; turn it off with a persistent cache.
+SESSION_ENGINE = 'EduLearnPro.sessions'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_CACHE_WRITE_THROUGH = True
+
+# Per-request SQL, template and cache metrics (see EduLearnPro/timing.py).
+# One JSON line per request is logged on "EduLearnPro.timing" at INFO;
+# configure LOGGING to ship it. Slow requests are logged at WARNING. The
+# Server-Timing header exposes the same numbers to every client, so it is
+# only sent in development.
+SERVER_TIMING_HEADER = DEBUG
+SERVER_TIMING_SLOW_MS = 500
+SERVER_TIMING_SLOW_LOG_QUERIES = 10
+
+# Password reset codes (see users.otp). The cache store needs a cache shared
+# by all app servers, so codes stay in the database (run `manage.py
+# cleanup_otps` periodically) unless REDIS_URL is set.
+PASSWORD_RESET_OTP_STORE = 'users.otp.CacheOTPStore' if SHARED_CACHE else 'users.otp.DatabaseOTPStore'
+PASSWORD_RESET_OTP_CACHE = 'default'
+PASSWORD_RESET_OTP_TTL = 600  # seconds
+PASSWORD_RESET_OTP_MAX_ATTEMPTS = 5
+
+# Username-or-email login in a single query (see users.backends)
+AUTHENTICATION_BACKENDS = [
+    'users.backends.EmailOrUsernameBackend',
+]
+
 
 # Authentication redirects
 LOGIN_URL = 'users:login'
@@ -164,6 +242,20 @@ TEMPLATES[0]["DIRS"] = [BASE_DIR / "templates"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Certificate PDFs
+# Rendered PDFs are stored under MEDIA_ROOT/certificates/ and reused until the
+# template version changes: bump it whenever the layout in enrollments/pdf.py
+# changes so stale files are not served for new downloads.
+CERTIFICATE_TEMPLATE_VERSION = "1"
+CERTIFICATE_RENDER_WORKERS = None  # None = min(4, number of CPU cores)
+CERTIFICATE_RENDER_TIMEOUT = 10  # seconds a download waits for a fresh render
+
+# Public certificate verification (/certificates/verify/<id>/)
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = 60 * 60 * 24
+CERTIFICATE_VERIFY_NEGATIVE_CACHE_TIMEOUT = 5 * 60
+CERTIFICATE_VERIFY_RATE_LIMIT = 30  # lookups per client IP ...
+CERTIFICATE_VERIFY_RATE_WINDOW = 60  # ... per this many seconds (read at startup)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,195 @@
+"""Per-request performance metrics.
+
+``ServerTimingMiddleware`` (keep it first in ``MIDDLEWARE``) measures every
+request: SQL query count and time on all database connections, repeated
+SQL (the same statement run more than once, which is how an N+1 shows up),
+template render time and cache hits and misses. The numbers are logged as
+one JSON line on the ``EduLearnPro.timing`` logger at INFO and, with
+``SERVER_TIMING_HEADER`` (defaults to ``DEBUG``, since it tells every client
+how the request was served), sent in a ``Server-Timing`` header that
+browser dev tools show. Requests slower than
+``SERVER_TIMING_SLOW_MS`` are also logged at WARNING with their slowest and
+most repeated SQL.
+
+Template time covers top-level renders (includes are part of their parent)
+and includes queries run lazily from the template. Cache counts cover
+``get``/``get_many`` on every configured cache. Both are measured by wrapping
+those methods once per process; outside a measured request the wrappers
+just call through.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+SLOW_MS = 500
+SLOW_LOG_QUERIES = 10
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sql_counts: Counter[str] = Counter()
+        self.sql_ms: defaultdict[str, float] = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing one query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.db_ms += elapsed
+            self.sql_counts[sql] += 1
+            self.sql_ms[sql] += elapsed
+
+    @property
+    def duplicates(self) -> int:
+        """Executions beyond the first of every repeated statement."""
+        return sum(count - 1 for count in self.sql_counts.values() if count > 1)
+
+    def repeated_sql(self, limit: int) -> list[dict]:
+        return [
+            {"sql": sql, "count": count, "ms": round(self.sql_ms[sql], 2)}
+            for sql, count in self.sql_counts.most_common(limit)
+            if count > 1
+        ]
+
+    def slowest_sql(self, limit: int) -> list[dict]:
+        slowest = sorted(self.sql_ms.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{"sql": sql, "count": self.sql_counts[sql], "ms": round(ms, 2)} for sql, ms in slowest]
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _MISSING, version)
+        metrics = _current.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _instrument(cls, name, decorate) -> None:
+    method = getattr(cls, name)
+    if not getattr(method, "server_timing", False):
+        setattr(cls, name, decorate(method))
+
+
+def install_instrumentation() -> None:
+    """Wrap template rendering and cache reads once per process."""
+    _instrument(Template, "render", _timed_render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _instrument(backend, "get", _counted_get)
+        if backend.get_many is not BaseCache.get_many:  # the base version calls get()
+            _instrument(backend, "get_many", _counted_get_many)
+
+
+def server_timing_header(metrics: RequestMetrics, total_ms: float) -> str:
+    return ", ".join([
+        f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries, {metrics.duplicates} repeated"',
+        f"tpl;dur={metrics.template_ms:.1f}",
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+        f"total;dur={total_ms:.1f}",
+    ])
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "SERVER_TIMING_SLOW_MS", SLOW_MS)
+        self.send_header = getattr(settings, "SERVER_TIMING_HEADER", settings.DEBUG)
+        install_instrumentation()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        if self.send_header:
+            response["Server-Timing"] = server_timing_header(metrics, total_ms)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_ms, 1),
+            "repeated_queries": metrics.duplicates,
+            "template_ms": round(metrics.template_ms, 1),
+            "cache_hits": metrics.cache_hits,
+            "cache_misses": metrics.cache_misses,
+        }
+        logger.info(json.dumps(record))
+        if total_ms >= self.slow_ms:
+            limit = getattr(settings, "SERVER_TIMING_SLOW_LOG_QUERIES", SLOW_LOG_QUERIES)
+            record.update(slowest_sql=metrics.slowest_sql(limit), repeated_sql=metrics.repeated_sql(limit))
+            logger.warning("Slow request: %s", json.dumps(record))
+        return response
@@ -20,6 +20,7 @@ from django.contrib import admin
 from django.urls import path, include
 from users import views as user_views
 from courses.views import home 
+from enrollments.views import verify_certificate
 
 urlpatterns = [
     path('', home, name='home'),
@@ -27,6 +28,7 @@ urlpatterns = [
     path('users/', include('users.urls')),
     path('courses/', include(('courses.urls', 'courses'), namespace='courses')),
     path('enrollments/', include('enrollments.urls')),
+    path('certificates/verify/<str:certificate_id>/', verify_certificate, name='verify-certificate'),
 ]
 
 # Serve static and media files in development
@@ -0,0 +1,108 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from courses.models import Course, Lesson
+from enrollments.services import enroll_user
+from users.models import Profile
+
+User = get_user_model()
+
+PREFIX = "bench-sessions"
+PASSWORD = "bench-sessions-password"
+
+# EduLearnPro.sessions only uses the cache with SHARED_CACHE set; the cache
+# rows set it so they measure that path (this process is its only reader)
+ENGINES = (
+    ("database", {"SESSION_ENGINE": "django.contrib.sessions.backends.db"}),
+    ("database, skip unchanged", {"SESSION_ENGINE": "EduLearnPro.sessions", "SHARED_CACHE": False}),
+    (
+        "cache + write-through",
+        {"SESSION_ENGINE": "EduLearnPro.sessions", "SHARED_CACHE": True, "SESSION_CACHE_WRITE_THROUGH": True},
+    ),
+    (
+        "cache only",
+        {"SESSION_ENGINE": "EduLearnPro.sessions", "SHARED_CACHE": True, "SESSION_CACHE_WRITE_THROUGH": False},
+    ),
+)
+
+
+class Command(BaseCommand):
+    help = "Compare session engines on the catalog and lesson pages as a logged-in student"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests timed per page and engine",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+        lesson = self._fixture()
+        pages = (
+            ("catalog", reverse("courses:list")),
+            ("lesson", reverse("courses:lesson", kwargs={"course_slug": lesson.course.slug, "pk": lesson.pk})),
+        )
+        for label, overrides in ENGINES:
+            with override_settings(**overrides):
+                # A new client builds a new handler, so the middleware picks up the engine
+                client = Client()
+                client.defaults["HTTP_HOST"] = "127.0.0.1:8000"
+                if not client.login(username=f"{PREFIX}-student", password=PASSWORD):
+                    raise CommandError("Could not log in the benchmark student.")
+                for page, url in pages:
+                    self._report(f"{label} / {page}", client, url, options["requests"])
+                client.logout()
+
+    def _fixture(self) -> Lesson:
+        instructor, _ = User.objects.get_or_create(username=f"{PREFIX}-instructor")
+        Profile.objects.get_or_create(user=instructor, defaults={"role": "instructor"})
+        course, _ = Course.objects.get_or_create(
+            slug=f"{PREFIX}-course",
+            defaults={
+                "title": "Session Benchmark Course",
+                "description": "Auto-created by benchmark_sessions",
+                "instructor": instructor,
+                "status": "published",
+            },
+        )
+        lesson, _ = Lesson.objects.get_or_create(
+            course=course, order=1, defaults={"title": "Session Benchmark Lesson", "content": "..."}
+        )
+        student, created = User.objects.get_or_create(username=f"{PREFIX}-student")
+        if created:
+            student.set_password(PASSWORD)
+            student.save()
+        Profile.objects.get_or_create(user=student, defaults={"role": "student"})
+        enroll_user(student, course)
+        return lesson
+
+    def _report(self, label, client, url, count):
+        client.get(url)  # warm up caches and lesson progress
+        timings = []
+        queries = session_queries = 0
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{label}: {url} returned {response.status_code}.")
+            queries += len(captured)
+            session_queries += sum("django_session" in query["sql"] for query in captured)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label:<36} p50={statistics.median(timings):7.2f}ms p95={p95:7.2f}ms "
+            f"queries/req={queries / count:5.1f} session queries/req={session_queries / count:.2f}"
+        )
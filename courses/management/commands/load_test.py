@@ -0,0 +1,172 @@
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.urls import reverse
+
+from courses.models import Course, Lesson
+from EduLearnPro.benchmarking import PREFIX, benchmark_users, percentiles
+from EduLearnPro.loadtest import STEPS, init_worker, run_users
+from enrollments.models import Enrollment
+
+SLUG, PK = "__slug__", 987654321
+
+
+def _template(name: str, **kwargs) -> str:
+    return reverse(name, kwargs=kwargs).replace(SLUG, "{slug}").replace(str(PK), "{pk}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent student journeys (catalog, course detail, payment, lessons, "
+        "mark complete) against the seed_benchmark_data dataset and report throughput, "
+        "latency percentiles, errors and SQLite lock timeouts per step"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Virtual users (one bench student each)")
+        parser.add_argument("--processes", type=int, default=1, help="Processes to spread the users over")
+        parser.add_argument("--journeys", type=int, default=5, help="Journeys per virtual user")
+        parser.add_argument("--lessons", type=int, default=3, help="Lessons opened and completed per journey")
+        parser.add_argument("--think", type=float, default=0.0, help="Seconds to pause after each request")
+        parser.add_argument(
+            "--base-url",
+            default="",
+            help="Send requests over HTTP to a running server (e.g. http://127.0.0.1:8000) "
+            "instead of in-process; the server must use this database",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for course choice")
+        parser.add_argument("--output", help="Also write the report as JSON to this file")
+
+    def handle(self, *args, **options):
+        for name in ("users", "processes", "journeys"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+        processes = min(options["processes"], options["users"])
+        user_ids = list(
+            benchmark_users().filter(username__startswith=f"{PREFIX}student-").order_by("pk")
+            .values_list("pk", flat=True)[:options["users"]]
+        )
+        if len(user_ids) < options["users"]:
+            raise CommandError(
+                f"Only {len(user_ids)} benchmark students exist. Run: manage.py seed_benchmark_data --students N"
+            )
+
+        plan = self._plan(user_ids)
+        settings = {key: options[key] for key in ("journeys", "lessons", "think", "base_url", "seed")}
+        chunks = [user_ids[index::processes] for index in range(processes)]
+        self.stdout.write(
+            f"{len(user_ids)} virtual users in {processes} process(es), {options['journeys']} journeys each, "
+            f"{'over HTTP to ' + options['base_url'] if options['base_url'] else 'in-process'}"
+        )
+
+        if options["verbosity"] < 2:
+            # A traceback and a timing line per request would bury the report
+            for name in ("django.request", "EduLearnPro.timing"):
+                logging.getLogger(name).setLevel(logging.CRITICAL)
+
+        started = time.perf_counter()
+        if processes == 1:
+            results = [run_users(plan, chunks[0], settings)]
+        else:
+            connections.close_all()  # forked children must not share the parent's connection
+            with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as pool:
+                results = list(pool.map(run_users, [plan] * processes, chunks, [settings] * processes))
+        elapsed = time.perf_counter() - started
+
+        report = self._report(results, elapsed, options, processes)
+        self._print(report)
+        if options["output"]:
+            output = Path(options["output"])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+
+    def _plan(self, user_ids: list[int]) -> dict:
+        """Plain data the virtual users need, so workers never query for it."""
+        courses: dict[str, list[int]] = {
+            slug: [] for slug in Course.objects.filter(slug__startswith=PREFIX, status="published").values_list("slug", flat=True)
+        }
+        if not courses:
+            raise CommandError("No benchmark courses found. Run: manage.py seed_benchmark_data")
+        for slug, lesson_id in (
+            Lesson.objects.filter(course__slug__in=list(courses)).order_by("order").values_list("course__slug", "pk")
+        ):
+            courses[slug].append(lesson_id)
+        enrolled = defaultdict(list)
+        for user_id, slug in Enrollment.objects.filter(user_id__in=user_ids).values_list("user_id", "course__slug"):
+            enrolled[user_id].append(slug)
+        return {
+            "courses": courses,
+            "enrolled": dict(enrolled),
+            "urls": {
+                "catalog": reverse("courses:list"),
+                "detail": _template("courses:detail", slug=SLUG),
+                "payment": _template("enrollments:payment", slug=SLUG),
+                "pay": _template("enrollments:process-payment", slug=SLUG),
+                "lesson": _template("courses:lesson", course_slug=SLUG, pk=PK),
+                "complete": _template("enrollments:mark-lesson-complete", lesson_id=PK),
+            },
+        }
+
+    def _report(self, results: list[dict], elapsed: float, options: dict, processes: int) -> dict:
+        by_step = defaultdict(list)
+        for result in results:
+            for step, ms, status, outcome in result["samples"]:
+                by_step[step].append((ms, status, outcome))
+
+        steps = {}
+        for step in STEPS:
+            samples = by_step.get(step)
+            if not samples:
+                continue
+            errors = sum(outcome != "ok" for _, _, outcome in samples)
+            steps[step] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "latency_ms": percentiles([ms for ms, _, _ in samples]),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4),
+                "locked": sum(outcome == "locked" for _, _, outcome in samples),
+                "statuses": {str(status): count for status, count in sorted(Counter(s for _, s, _ in samples).items())},
+            }
+        requests = sum(step["requests"] for step in steps.values())
+        completed = sum(result["completed"] for result in results)
+        return {
+            "users": options["users"],
+            "processes": processes,
+            "journeys_per_user": options["journeys"],
+            "target": options["base_url"] or "in-process",
+            "database": connection.vendor,
+            "seconds": round(elapsed, 2),
+            "journeys_completed": completed,
+            "journeys_failed": sum(result["failed"] for result in results),
+            "journeys_per_second": round(completed / elapsed, 2),
+            "requests": requests,
+            "requests_per_second": round(requests / elapsed, 1),
+            "errors": sum(step["errors"] for step in steps.values()),
+            "locked": sum(step["locked"] for step in steps.values()),
+            "steps": steps,
+        }
+
+    def _print(self, report: dict) -> None:
+        self.stdout.write(
+            f"{'step':<10} {'requests':>8} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'locked':>7}"
+        )
+        for name, step in report["steps"].items():
+            latency = step["latency_ms"]
+            self.stdout.write(
+                f"{name:<10} {step['requests']:>8} {step['throughput_rps']:>7} {latency['p50']:>7.1f}ms "
+                f"{latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms {step['errors']:>7} {step['locked']:>7}"
+            )
+        style = self.style.SUCCESS if not report["errors"] else self.style.WARNING
+        self.stdout.write(style(
+            f"{report['journeys_completed']} journeys completed, {report['journeys_failed']} failed in "
+            f"{report['seconds']}s ({report['journeys_per_second']}/s, {report['requests_per_second']} req/s); "
+            f"{report['errors']} errors, {report['locked']} database-locked"
+        ))
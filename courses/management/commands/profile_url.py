@@ -0,0 +1,165 @@
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+from contextlib import ExitStack, nullcontext
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.test import Client
+
+from EduLearnPro.benchmarking import percentiles
+from EduLearnPro.profiling import SAMPLING_SUPPORTED, QueryRecorder, StackSampler
+from users.models import email_equals
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Request a URL repeatedly through the test client and write cProfile stats, a "
+        "collapsed-stack file for flamegraphs and a per-query breakdown"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="URL path to request, e.g. /courses/")
+        parser.add_argument("--user", help="Username or email to log in as (default: anonymous)")
+        parser.add_argument("--method", choices=["get", "post"], default="get")
+        parser.add_argument("--data", default="", help="Query string or form body, e.g. 'q=python&page=2'")
+        parser.add_argument("--xhr", action="store_true", help="Send X-Requested-With: XMLHttpRequest")
+        parser.add_argument("--iterations", type=int, default=20, help="Requests per pass")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests first")
+        parser.add_argument("--interval", type=float, default=1.0, help="Stack sampling interval in ms")
+        parser.add_argument("--limit", type=int, default=25, help="Rows to print for functions and queries")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "tottime", "ncalls"], default="cumulative", help="cProfile sort order"
+        )
+        parser.add_argument(
+            "--output-dir",
+            help="Where to write the files (default: benchmark-results/profiles)",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        client = Client()
+        client.defaults["HTTP_HOST"] = "127.0.0.1:8000"
+        if options["user"]:
+            user = User.objects.filter(Q(username=options["user"]) | email_equals(options["user"])).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']!r}.")
+            client.force_login(user)
+        extra = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"} if options["xhr"] else {}
+        data = dict(parse_qsl(options["data"]))
+        send = getattr(client, options["method"])
+        path = options["path"]
+
+        def request():
+            return send(path, data, **extra)
+
+        for _ in range(options["warmup"]):
+            response = request()
+        iterations = options["iterations"]
+
+        # Pass 1: wall time, queries and stack samples. Pass 2: cProfile, whose
+        # overhead would distort the first pass's timings.
+        recorder = QueryRecorder()
+        sampler = StackSampler(options["interval"] / 1000) if SAMPLING_SUPPORTED else None
+        if sampler is None:
+            self.stdout.write(self.style.WARNING(
+                "Stack sampling needs SIGALRM, which this platform lacks; writing cProfile stats and queries only."
+            ))
+        timings, statuses = [], set()
+        with sampler or nullcontext():
+            for _ in range(iterations):
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(recorder))
+                    started = time.perf_counter()
+                    response = request()
+                    timings.append((time.perf_counter() - started) * 1000)
+                statuses.add(response.status_code)
+
+        profile = cProfile.Profile()
+        for _ in range(iterations):
+            profile.enable()
+            request()
+            profile.disable()
+
+        stem = f"{re.sub(r'[^A-Za-z0-9]+', '-', path).strip('-') or 'root'}-{datetime.now():%Y%m%d-%H%M%S}"
+        directory = Path(options["output_dir"] or settings.BASE_DIR / "benchmark-results" / "profiles")
+        directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(directory / f"{stem}.prof")
+        if sampler is not None:
+            sampler.write_collapsed(directory / f"{stem}.collapsed")
+        queries = recorder.breakdown(iterations)
+        summary = {
+            "path": path,
+            "method": options["method"].upper(),
+            "user": options["user"],
+            "iterations": iterations,
+            "statuses": sorted(statuses),
+            "latency_ms": percentiles(timings),
+            "queries_per_request": round(sum(recorder.count.values()) / iterations, 1),
+            "query_ms_per_request": round(sum(recorder.ms.values()) / iterations, 2),
+            "time_share": self._time_share(sampler),
+            "queries": queries,
+        }
+        (directory / f"{stem}-queries.json").write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+
+        self._print(summary, profile, options["limit"], options["sort"])
+        if any(status >= 400 for status in statuses):
+            self.stdout.write(self.style.WARNING(f"Responses had status {sorted(statuses)}; check the path and user."))
+        collapsed = f", {stem}.collapsed (flamegraph.pl or speedscope)" if sampler is not None else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"\nWrote {directory / stem}.prof (cProfile; open with snakeviz or pstats)"
+            f"{collapsed} and {stem}-queries.json"
+        ))
+
+    @staticmethod
+    def _time_share(sampler: StackSampler | None) -> dict | None:
+        if sampler is None:
+            return None
+        samples = sum(sampler.categories.values()) or 1
+        return {
+            category: round(sampler.categories[category] / samples, 3)
+            for category in ("orm", "template", "python")
+        }
+
+    def _print(self, summary: dict, profile: cProfile.Profile, limit: int, sort: str) -> None:
+        latency = summary["latency_ms"]
+        share = summary["time_share"]
+        self.stdout.write(
+            f"{summary['method']} {summary['path']} x{summary['iterations']}: p50={latency['p50']:.2f}ms "
+            f"p95={latency['p95']:.2f}ms, {summary['queries_per_request']} queries "
+            f"({summary['query_ms_per_request']}ms) per request"
+        )
+        if share is not None:
+            self.stdout.write(
+                f"Time share: ORM {share['orm']:.0%}, templates {share['template']:.0%}, "
+                f"other Python {share['python']:.0%} (ORM includes queries run from templates)"
+            )
+
+        self.stdout.write(f"\nQueries by total time (top {limit}):")
+        for query in summary["queries"][:limit]:
+            origin = next(iter(query["origins"]), "?")
+            template = next(iter(query["templates"]), None)
+            self.stdout.write(
+                f"  {query['total_ms']:8.2f}ms {query['per_request']:>6}x/req  {origin}"
+                + (f" [{template}]" if template else "")
+            )
+            self.stdout.write(f"      {query['sql'][:160]}")
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats(sort).print_stats(limit)
+        self.stdout.write(f"\nFunctions by {sort} (top {limit}):")
+        self.stdout.write(stream.getvalue().split("\n", 4)[-1].rstrip())
+
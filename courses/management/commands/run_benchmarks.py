@@ -0,0 +1,158 @@
+import json
+import subprocess
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from EduLearnPro.benchmarking import PREFIX, benchmark_users, percentiles
+from EduLearnPro.querybudget import count_queries
+from enrollments.models import Enrollment
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency percentiles and query counts of the main pages against the "
+        "seed_benchmark_data dataset and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Timed requests per page")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per page first")
+        parser.add_argument(
+            "--output",
+            help="JSON file to write (default: benchmark-results/<timestamp>-<commit>.json)",
+        )
+        parser.add_argument("--compare", help="Earlier results file to print p50/p95 changes against")
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the cache before every request to measure uncached paths",
+        )
+        parser.add_argument("--only", default="", help="Comma-separated page names to run")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        student = benchmark_users().filter(username=f"{PREFIX}student-0").first()
+        instructor = benchmark_users().filter(username=f"{PREFIX}instructor-0").first()
+        enrollment = (
+            Enrollment.objects.filter(user=student).select_related("course").order_by("pk").first() if student else None
+        )
+        if instructor is None or enrollment is None:
+            raise CommandError("No benchmark data found. Run: manage.py seed_benchmark_data")
+        course = enrollment.course
+        lesson = course.lessons.order_by("order").first()
+
+        as_student, as_instructor = self._client(student), self._client(instructor)
+        xhr = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+        pages = [
+            ("home", as_student, "get", reverse("home"), {}),
+            ("course_list", as_student, "get", reverse("courses:list"), {}),
+            ("detail", as_student, "get", reverse("courses:detail", kwargs={"slug": course.slug}), {}),
+            ("lesson_view", as_student, "get", reverse("courses:lesson", kwargs={"course_slug": course.slug, "pk": lesson.pk}), {}),
+            ("my_courses", as_student, "get", reverse("enrollments:my-courses"), {}),
+            ("student_dashboard", as_student, "get", reverse("users:student_dashboard"), {}),
+            ("instructor_dashboard", as_instructor, "get", reverse("courses:instructor-dashboard"), {}),
+            ("instructor_dashboard_users", as_instructor, "get", reverse("users:instructor_dashboard"), {}),
+            # Toggles the lesson on every request, so completions and undos alternate
+            ("mark_lesson_complete", as_student, "post", reverse("enrollments:mark-lesson-complete", kwargs={"lesson_id": lesson.pk}), xhr),
+        ]
+        only = {name.strip() for name in options["only"].split(",") if name.strip()}
+        if only - {page[0] for page in pages}:
+            raise CommandError(f"Unknown pages: {', '.join(sorted(only - {page[0] for page in pages}))}")
+
+        results = {}
+        for name, client, method, url, extra in pages:
+            if only and name not in only:
+                continue
+            results[name] = self._measure(name, client, method, url, extra, options)
+
+        report = {
+            "commit": _git_commit(),
+            "created_at": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "iterations": options["iterations"],
+            "cold_cache": options["cold_cache"],
+            "database": connection.vendor,
+            "results": results,
+        }
+        output = Path(options["output"] or (
+            settings.BASE_DIR / "benchmark-results" / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit']}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+        if options["compare"]:
+            self._compare(Path(options["compare"]), results)
+
+    def _client(self, user) -> Client:
+        client = Client()
+        client.defaults["HTTP_HOST"] = "127.0.0.1:8000"
+        client.force_login(user)
+        return client
+
+    def _measure(self, name, client, method, url, extra, options) -> dict:
+        send = getattr(client, method)
+        cache = caches["default"]
+        for _ in range(options["warmup"]):
+            send(url, **extra)
+
+        timings, queries, errors = [], [], 0
+        for _ in range(options["iterations"]):
+            if options["cold_cache"]:
+                # Sessions survive this: they are in the database unless SHARED_CACHE
+                # is set, and then written through to it by default
+                cache.clear()
+            # Every connection, so reads routed to a replica are counted too
+            with count_queries() as counter:
+                started = time.perf_counter()
+                response = send(url, **extra)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+            errors += response.status_code >= 400
+
+        result = {
+            "url": url,
+            "method": method.upper(),
+            "latency_ms": percentiles(timings),
+            "queries": {"min": min(queries), "max": max(queries), "mean": round(sum(queries) / len(queries), 1)},
+            "errors": errors,
+        }
+        latency = result["latency_ms"]
+        self.stdout.write(
+            f"{name:<28} p50={latency['p50']:8.2f}ms p95={latency['p95']:8.2f}ms p99={latency['p99']:8.2f}ms "
+            f"queries={result['queries']['mean']:<5} errors={errors}"
+        )
+        return result
+
+    def _compare(self, path: Path, results: dict) -> None:
+        try:
+            previous = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+        self.stdout.write(f"\nChange against {path.name} (commit {previous.get('commit', '?')}):")
+        for name, result in results.items():
+            before = previous.get("results", {}).get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ("p50", "p95"):
+                old, new = before["latency_ms"][key], result["latency_ms"][key]
+                changes.append(f"{key} {old:.2f} -> {new:.2f}ms ({(new - old) / old * 100 if old else 0:+.0f}%)")
+            changes.append(f"queries {before['queries']['mean']} -> {result['queries']['mean']}")
+            self.stdout.write(f"{name:<28} " + ", ".join(changes))
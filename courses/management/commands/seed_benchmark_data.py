@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from EduLearnPro.benchmarking import PASSWORD, delete_benchmark_data, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic instructors, courses, lessons, students, enrollments and lesson "
+        "progress with bulk inserts for run_benchmarks and the load test"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--instructors", type=int, default=10)
+        parser.add_argument("--courses-per-instructor", type=int, default=5)
+        parser.add_argument("--lessons", type=int, default=10, help="Lessons per course")
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--enrollments", type=int, default=3, help="Courses each student enrolls in")
+        parser.add_argument(
+            "--completion",
+            type=float,
+            default=0.5,
+            help="Average fraction of a course's lessons each student has completed",
+        )
+        parser.add_argument("--days", type=int, default=30, help="Spread completions over this many past days")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible data")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete existing benchmark data first",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the benchmark data and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["delete"] or options["replace"]:
+            deleted = delete_benchmark_data()
+            self.stdout.write(f"Deleted {deleted} benchmark rows.")
+            if options["delete"]:
+                return
+        if min(options["instructors"], options["courses_per_instructor"], options["lessons"], options["students"]) < 1:
+            raise CommandError("--instructors, --courses-per-instructor, --lessons and --students must be at least 1.")
+        if not 0 <= options["completion"] <= 1:
+            raise CommandError("--completion must be between 0 and 1.")
+
+        started = time.perf_counter()
+        try:
+            counts = seed_benchmark_data(
+                instructors=options["instructors"],
+                courses_per_instructor=options["courses_per_instructor"],
+                lessons_per_course=options["lessons"],
+                students=options["students"],
+                enrollments_per_student=options["enrollments"],
+                completion=options["completion"],
+                days=options["days"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+        except ValueError as exc:
+            raise CommandError(f"{exc} Use --replace.")
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {elapsed:.1f}s."))
+        self.stdout.write(f"Benchmark users are bench-student-N / bench-instructor-N with password '{PASSWORD}'.")
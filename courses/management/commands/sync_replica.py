@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from EduLearnPro.replicas import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary database over a stand-in read replica (run with --loop "
+        "to simulate a replica that trails the primary)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="replica", help="Replica alias to refresh (default: replica)")
+        parser.add_argument("--loop", action="store_true", help="Keep refreshing instead of copying once")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds between copies with --loop; the replica lags by up to this much",
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if alias not in connections or alias == DEFAULT_DB_ALIAS:
+            raise CommandError(f"{alias!r} is not a replica alias in DATABASES.")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("sync_replica only copies SQLite databases; use real replication elsewhere.")
+        target = str(replica.settings_dict["NAME"])
+
+        while True:
+            started = time.perf_counter()
+            # Copy to a temporary file and swap it in, so readers never see a
+            # half-written replica or wait on its lock
+            temporary = f"{target}.tmp"
+            primary.ensure_connection()
+            destination = sqlite3.connect(temporary)
+            try:
+                primary.connection.backup(destination)
+            finally:
+                destination.close()
+            os.replace(temporary, target)
+            primary.close()
+            unapplied = self._unapplied_migrations(alias)
+            if unapplied:
+                shown = ", ".join(unapplied[:3]) + (", ..." if len(unapplied) > 3 else "")
+                raise CommandError(
+                    f"The copy in {target} is missing {len(unapplied)} migrations ({shown}); "
+                    "run `manage.py migrate` on the primary and sync again."
+                )
+            self.stdout.write(f"Copied the primary to {target} in {time.perf_counter() - started:.2f}s.")
+            if not options["loop"]:
+                if alias not in replicas():
+                    self.stdout.write(f"Set DATABASE_REPLICAS={alias} and restart the server to read from it.")
+                self.stdout.write(self.style.WARNING(
+                    "This copy will not change again; run with --loop to keep the replica current."
+                ))
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
+
+    @staticmethod
+    def _unapplied_migrations(alias: str) -> list[str]:
+        """Migrations the replica's copy of the schema lacks."""
+        replica = connections[alias]
+        replica.close()  # still open on the file that was just replaced
+        try:
+            executor = MigrationExecutor(replica)
+            plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        finally:
+            replica.close()
+        return [f"{migration.app_label}.{migration.name}" for migration, _ in plan]
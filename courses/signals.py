@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course, Lesson
+from .stats import course_instructor_key, invalidate_course_stats, invalidate_instructor_stats
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_stats_for_course(sender, instance: Course, **kwargs) -> None:
+    cache.delete(course_instructor_key(instance.pk))
+    invalidate_instructor_stats(instance.instructor_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_stats_for_lesson(sender, instance: Lesson, **kwargs) -> None:
+    invalidate_course_stats(instance.course_id)
@@ -0,0 +1,121 @@
+"""Instructor dashboard statistics, built on the daily rollup and cached per instructor.
+
+The cache entry is dropped whenever something that feeds the numbers changes:
+enrollment/completion/lesson-completion events (via ``enrollments.rollups``)
+and course or lesson edits (via ``courses.signals``).
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from enrollments.models import Enrollment
+from .models import Course, Lesson
+
+STATS_CACHE_TIMEOUT = 5 * 60
+RECENT_ENROLLMENTS = 10
+
+
+def stats_cache_key(instructor_id: int) -> str:
+    return f"courses:instructor-stats:{instructor_id}"
+
+
+def course_instructor_key(course_id: int) -> str:
+    return f"courses:instructor-of:{course_id}"
+
+
+def invalidate_instructor_stats(instructor_id: int) -> None:
+    cache.delete(stats_cache_key(instructor_id))
+
+
+def invalidate_course_stats(course_id: int) -> None:
+    """Drop the cached stats of the instructor who owns ``course_id``."""
+    instructor_id = cache.get(course_instructor_key(course_id))
+    if instructor_id is None:
+        instructor_id = Course.objects.filter(pk=course_id).values_list("instructor_id", flat=True).first()
+        if instructor_id is None:
+            return
+        cache.set(course_instructor_key(course_id), instructor_id, None)
+    invalidate_instructor_stats(instructor_id)
+
+
+def compute_instructor_stats(instructor) -> dict:
+    """Per-course and total metrics for ``instructor``.
+
+    Enrollment and completion counts are summed from the daily rollup
+    (``enrollments.rollups.course_totals``) rather than counted over
+    ``Enrollment``. The remaining course metrics come from one grouped query;
+    the distinct student count and the lesson count ride along as scalar
+    subqueries. The recent enrollments list is the only other query.
+    """
+    from enrollments.rollups import course_totals  # imports this module
+
+    lesson_count = (
+        Lesson.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    distinct_students = (
+        Enrollment.objects.filter(course__instructor=instructor)
+        .order_by()
+        .values("course__instructor")
+        .annotate(total=Count("user", distinct=True))
+        .values("total")
+    )
+    courses = list(
+        Course.objects.filter(instructor=instructor)
+        .annotate(
+            avg_progress=Coalesce(Avg("enrollments__progress"), Value(0.0)),
+            lesson_count=Coalesce(Subquery(lesson_count, output_field=IntegerField()), Value(0)),
+            total_students=Coalesce(Subquery(distinct_students, output_field=IntegerField()), Value(0)),
+        )
+        .order_by("-created_at")
+    )
+
+    totals = course_totals([course.pk for course in courses])
+    for course in courses:
+        counters = totals.get(course.pk, {})
+        course.enrolled_count = counters.get("new_enrollments") or 0
+        course.completed_count = counters.get("completions") or 0
+
+    total_enrollments = sum(course.enrolled_count for course in courses)
+    completed_enrollments = sum(course.completed_count for course in courses)
+    progress_sum = sum(course.avg_progress * course.enrolled_count for course in courses)
+    for course in courses:
+        course.avg_progress = round(course.avg_progress, 1)
+        course.completion_rate = (
+            round(course.completed_count / course.enrolled_count * 100, 1) if course.enrolled_count else 0
+        )
+
+    recent_enrollments = list(
+        Enrollment.objects.filter(course__instructor=instructor)
+        .select_related("user", "user__profile", "course")
+        .order_by("-enrolled_at")[:RECENT_ENROLLMENTS]
+    )
+
+    return {
+        "courses": courses,
+        "courses_count": len(courses),
+        "published_courses": sum(1 for course in courses if course.status == "published"),
+        "draft_courses": sum(1 for course in courses if course.status == "draft"),
+        "total_lessons": sum(course.lesson_count for course in courses),
+        "total_students": courses[0].total_students if courses else 0,
+        "total_enrollments": total_enrollments,
+        "completed_enrollments": completed_enrollments,
+        "completion_rate": round(completed_enrollments / total_enrollments * 100, 1) if total_enrollments else 0,
+        "avg_progress": round(progress_sum / total_enrollments, 1) if total_enrollments else 0,
+        "recent_enrollments": recent_enrollments,
+    }
+
+
+def get_instructor_stats(instructor) -> dict:
+    """Return cached stats for ``instructor``, computing them on a miss."""
+    key = stats_cache_key(instructor.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_instructor_stats(instructor)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
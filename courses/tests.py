@@ -1,3 +1,229 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.db import router
+from django.db.models import Min
+from django.template import engines
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from EduLearnPro.benchmarking import delete_benchmark_data, percentiles, seed_benchmark_data
+from EduLearnPro.querybudget import count_queries
+from EduLearnPro.replicas import PIN_COOKIE, ReplicaMiddleware, use_replica
+from EduLearnPro.timing import ServerTimingMiddleware, _current, install_instrumentation
+from enrollments.models import CourseDailyStats, Enrollment, calculate_progress
+from enrollments.rollups import record_completion
+from enrollments.services import enroll_user
+from users.leaderboards import ALL_TIME, GLOBAL, LESSONS, entry_for, set_score, top_entries
+from users.models import User
+
+from .management.commands.load_test import Command as LoadTestCommand
+from .models import Course
+from .stats import compute_instructor_stats
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Routing decisions only; ``TestCase``'s transaction would pin every read to the primary."""
+
+    def request(self, method="get", cookies=None, write=False):
+        """Run a request through the middleware; returns the response and where a view read went."""
+        seen = {}
+
+        @use_replica()
+        def view(request):
+            if write:
+                router.db_for_write(Course)
+            seen["read"] = router.db_for_read(Course)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        return ReplicaMiddleware(view)(request), seen["read"]
+
+    def test_reads_use_replica_only_where_marked(self):
+        self.assertEqual(router.db_for_read(Course), "default")
+        with use_replica():
+            self.assertEqual(router.db_for_read(Course), "replica")
+            self.assertEqual(router.db_for_read(Session), "default")
+            self.assertEqual(router.db_for_write(Course), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with use_replica():
+            self.assertEqual(router.db_for_read(Course), "default")
+
+    def test_read_only_request_is_not_pinned(self):
+        response, read = self.request()
+        self.assertEqual(read, "replica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_rest_of_request_and_client(self):
+        response, read = self.request(write=True)
+        self.assertEqual(read, "default")
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response, read = self.request(method="post")
+        self.assertEqual(read, "default")
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_client_reads_primary(self):
+        _, read = self.request(cookies={PIN_COOKIE: "1"})
+        self.assertEqual(read, "default")
+
+
+class BenchmarkDataTests(TestCase):
+    def test_delete_removes_only_synthetic_accounts_and_reranks(self):
+        seed_benchmark_data(instructors=1, courses_per_instructor=2, lessons_per_course=3, students=5, days=3)
+        lookalike = User.objects.create_user("bench-fan", "fan@example.com")
+        set_score(GLOBAL, ALL_TIME, LESSONS, lookalike.pk, score=1)
+        self.assertGreater(entry_for(lookalike, GLOBAL).rank, 1)
+
+        self.assertGreater(delete_benchmark_data(), 0)
+        self.assertEqual(list(User.objects.all()), [lookalike])
+        self.assertFalse(Course.objects.exists() or Enrollment.objects.exists())
+        # Rebuilt from lesson progress, which the lookalike has none of
+        self.assertEqual(top_entries(GLOBAL), [])
+
+
+    def test_seeded_enrollments_agree_with_the_app(self):
+        seed_benchmark_data(instructors=1, courses_per_instructor=2, lessons_per_course=3, students=8, days=5)
+        enrollments = Enrollment.objects.annotate(first_completion=Min("lesson_progress__completed_at"))
+        self.assertTrue(any(0 < enrollment.progress < 100 for enrollment in enrollments))
+        for enrollment in enrollments:
+            seeded = enrollment.progress
+            self.assertEqual(calculate_progress(enrollment), seeded)  # 1 of 3 lessons is 33, not 33.3 rounded
+            if enrollment.first_completion is not None:
+                self.assertLessEqual(enrollment.enrolled_at, enrollment.first_completion)
+
+
+class CountQueriesTests(TestCase):
+    databases = {"default", "replica"}
+
+    def test_counts_every_connection(self):
+        with count_queries() as counter:
+            Course.objects.exists()
+            Course.objects.using("replica").exists()
+        self.assertEqual(counter.count, 2)
+
+
+class InstructorStatsTests(TestCase):
+    def test_enrollment_totals_come_from_the_daily_rollup(self):
+        instructor = User.objects.create_user("ivy", "ivy@example.com")
+        student = User.objects.create_user("sam", "sam@example.com")
+        course = Course.objects.create(
+            title="Python", slug="python", description="-", instructor=instructor, status="published"
+        )
+        enroll_user(student, course)
+        Enrollment.objects.filter(course=course).update(is_completed=True, progress=100)
+        record_completion(course.pk, timezone.now())
+
+        stats = compute_instructor_stats(instructor)
+        self.assertEqual((stats["total_enrollments"], stats["completed_enrollments"]), (1, 1))
+        self.assertEqual(stats["courses"][0].completion_rate, 100.0)
+        self.assertEqual(stats["avg_progress"], 100.0)
+
+        CourseDailyStats.objects.all().delete()  # the Enrollment rows are not counted
+        self.assertEqual(compute_instructor_stats(instructor)["total_enrollments"], 0)
+
+
+class ServerTimingTests(TestCase):
+    def view(self, request):
+        Course.objects.exists()
+        Course.objects.exists()
+        cache.get("timing-test")
+        cache.set("timing-test", 1)
+        cache.get("timing-test")
+        return HttpResponse(engines["django"].from_string("{{ word }}").render({"word": "hi"}))
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header_reports_queries_templates_and_cache(self):
+        response = ServerTimingMiddleware(self.view)(RequestFactory().get("/"))
+        header = response["Server-Timing"]
+        self.assertIn('desc="2 queries, 1 repeated"', header)
+        self.assertIn('cache;desc="1 hits, 1 misses"', header)
+        self.assertRegex(header, r"tpl;dur=\d+\.\d")
+        self.assertTrue(header.startswith("db;dur="))
+        self.assertRegex(header, r", total;dur=\d+\.\d$")
+        self.assertIsNone(_current.get())
+
+    def test_header_defaults_to_debug(self):
+        with self.settings(DEBUG=False):
+            del settings.SERVER_TIMING_HEADER
+            response = ServerTimingMiddleware(self.view)(RequestFactory().get("/"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_instrumentation_is_installed_once_and_passes_through_outside_requests(self):
+        backend = type(caches["default"])
+        install_instrumentation()
+        get = backend.get
+        install_instrumentation()
+        self.assertIs(backend.get, get)
+        self.assertFalse(hasattr(get.__wrapped__, "server_timing"))
+
+        self.assertEqual(cache.get("absent", "default"), "default")
+        cache.set("present", None)
+        self.assertIsNone(cache.get("present", "default"))  # a stored None is a hit, not the default
+        self.assertEqual(engines["django"].from_string("{{ word }}").render({"word": "hi"}), "hi")
+
+
+class LoadTestReportTests(SimpleTestCase):
+    def test_percentiles_use_nearest_rank(self):
+        self.assertEqual(
+            percentiles([float(ms) for ms in range(100, 0, -1)]),
+            {"p50": 50.0, "p95": 95.0, "p99": 99.0, "mean": 50.5, "max": 100.0},
+        )
+        self.assertEqual(percentiles([7.0])["p99"], 7.0)
+        self.assertEqual(percentiles([]), {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0})
+
+    def test_report_aggregates_samples_per_step_and_overall(self):
+        results = [
+            {
+                "samples": [
+                    ("catalog", 10.0, 200, "ok"),
+                    ("catalog", 30.0, 500, "error"),
+                    ("complete", 5.0, 500, "locked"),
+                ],
+                "completed": 2,
+                "failed": 1,
+            },
+            {"samples": [("catalog", 20.0, 200, "ok")], "completed": 1, "failed": 0},
+        ]
+        options = {"users": 2, "journeys": 2, "base_url": None}
+        report = LoadTestCommand()._report(results, elapsed=2.0, options=options, processes=1)
+
+        self.assertEqual(list(report["steps"]), ["catalog", "complete"])  # STEPS order; unused steps left out
+        catalog = report["steps"]["catalog"]
+        self.assertEqual(
+            {key: catalog[key] for key in ("requests", "throughput_rps", "errors", "error_rate", "locked", "statuses")},
+            {
+                "requests": 3,
+                "throughput_rps": 1.5,
+                "errors": 1,
+                "error_rate": 0.3333,
+                "locked": 0,
+                "statuses": {"200": 2, "500": 1},
+            },
+        )
+        self.assertEqual((catalog["latency_ms"]["p50"], catalog["latency_ms"]["p95"]), (20.0, 30.0))
+        self.assertEqual((report["steps"]["complete"]["errors"], report["steps"]["complete"]["locked"]), (1, 1))
+        self.assertEqual(
+            {key: report[key] for key in (
+                "requests", "requests_per_second", "journeys_completed", "journeys_failed",
+                "journeys_per_second", "errors", "locked", "target",
+            )},
+            {
+                "requests": 4,
+                "requests_per_second": 2.0,
+                "journeys_completed": 3,
+                "journeys_failed": 1,
+                "journeys_per_second": 1.5,
+                "errors": 2,
+                "locked": 1,
+                "target": "in-process",
+            },
+        )
@@ -6,15 +6,19 @@ from django.db.models import Avg, Count, Max, Q
 from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views.generic import CreateView, UpdateView
 
+from EduLearnPro.replicas import use_replica
 from enrollments.models import Enrollment
 
 from .forms import CourseForm
 from .models import Course, Lesson
+from .stats import get_instructor_stats
 
 # Create your views here.
 
+@use_replica()
 def home(request):
     # Only show published courses to guests and students
     # Instructors can see their own draft courses too
@@ -29,6 +33,7 @@ def home(request):
     return render(request, "home/index.html", {"courses": courses})
 
 
+@use_replica()
 def course_list(request):
     # Role-based course visibility:
     # - Guests/Students: Only published courses
@@ -140,6 +145,7 @@ def course_list(request):
     return render(request, "courses/course_list.html", context)
 
 
+@use_replica()
 def detail(request, slug):
     course = get_object_or_404(Course.objects.select_related("instructor"), slug=slug)
     
@@ -389,6 +395,9 @@ def lesson_view(request, course_slug, pk):
         
         # Calculate course progress
         course_progress_percentage = calculate_progress(enrollment)
+
+        # Remember where the learner was, without signals or a full save
+        Enrollment.objects.filter(pk=enrollment.pk).update(last_lesson=lesson, last_accessed_at=timezone.now())
     
     # Get all lessons in order
     all_lessons = list(course.lessons.all().order_by("order", "id"))
@@ -476,37 +485,21 @@ class CourseCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
 
 @login_required
 def instructor_dashboard(request):
-    instructor = request.user
-
-    # All courses created by instructor
-    instructor_courses = (
-        Course.objects.filter(instructor=instructor)
-        .annotate(
-            enrolled_count=Count("enrollments", distinct=True),
-            avg_progress=Avg("enrollments__progress"),
-        )
-        .prefetch_related("lessons")
-    )
-
-    # All students enrolled in any of instructor's courses
-    enrollment_qs = Enrollment.objects.filter(course__in=instructor_courses)
-    recent_students = (
-        enrollment_qs.select_related("user", "course")
-        .order_by("-id")[:10]
-    )
+    stats = get_instructor_stats(request.user)
 
     # Basic stats
     context = {
-        "courses_count": instructor_courses.count(),
-        "total_students": enrollment_qs.count(),
+        "courses_count": stats["courses_count"],
+        "total_students": stats["total_enrollments"],
         "total_earnings": 0,  # Update later if you add pricing
-        "instructor_courses": instructor_courses,
-        "recent_students": recent_students,
+        "instructor_courses": sorted(stats["courses"], key=lambda course: course.title),
+        "recent_students": stats["recent_enrollments"],
     }
 
     return render(request, "courses/instructor_dashboard.html", context)
 
 
+@use_replica()
 def instructor_profile(request, username):
     """Public instructor profile page"""
     from django.contrib.auth import get_user_model
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Certificate, Enrollment, LessonProgress
+from .models import Certificate, CourseDailyStats, Enrollment, LessonProgress
 
 
 @admin.register(Enrollment)
@@ -24,3 +24,11 @@ class CertificateAdmin(admin.ModelAdmin):
     list_filter = ("issued_at",)
     search_fields = ("certificate_id", "enrollment__user__username", "enrollment__course__title")
     readonly_fields = ("certificate_id", "issued_at")
+
+
+@admin.register(CourseDailyStats)
+class CourseDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("course", "date", "new_enrollments", "completions", "lessons_completed", "active_learners")
+    list_filter = ("date", "course")
+    search_fields = ("course__title",)
+    date_hierarchy = "date"
@@ -0,0 +1,162 @@
+"""Certificate PDF rendering, storage, the render worker pool and public lookups.
+
+Rendered files are content-addressed by certificate id and template version,
+so a certificate is rendered once per template revision and every later
+download is served straight from storage.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import Certificate
+from .pdf import render_certificate_pdf
+
+logger = logging.getLogger(__name__)
+
+# Cached marker for ids that do not exist, so repeated misses skip the database
+_NOT_FOUND = "missing"
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+
+
+def template_version() -> str:
+    return str(getattr(settings, "CERTIFICATE_TEMPLATE_VERSION", "1"))
+
+
+def certificate_storage_path(certificate_id: str, version: str | None = None) -> str:
+    """Return the storage path of the rendered PDF for ``certificate_id``."""
+    version = version or template_version()
+    digest = hashlib.sha256(f"{certificate_id}:{version}".encode("utf-8")).hexdigest()
+    return f"certificates/{digest[:2]}/{digest}.pdf"
+
+
+def certificate_render_data(certificate: Certificate) -> dict:
+    """Collect the plain values the renderer needs (safe to send to a worker)."""
+    enrollment = certificate.enrollment
+    learner = enrollment.user
+    instructor = enrollment.course.instructor
+    completed_at = enrollment.completed_at or certificate.issued_at
+    return {
+        "certificate_id": certificate.certificate_id,
+        "learner_name": learner.get_full_name() or learner.username,
+        "course_title": enrollment.course.title,
+        "instructor_name": instructor.get_full_name() or instructor.username,
+        "completed_on": completed_at.strftime("%B %d, %Y") if completed_at else "",
+    }
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Lazily start the process pool shared by all requests of this process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, "CERTIFICATE_RENDER_WORKERS", None) or min(4, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def store_certificate_pdf(certificate_id: str, content: bytes) -> str:
+    path = certificate_storage_path(certificate_id)
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(content))
+    return path
+
+
+def submit_certificate_render(certificate: Certificate) -> Future | None:
+    """Render ``certificate`` in the worker pool unless it is already stored.
+
+    The returned future resolves to the storage path once the PDF is saved.
+    """
+    path = certificate_storage_path(certificate.certificate_id)
+    if default_storage.exists(path):
+        return None
+
+    certificate_id = certificate.certificate_id
+    rendered = get_render_pool().submit(render_certificate_pdf, certificate_render_data(certificate))
+    stored: Future = Future()
+
+    def _store(future: Future) -> None:
+        try:
+            stored.set_result(store_certificate_pdf(certificate_id, future.result()))
+        except Exception as exc:
+            logger.exception("Certificate %s could not be rendered", certificate_id)
+            stored.set_exception(exc)
+
+    rendered.add_done_callback(_store)
+    return stored
+
+
+def render_certificates(certificates, pool: ProcessPoolExecutor | None = None, chunksize: int = 16) -> int:
+    """Render and store every certificate in ``certificates`` across cores.
+
+    Uses the shared render pool unless ``pool`` is given. Returns the number
+    of PDFs written.
+    """
+    pending = [
+        certificate for certificate in certificates
+        if not default_storage.exists(certificate_storage_path(certificate.certificate_id))
+    ]
+    if not pending:
+        return 0
+
+    pool = pool or get_render_pool()
+    payloads = [certificate_render_data(certificate) for certificate in pending]
+    for payload, content in zip(payloads, pool.map(render_certificate_pdf, payloads, chunksize=chunksize)):
+        store_certificate_pdf(payload["certificate_id"], content)
+    return len(pending)
+
+
+def verification_cache_key(certificate_id: str) -> str:
+    return f"certificates:verify:{certificate_id}"
+
+
+def lookup_certificate(certificate_id: str) -> dict | None:
+    """Resolve a certificate id to its public details through the cache.
+
+    Misses are cached too (for a shorter time) so that guessing ids does not
+    reach the database on every attempt.
+    """
+    key = verification_cache_key(certificate_id)
+    cached = cache.get(key)
+    if cached == _NOT_FOUND:
+        return None
+    if cached is not None:
+        return cached
+
+    row = (
+        Certificate.objects.filter(certificate_id=certificate_id)
+        .values(
+            "certificate_id",
+            "issued_at",
+            "enrollment__completed_at",
+            "enrollment__user__username",
+            "enrollment__user__first_name",
+            "enrollment__user__last_name",
+            "enrollment__course__title",
+        )
+        .first()
+    )
+    if row is None:
+        cache.set(key, _NOT_FOUND, getattr(settings, "CERTIFICATE_VERIFY_NEGATIVE_CACHE_TIMEOUT", 300))
+        return None
+
+    full_name = f"{row['enrollment__user__first_name']} {row['enrollment__user__last_name']}".strip()
+    details = {
+        "certificate_id": row["certificate_id"],
+        "learner_name": full_name or row["enrollment__user__username"],
+        "course_title": row["enrollment__course__title"],
+        "issued_at": row["issued_at"],
+        "completed_at": row["enrollment__completed_at"],
+    }
+    cache.set(key, details, getattr(settings, "CERTIFICATE_VERIFY_CACHE_TIMEOUT", 60 * 60 * 24))
+    return details
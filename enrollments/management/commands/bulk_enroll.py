@@ -0,0 +1,47 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from enrollments.services import bulk_enroll, resolve_user_ids
+
+
+class Command(BaseCommand):
+    help = "Enroll a cohort of users (usernames or emails) in a course using bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("course", help="Slug of the course to enroll the cohort in")
+        parser.add_argument(
+            "--file",
+            help="CSV or plain text file with one username or email per line (first column is used)",
+        )
+        parser.add_argument("--users", default="", help="Comma-separated usernames or emails")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(slug=options["course"])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course '{options['course']}' does not exist.")
+        if course.status != "published":
+            raise CommandError("Only published courses accept enrollments.")
+
+        identifiers = [value for value in options["users"].split(",") if value.strip()]
+        if options["file"]:
+            with open(options["file"], newline="", encoding="utf-8") as handle:
+                identifiers.extend(row[0] for row in csv.reader(handle) if row)
+        if not identifiers:
+            raise CommandError("No users given. Use --file and/or --users.")
+
+        user_ids, unknown = resolve_user_ids(identifiers, batch_size=options["batch_size"])
+        for identifier in unknown[:20]:
+            self.stdout.write(self.style.WARNING(f"Unknown user: {identifier}"))
+        if len(unknown) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(unknown) - 20} more unknown users"))
+
+        result = bulk_enroll(course, user_ids, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {result['enrolled']} of {result['requested']} users in '{course.title}' "
+            f"({result['skipped']} already enrolled or skipped, {len(unknown)} unknown) "
+            f"in {result['seconds']}s - {result['enrollments_per_second']} enrollments/second."
+        ))
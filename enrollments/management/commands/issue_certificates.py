@@ -0,0 +1,68 @@
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from enrollments.certificates import render_certificates, verification_cache_key
+from enrollments.models import Certificate, Enrollment
+
+
+class Command(BaseCommand):
+    help = "Issue certificates for completed enrollments and render their PDFs in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes used for rendering (default: all cores)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of certificates loaded and rendered per batch",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+
+        missing = Enrollment.objects.filter(is_completed=True, certificate__isnull=True)
+        new_certificates = [
+            Certificate(enrollment_id=enrollment_id, certificate_id=f"CERT-{uuid.uuid4().hex[:12].upper()}")
+            for enrollment_id in missing.values_list("id", flat=True)
+        ]
+        Certificate.objects.bulk_create(new_certificates, batch_size=batch_size, ignore_conflicts=True)
+        # bulk_create skips post_save, so clear any cached "not found" verifications here
+        cache.delete_many([verification_cache_key(c.certificate_id) for c in new_certificates])
+        self.stdout.write(f"Issued {len(new_certificates)} new certificates.")
+
+        certificates = (
+            Certificate.objects.select_related(
+                "enrollment__user", "enrollment__course", "enrollment__course__instructor"
+            )
+            .order_by("pk")
+        )
+        total = certificates.count()
+
+        started = time.perf_counter()
+        rendered = 0
+        last_pk = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = list(certificates.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                rendered += render_certificates(batch, pool=pool)
+        elapsed = time.perf_counter() - started
+
+        rate = rendered / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered}/{total} certificate PDFs in {elapsed:.1f}s "
+            f"({rate:.1f}/s, {workers} workers)."
+        ))
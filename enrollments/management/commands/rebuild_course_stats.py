@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from enrollments.rollups import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-course daily stats rollup from enrollments and lesson progress"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "courses",
+            nargs="*",
+            help="Slugs of the courses to rebuild (default: all courses)",
+        )
+
+    def handle(self, *args, **options):
+        course_ids = None
+        if options["courses"]:
+            course_ids = list(Course.objects.filter(slug__in=options["courses"]).values_list("id", flat=True))
+            if len(course_ids) != len(set(options["courses"])):
+                raise CommandError("One or more course slugs do not exist.")
+
+        started = time.perf_counter()
+        rows = rebuild_course_stats(course_ids)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily stats rows in {elapsed:.2f}s."))
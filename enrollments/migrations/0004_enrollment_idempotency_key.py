@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0003_enrollment_completed_at_enrollment_is_completed_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_rename_original_price_course_discounted_price_and_more'),
+        ('enrollments', '0004_enrollment_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('new_enrollments', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('lessons_completed', models.PositiveIntegerField(default=0)),
+                ('active_learners', models.PositiveIntegerField(default=0, help_text='Learners who completed at least one lesson of the course on this day')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Course daily stats',
+                'verbose_name_plural': 'Course daily stats',
+                'ordering': ('course', 'date'),
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    LessonProgress = apps.get_model("enrollments", "LessonProgress")
+    CourseDailyStats = apps.get_model("enrollments", "CourseDailyStats")
+
+    stats = defaultdict(dict)
+    for row in (
+        Enrollment.objects.annotate(day=TruncDate("enrolled_at"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["course_id"], row["day"]]["new_enrollments"] = row["total"]
+    for row in (
+        Enrollment.objects.filter(is_completed=True, completed_at__isnull=False)
+        .annotate(day=TruncDate("completed_at"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["course_id"], row["day"]]["completions"] = row["total"]
+    for row in (
+        LessonProgress.objects.filter(completed=True, completed_at__isnull=False)
+        .annotate(day=TruncDate("completed_at"), course_id=F("enrollment__course_id"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"), learners=Count("enrollment_id", distinct=True))
+    ):
+        counters = stats[row["course_id"], row["day"]]
+        counters["lessons_completed"] = row["total"]
+        counters["active_learners"] = row["learners"]
+
+    CourseDailyStats.objects.bulk_create(
+        [
+            CourseDailyStats(course_id=course_id, date=day, **counters)
+            for (course_id, day), counters in stats.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0005_coursedailystats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def backfill_next_lesson(apps, schema_editor):
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    LessonProgress = apps.get_model("enrollments", "LessonProgress")
+    Lesson = apps.get_model("courses", "Lesson")
+
+    completed = LessonProgress.objects.filter(
+        lesson=OuterRef("pk"), enrollment=OuterRef(OuterRef("pk")), completed=True
+    )
+    next_lesson = (
+        Lesson.objects.filter(course=OuterRef("course_id"))
+        .filter(~Exists(completed))
+        .order_by("order", "id")
+        .values("id")[:1]
+    )
+    Enrollment.objects.update(next_lesson_id=Subquery(next_lesson))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_rename_original_price_course_discounted_price_and_more'),
+        ('enrollments', '0006_backfill_coursedailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.lesson'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='next_lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.lesson'),
+        ),
+        migrations.RunPython(backfill_next_lesson, migrations.RunPython.noop),
+    ]
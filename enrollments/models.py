@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from courses.models import Course, Lesson
@@ -14,6 +16,17 @@ class Enrollment(models.Model):
     enrolled_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     is_completed = models.BooleanField(default=False)
+    # Key of the payment attempt that created this enrollment (see enrollments.services)
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)
+    # Resume pointer: the first lesson not yet completed, kept current by
+    # calculate_progress and refresh_resume_pointers, and the last lesson opened
+    next_lesson = models.ForeignKey(
+        Lesson, on_delete=models.SET_NULL, related_name="+", blank=True, null=True
+    )
+    last_lesson = models.ForeignKey(
+        Lesson, on_delete=models.SET_NULL, related_name="+", blank=True, null=True
+    )
+    last_accessed_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         unique_together = ("user", "course")
@@ -32,10 +45,13 @@ class Enrollment(models.Model):
     def mark_as_completed(self):
         """Mark enrollment as completed"""
         if not self.is_completed:
+            from .rollups import record_completion
             self.is_completed = True
             self.completed_at = timezone.now()
             self.progress = 100
             self.save(update_fields=['is_completed', 'completed_at', 'progress'])
+            record_completion(self.course_id, self.completed_at)
+            _course_completed(self)
 
 
 class LessonProgress(models.Model):
@@ -53,17 +69,81 @@ class LessonProgress(models.Model):
         return f"{self.enrollment.user} - {self.lesson} ({status})"
 
 
+def _course_completed(enrollment: Enrollment) -> None:
+    from users.achievements import COURSE_COMPLETED, award_achievements
+
+    award_achievements([enrollment.user_id], COURSE_COMPLETED)
+
+
+def next_lesson_query(enrollment) -> models.QuerySet:
+    """Id of the first lesson (by ``order``) not completed in ``enrollment``.
+
+    ``enrollment`` may be an instance or, inside a subquery over
+    enrollments, ``OuterRef(OuterRef("pk"))`` with the course taken from the
+    outer row.
+    """
+    course = enrollment.course_id if isinstance(enrollment, Enrollment) else OuterRef("course_id")
+    return (
+        Lesson.objects.filter(course=course)
+        .filter(
+            ~Exists(LessonProgress.objects.filter(lesson=OuterRef("pk"), enrollment=enrollment, completed=True))
+        )
+        .order_by("order", "id")
+        .values("id")[:1]
+    )
+
+
+def with_lesson_counts(enrollments: models.QuerySet) -> models.QuerySet:
+    """Annotate ``lesson_count`` and ``completed_count`` as scalar subqueries."""
+    lesson_count = (
+        Lesson.objects.filter(course=OuterRef("course_id"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    completed_count = (
+        LessonProgress.objects.filter(enrollment=OuterRef("pk"), completed=True)
+        .order_by()
+        .values("enrollment")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return enrollments.annotate(
+        lesson_count=Coalesce(Subquery(lesson_count, output_field=models.IntegerField()), Value(0)),
+        completed_count=Coalesce(Subquery(completed_count, output_field=models.IntegerField()), Value(0)),
+    )
+
+
+def refresh_resume_pointers(enrollments: models.QuerySet) -> int:
+    """Recompute ``next_lesson`` for every enrollment in ``enrollments`` in one UPDATE."""
+    return enrollments.update(next_lesson_id=Subquery(next_lesson_query(OuterRef(OuterRef("pk")))))
+
+
+def progress_percentage(completed_lessons: int, total_lessons: int) -> int:
+    """Whole percent of lessons completed, rounded down (100 only when all are done)."""
+    if total_lessons == 0:
+        return 0
+    return min(100, max(0, int((completed_lessons / total_lessons) * 100)))
+
+
 def calculate_progress(enrollment: Enrollment) -> int:
-    """Calculate and update enrollment progress"""
+    """Calculate and update enrollment progress and its resume pointer"""
+    next_lesson_id = next_lesson_query(enrollment).first()
+    next_lesson_id = next_lesson_id["id"] if next_lesson_id else None
+    update_fields = []
+    if enrollment.next_lesson_id != next_lesson_id:
+        enrollment.next_lesson_id = next_lesson_id
+        update_fields.append("next_lesson")
+
     total_lessons = enrollment.lesson_progress.count()
     if total_lessons == 0:
         enrollment.progress = 0
-        enrollment.save(update_fields=["progress"])
+        enrollment.save(update_fields=["progress", *update_fields])
         return 0
 
     completed_lessons = enrollment.lesson_progress.filter(completed=True).count()
-    percentage = int((completed_lessons / total_lessons) * 100)
-    percentage = min(100, max(0, percentage))
+    percentage = progress_percentage(completed_lessons, total_lessons)
 
     # Check if course is completed
     was_completed = enrollment.is_completed
@@ -73,13 +153,23 @@ def calculate_progress(enrollment: Enrollment) -> int:
     if enrollment.progress != percentage or enrollment.is_completed != is_now_completed:
         enrollment.progress = percentage
         enrollment.is_completed = is_now_completed
-        
+        update_fields += ["progress", "is_completed"]
         # Set completion date if just completed
         if is_now_completed and not was_completed:
             enrollment.completed_at = timezone.now()
-            enrollment.save(update_fields=["progress", "is_completed", "completed_at"])
-        else:
-            enrollment.save(update_fields=["progress", "is_completed"])
+            update_fields.append("completed_at")
+
+    if update_fields:
+        enrollment.save(update_fields=update_fields)
+
+    if is_now_completed != was_completed:
+        from .rollups import record_completion
+
+        if is_now_completed:
+            record_completion(enrollment.course_id, enrollment.completed_at)
+            _course_completed(enrollment)
+        elif enrollment.completed_at:
+            record_completion(enrollment.course_id, enrollment.completed_at, delta=-1)
 
     return percentage
 
@@ -108,3 +198,29 @@ class Certificate(models.Model):
             import uuid
             self.certificate_id = f"CERT-{uuid.uuid4().hex[:12].upper()}"
         super().save(*args, **kwargs)
+
+
+class CourseDailyStats(models.Model):
+    """Per-course, per-day activity rollup used by dashboards and charts.
+
+    Maintained incrementally by ``enrollments.rollups`` and rebuilt from the
+    source tables by the ``rebuild_course_stats`` command.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    new_enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    lessons_completed = models.PositiveIntegerField(default=0)
+    active_learners = models.PositiveIntegerField(
+        default=0,
+        help_text="Learners who completed at least one lesson of the course on this day",
+    )
+
+    class Meta:
+        ordering = ("course", "date")
+        unique_together = ("course", "date")
+        verbose_name = "Course daily stats"
+        verbose_name_plural = "Course daily stats"
+
+    def __str__(self) -> str:
+        return f"{self.course} - {self.date}"
@@ -0,0 +1,95 @@
+"""Minimal, dependency-free PDF rendering for certificates.
+
+This module deliberately does not import Django so that it can be executed
+inside worker processes of a ``ProcessPoolExecutor`` without setting up the
+framework. Everything it needs arrives as plain, picklable data.
+"""
+from __future__ import annotations
+
+PAGE_WIDTH = 842  # A4 landscape, in points
+PAGE_HEIGHT = 595
+
+# Glyph widths (1/1000 em) of the standard Helvetica font for ASCII 32..126.
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+
+
+def text_width(text: str, size: float) -> float:
+    """Approximate rendered width of ``text`` in points."""
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += _HELVETICA_WIDTHS[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000
+
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _centered(text: str, y: float, size: float, font: str = "F1") -> str:
+    x = (PAGE_WIDTH - text_width(text, size)) / 2
+    return f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+
+
+def _build_pdf(content: bytes) -> bytes:
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            "/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> /Contents 4 0 R >>"
+        ).encode("ascii"),
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n" % (len(objects) + 1)
+    output += b"0000000000 65535 f \n"
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    return bytes(output)
+
+
+def render_certificate_pdf(data: dict) -> bytes:
+    """Render a single-page certificate.
+
+    ``data`` must contain ``learner_name``, ``course_title``,
+    ``completed_on``, ``instructor_name`` and ``certificate_id``.
+    """
+    lines = [
+        # Double border in the brand colour
+        "0.4 0.49 0.92 RG 8 w 24 24 794 547 re S",
+        "2 w 44 44 754 507 re S",
+        "0 0 0 rg",
+        _centered("Certificate of Completion", 455, 36, "F2"),
+        _centered("This is to certify that", 405, 16),
+        _centered(data["learner_name"], 350, 30, "F2"),
+        _centered("has successfully completed the course", 305, 16),
+        _centered(data["course_title"], 255, 24, "F2"),
+        _centered(f"Completed on {data['completed_on']}", 215, 14),
+        "0.5 w 321 140 m 521 140 l S",
+        _centered(data["instructor_name"], 120, 14, "F2"),
+        _centered("Course Instructor", 102, 11),
+        _centered(f"Certificate ID: {data['certificate_id']}", 64, 10),
+    ]
+    return _build_pdf("\n".join(lines).encode("latin-1"))
@@ -0,0 +1,158 @@
+"""Incremental maintenance and reads of the ``CourseDailyStats`` rollup.
+
+Writers call the ``record_*`` helpers when an event happens; readers sum the
+small rollup table instead of aggregating over ``Enrollment`` and
+``LessonProgress``. ``rebuild_course_stats`` recomputes rows from the source
+tables and is what the backfill command runs.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from courses.stats import invalidate_course_stats
+from .models import CourseDailyStats, Enrollment, LessonProgress
+
+COUNTERS = ("new_enrollments", "completions", "lessons_completed", "active_learners")
+
+
+def _day(value=None) -> date:
+    if value is None:
+        return timezone.localdate()
+    if hasattr(value, "tzinfo"):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def bump(course_id: int, day: date, **deltas: int) -> None:
+    """Add ``deltas`` to the counters of one (course, day) row, creating it if needed.
+
+    Every rollup event also invalidates the course instructor's cached dashboard stats.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    invalidate_course_stats(course_id)
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    rows = CourseDailyStats.objects.filter(course_id=course_id, date=day)
+    if rows.update(**updates):
+        return
+    if all(delta < 0 for delta in deltas.values()):
+        return  # nothing recorded for that day, nothing to take away
+    CourseDailyStats.objects.bulk_create(
+        [CourseDailyStats(course_id=course_id, date=day)], ignore_conflicts=True
+    )
+    rows.update(**updates)
+
+
+def record_enrollments(course_id: int, count: int = 1, when=None) -> None:
+    bump(course_id, _day(when), new_enrollments=count)
+
+
+def record_completion(course_id: int, completed_at, delta: int = 1) -> None:
+    """Count a course completion (``delta=-1`` when a completion is undone)."""
+    bump(course_id, _day(completed_at), completions=delta)
+
+
+def record_lesson_completion(lesson_progress: LessonProgress, course_id: int, completed_at, delta: int = 1) -> None:
+    """Count a lesson completion on ``completed_at``'s day (``delta=-1`` to undo one).
+
+    The learner is counted as active for the day when this is their first
+    completion in the course that day, and uncounted when the last one is undone.
+    """
+    day = _day(completed_at)
+    other_completions_today = (
+        LessonProgress.objects.filter(
+            enrollment_id=lesson_progress.enrollment_id,
+            completed=True,
+            completed_at__date=day,
+        )
+        .exclude(pk=lesson_progress.pk)
+        .exists()
+    )
+    bump(
+        course_id,
+        day,
+        lessons_completed=delta,
+        active_learners=0 if other_completions_today else delta,
+    )
+
+
+def course_totals(course_ids) -> dict:
+    """Summed counters per course: ``{course_id: {counter: total}}``."""
+    rows = (
+        CourseDailyStats.objects.filter(course_id__in=course_ids)
+        .values("course_id")
+        .annotate(**{counter: Sum(counter) for counter in COUNTERS})
+    )
+    return {row.pop("course_id"): row for row in rows}
+
+
+def daily_series(course_ids, days: int = 30) -> list[dict]:
+    """Counters summed across ``course_ids`` for each of the last ``days`` days."""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    rows = {
+        row["date"]: row
+        for row in CourseDailyStats.objects.filter(course_id__in=course_ids, date__gte=start)
+        .values("date")
+        .annotate(**{counter: Sum(counter) for counter in COUNTERS})
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        series.append({"date": day, **{counter: row.get(counter) or 0 for counter in COUNTERS}})
+    return series
+
+
+@transaction.atomic
+def rebuild_course_stats(course_ids=None) -> int:
+    """Recompute rollup rows from ``Enrollment``/``LessonProgress``.
+
+    Rebuilds every course, or only ``course_ids``. Returns the number of rows written.
+    """
+    enrollments = Enrollment.objects.all()
+    progress = LessonProgress.objects.filter(completed=True, completed_at__isnull=False)
+    existing = CourseDailyStats.objects.all()
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+        progress = progress.filter(enrollment__course_id__in=course_ids)
+        existing = existing.filter(course_id__in=course_ids)
+
+    stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in (
+        enrollments.annotate(day=TruncDate("enrolled_at"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["course_id"], row["day"]]["new_enrollments"] = row["total"]
+    for row in (
+        enrollments.filter(is_completed=True, completed_at__isnull=False)
+        .annotate(day=TruncDate("completed_at"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["course_id"], row["day"]]["completions"] = row["total"]
+    for row in (
+        progress.annotate(day=TruncDate("completed_at"), course_id=F("enrollment__course_id"))
+        .values("course_id", "day")
+        .annotate(total=Count("id"), learners=Count("enrollment_id", distinct=True))
+    ):
+        counters = stats[row["course_id"], row["day"]]
+        counters["lessons_completed"] = row["total"]
+        counters["active_learners"] = row["learners"]
+
+    existing.delete()
+    CourseDailyStats.objects.bulk_create(
+        [
+            CourseDailyStats(course_id=course_id, date=day, **counters)
+            for (course_id, day), counters in stats.items()
+        ],
+        batch_size=1000,
+    )
+    return len(stats)
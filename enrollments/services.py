@@ -0,0 +1,176 @@
+"""Enrollment write paths shared by views and management commands."""
+from __future__ import annotations
+
+import time
+import uuid
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Lower
+from django.db.models.lookups import In
+
+from courses.models import Course, Lesson
+from users.dashboard import invalidate_student_dashboard
+from users.models import User
+from .models import Enrollment, LessonProgress, refresh_resume_pointers
+from .rollups import record_enrollments
+
+
+def _insert_lesson_progress(where: str, params: list) -> None:
+    """``INSERT ... SELECT`` progress rows for the enrollments matching ``where``.
+
+    ``where`` is written against the enrollment table aliased as ``e``.
+    Existing rows are skipped by the unique constraint.
+    """
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(column) for column in ("enrollment_id", "lesson_id", "completed"))
+    sql = (
+        f"{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} "
+        f"{qn(LessonProgress._meta.db_table)} ({columns}) "
+        f"SELECT e.{qn('id')}, l.{qn('id')}, %s "
+        f"FROM {qn(Enrollment._meta.db_table)} e "
+        f"INNER JOIN {qn(Lesson._meta.db_table)} l ON l.{qn('course_id')} = e.{qn('course_id')} "
+        f"WHERE {where} "
+        f"{connection.ops.on_conflict_suffix_sql(LessonProgress._meta.fields, OnConflict.IGNORE, None, None)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [False, *params])
+
+
+def create_lesson_progress(enrollment_ids) -> None:
+    """Create the missing ``LessonProgress`` rows for ``enrollment_ids`` and
+    point each enrollment at its next lesson.
+
+    Each step is a single statement, so calling this more than once is harmless.
+    """
+    enrollment_ids = list(enrollment_ids)
+    if not enrollment_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(enrollment_ids))
+    _insert_lesson_progress(f"e.{connection.ops.quote_name('id')} IN ({placeholders})", enrollment_ids)
+    refresh_resume_pointers(Enrollment.objects.filter(pk__in=enrollment_ids))
+
+
+def create_course_lesson_progress(course: Course) -> None:
+    """Create progress rows for every enrollment in ``course`` that has none yet."""
+    qn = connection.ops.quote_name
+    _insert_lesson_progress(
+        f"e.{qn('course_id')} = %s AND NOT EXISTS ("
+        f"SELECT 1 FROM {qn(LessonProgress._meta.db_table)} p "
+        f"WHERE p.{qn('enrollment_id')} = e.{qn('id')})",
+        [course.pk],
+    )
+
+
+def enroll_user(user: User, course: Course, idempotency_key: str | None = None) -> tuple[Enrollment, bool]:
+    """Enroll ``user`` in ``course`` exactly once.
+
+    The row is written with ``INSERT ... ON CONFLICT DO NOTHING`` so that
+    concurrent or repeated submissions never raise ``IntegrityError``. The
+    ``idempotency_key`` identifies a payment attempt: retrying the same
+    attempt reports ``created=True`` again, while a different attempt for an
+    existing enrollment reports ``created=False``.
+
+    Lesson progress rows are created here; the ``post_save`` signal does not
+    fire for this insert, so setup (including dropping the student's cached
+    dashboard) happens once.
+    """
+    idempotency_key = idempotency_key or uuid.uuid4().hex
+    enrollment = Enrollment.objects.filter(user=user, course=course).first()
+    if enrollment is not None:
+        return enrollment, enrollment.idempotency_key == idempotency_key
+
+    Enrollment.objects.bulk_create(
+        [Enrollment(user=user, course=course, idempotency_key=idempotency_key)],
+        ignore_conflicts=True,
+    )
+    enrollment = Enrollment.objects.filter(user=user, course=course).first()
+    if enrollment is None:
+        # The key was already used for a different enrollment; start a fresh attempt
+        return enroll_user(user, course)
+    created = enrollment.idempotency_key == idempotency_key
+    if created:
+        create_lesson_progress([enrollment.pk])
+        record_enrollments(course.pk, when=enrollment.enrolled_at)
+        invalidate_student_dashboard(user.pk)
+    return enrollment, created
+
+
+def resolve_user_ids(identifiers, batch_size: int = 1000) -> tuple[list[int], list[str]]:
+    """Map usernames or email addresses to user ids.
+
+    Returns ``(user_ids, unknown_identifiers)`` preserving input order.
+    """
+    identifiers = [identifier.strip() for identifier in identifiers if identifier and identifier.strip()]
+    found: dict[str, int] = {}
+    for start in range(0, len(identifiers), batch_size):
+        chunk = identifiers[start:start + batch_size]
+        emails = [identifier.lower() for identifier in chunk if "@" in identifier]
+        for user_id, username, email in User.objects.filter(
+            Q(username__in=chunk) | In(Lower("email"), emails)
+        ).values_list("id", "username", "email"):
+            found[username] = user_id
+            if email:
+                found[email.lower()] = user_id
+
+    user_ids = []
+    unknown = []
+    for identifier in identifiers:
+        user_id = found.get(identifier) or found.get(identifier.lower())
+        if user_id:
+            user_ids.append(user_id)
+        else:
+            unknown.append(identifier)
+    return user_ids, unknown
+
+
+@transaction.atomic
+def bulk_enroll(course: Course, user_ids, batch_size: int = 1000) -> dict:
+    """Enroll a cohort of users in ``course`` with set-based inserts.
+
+    Enrollments are inserted with ``bulk_create(ignore_conflicts=True)`` in
+    batches, bypassing per-row ``post_save`` signals, and all their progress
+    rows are then created with one ``INSERT ... SELECT``. Already enrolled
+    users and the course instructor are skipped.
+
+    Returns counts and throughput for reporting; ``enrolled`` counts only
+    the rows actually inserted.
+    """
+    started = time.perf_counter()
+    user_ids = list(dict.fromkeys(user_ids))
+    created = 0
+
+    for start in range(0, len(user_ids), batch_size):
+        chunk = [user_id for user_id in user_ids[start:start + batch_size] if user_id != course.instructor_id]
+        enrolled = set(
+            Enrollment.objects.filter(course=course, user_id__in=chunk).values_list("user_id", flat=True)
+        )
+        # Keyed rows, so those this call inserted can be told from rows that
+        # ON CONFLICT skipped because someone else enrolled meanwhile
+        new_enrollments = [
+            Enrollment(user_id=user_id, course=course, idempotency_key=uuid.uuid4().hex)
+            for user_id in chunk
+            if user_id not in enrolled
+        ]
+        Enrollment.objects.bulk_create(new_enrollments, batch_size=batch_size, ignore_conflicts=True)
+        new_user_ids = list(
+            Enrollment.objects.filter(
+                idempotency_key__in=[enrollment.idempotency_key for enrollment in new_enrollments]
+            ).values_list("user_id", flat=True)
+        )
+        refresh_resume_pointers(Enrollment.objects.filter(course=course, user_id__in=new_user_ids))
+        invalidate_student_dashboard(*new_user_ids)
+        created += len(new_user_ids)
+
+    create_course_lesson_progress(course)
+    record_enrollments(course.pk, count=created)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "requested": len(user_ids),
+        "enrolled": created,
+        "skipped": len(user_ids) - created,
+        "seconds": round(elapsed, 3),
+        "enrollments_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0,
+    }
@@ -1,24 +1,48 @@
 from __future__ import annotations
 
-from django.db.models.signals import post_save
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from courses.models import Lesson
-from .models import Enrollment, LessonProgress, calculate_progress
+from EduLearnPro.deferred import deferred_receiver
+from .certificates import verification_cache_key
+from .models import Certificate, Enrollment, refresh_resume_pointers
+from .rollups import record_completion, record_enrollments
+from .services import create_lesson_progress
+
+
+@deferred_receiver(post_save, sender=Enrollment, condition=lambda created, **kwargs: created)
+def create_lesson_progress_records(enrollments: list[Enrollment]) -> None:
+    # New enrollments have nothing completed, so their default 0% progress stands
+    create_lesson_progress([enrollment.pk for enrollment in enrollments])
+
+    per_course_day = Counter(
+        (enrollment.course_id, timezone.localdate(enrollment.enrolled_at)) for enrollment in enrollments
+    )
+    for (course_id, day), count in per_course_day.items():
+        record_enrollments(course_id, count=count, when=day)
+
 
+@receiver(post_delete, sender=Enrollment)
+def remove_enrollment_from_rollups(sender, instance: Enrollment, **kwargs) -> None:
+    record_enrollments(instance.course_id, count=-1, when=instance.enrolled_at)
+    if instance.is_completed and instance.completed_at:
+        record_completion(instance.course_id, instance.completed_at, delta=-1)
 
-@receiver(post_save, sender=Enrollment)
-def create_lesson_progress_records(sender, instance: Enrollment, created: bool, **kwargs) -> None:
-    if not created:
-        return
 
-    lessons = Lesson.objects.filter(course=instance.course).order_by("order", "id")
-    progress_objects = []
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def invalidate_certificate_verification(sender, instance: Certificate, **kwargs) -> None:
+    # Drops cached details as well as a cached "not found" for a newly issued id
+    cache.delete(verification_cache_key(instance.certificate_id))
 
-    for lesson in lessons:
-        progress_objects.append(
-            LessonProgress(enrollment=instance, lesson=lesson, completed=False)
-        )
 
-    LessonProgress.objects.bulk_create(progress_objects, ignore_conflicts=True)
-    calculate_progress(instance)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def refresh_resume_pointers_for_lesson(sender, instance: Lesson, **kwargs) -> None:
+    # A new, removed or reordered lesson can change where every learner resumes
+    refresh_resume_pointers(Enrollment.objects.filter(course_id=instance.course_id))
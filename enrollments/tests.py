@@ -1,3 +1,300 @@
-from django.test import TestCase
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Course, Lesson
+from users.models import DailyActivity, Profile, User
+
+from .certificates import certificate_storage_path, render_certificates, store_certificate_pdf, submit_certificate_render
+from .models import Certificate, Enrollment, LessonProgress
+from .pdf import render_certificate_pdf
+from .rollups import COUNTERS, course_totals, rebuild_course_stats
+from .services import bulk_enroll, enroll_user, resolve_user_ids
+
+
+class EnrollmentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user("ivy", "ivy@example.com", "pw")
+        cls.student = User.objects.create_user("sam", "sam@example.com", "pw")
+        cls.course = Course.objects.create(
+            title="Python", slug="python", description="-", instructor=cls.instructor, status="published"
+        )
+        Lesson.objects.create(course=cls.course, title="One", content="-", order=1)
+
+    def new_enrollments(self) -> int:
+        return course_totals([self.course.pk]).get(self.course.pk, {}).get("new_enrollments") or 0
+
+
+class EnrollUserTests(EnrollmentTestCase):
+    def test_replaying_a_payment_attempt_reports_created_again(self):
+        first, created = enroll_user(self.student, self.course, idempotency_key="attempt-1")
+        self.assertTrue(created)
+        again, created = enroll_user(self.student, self.course, idempotency_key="attempt-1")
+        self.assertTrue(created)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(Enrollment.objects.count(), 1)
+        self.assertEqual(LessonProgress.objects.filter(enrollment=first).count(), 1)
+        self.assertEqual(self.new_enrollments(), 1)
+
+    def test_another_attempt_for_an_existing_enrollment_is_not_created(self):
+        enroll_user(self.student, self.course, idempotency_key="attempt-1")
+        _, created = enroll_user(self.student, self.course, idempotency_key="attempt-2")
+        self.assertFalse(created)
+        self.assertEqual(self.new_enrollments(), 1)
+
+    def test_concurrent_enrollment_between_lookup_and_insert(self):
+        insert = Enrollment.objects.bulk_create
+
+        def racing_insert(objs, **kwargs):
+            # Another request enrolls the same user first
+            insert([Enrollment(user=self.student, course=self.course, idempotency_key="other")])
+            return insert(objs, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, "bulk_create", racing_insert):
+            enrollment, created = enroll_user(self.student, self.course, idempotency_key="mine")
+
+        self.assertFalse(created)
+        self.assertEqual(enrollment.idempotency_key, "other")
+        self.assertEqual(Enrollment.objects.count(), 1)
+        self.assertEqual(self.new_enrollments(), 0)  # counted by the request that inserted it
+
+    def test_process_payment_answers_enrolled_users_before_availability_checks(self):
+        enroll_user(self.student, self.course, idempotency_key="attempt-1")
+        Course.objects.filter(pk=self.course.pk).update(status="draft")
+        self.client.force_login(self.student)
+
+        response = self.client.post(
+            reverse("enrollments:process-payment", kwargs={"slug": self.course.slug}),
+            {"idempotency_key": "attempt-2"},
+        )
+        self.assertRedirects(response, reverse("enrollments:my-courses"), fetch_redirect_response=False)
+
+
+class BulkEnrollTests(EnrollmentTestCase):
+    def test_resolve_user_ids_matches_email_case_insensitively(self):
+        mixed = User.objects.create_user("mixed", "Mixed.Case@Example.com", "pw")
+        user_ids, unknown = resolve_user_ids(["sam", "MIXED.case@example.COM", "nobody@example.com", " "])
+        self.assertEqual(user_ids, [self.student.pk, mixed.pk])
+        self.assertEqual(unknown, ["nobody@example.com"])
+
+    def test_counts_only_rows_inserted(self):
+        other = User.objects.create_user("ola", "ola@example.com", "pw")
+        enroll_user(self.student, self.course)
+        insert = Enrollment.objects.bulk_create
+
+        def racing_insert(objs, **kwargs):
+            # ``ola`` enrolls through the site between the lookup and the insert
+            insert([Enrollment(user=other, course=self.course)])
+            return insert(objs, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, "bulk_create", racing_insert):
+            result = bulk_enroll(self.course, [self.student.pk, other.pk, self.instructor.pk])
+
+        self.assertEqual(result["enrolled"], 0)
+        self.assertEqual(result["skipped"], 3)
+        self.assertEqual(self.new_enrollments(), 1)
+
+    def test_api_requires_a_list_of_strings(self):
+        self.client.force_login(self.instructor)
+        url = reverse("enrollments:bulk-enroll", kwargs={"slug": self.course.slug})
+        for body in ('{"users": "sam"}', '{"users": ["sam", 7]}', '["sam"]', "not json"):
+            response = self.client.post(url, body, content_type="application/json")
+            self.assertEqual(response.status_code, 400, body)
+        self.assertFalse(Enrollment.objects.exists())
+
+        response = self.client.post(url, {"users": ["sam", "nobody"]}, content_type="application/json")
+        self.assertEqual((response.json()["enrolled"], response.json()["unknown"]), (1, ["nobody"]))
+
+    def test_enrolls_new_users_with_progress(self):
+        result = bulk_enroll(self.course, [self.student.pk, self.student.pk])
+        self.assertEqual(result["enrolled"], 1)
+        enrollment = Enrollment.objects.get(user=self.student, course=self.course)
+        self.assertEqual(LessonProgress.objects.filter(enrollment=enrollment).count(), 1)
+        self.assertIsNotNone(enrollment.next_lesson_id)
+        self.assertEqual(self.new_enrollments(), 1)
+
+
+class MarkLessonCompleteTests(EnrollmentTestCase):
+    def test_undoing_a_completion_takes_back_the_days_activity(self):
+        Profile.objects.create(user=self.student)
+        enroll_user(self.student, self.course)
+        self.client.force_login(self.student)
+        url = reverse("enrollments:mark-lesson-complete", kwargs={"lesson_id": self.course.lessons.get().pk})
+        ajax = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+        for _ in range(2):
+            self.client.post(url, **ajax)  # complete
+            self.client.post(url, **ajax)  # undo
+        self.assertEqual(DailyActivity.objects.get(user=self.student).lessons_completed, 0)
+
+        self.client.post(url, **ajax)
+        self.assertEqual(DailyActivity.objects.get(user=self.student).lessons_completed, 1)
+
+
+class ResumePointerTests(EnrollmentTestCase):
+    def setUp(self):
+        self.first = self.course.lessons.get()
+        self.second = Lesson.objects.create(course=self.course, title="Two", content="-", order=2)
+        self.enrollment, _ = enroll_user(self.student, self.course)
+        self.client.force_login(self.student)
+
+    def pointers(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.next_lesson, self.enrollment.last_lesson
+
+    def complete(self, lesson):
+        self.client.post(reverse("enrollments:mark-lesson-complete", kwargs={"lesson_id": lesson.pk}))
+
+    def test_next_lesson_follows_completions(self):
+        self.assertEqual(self.pointers(), (self.first, None))
+        self.complete(self.first)
+        self.assertEqual(self.pointers()[0], self.second)
+        self.complete(self.second)
+        self.assertIsNone(self.pointers()[0])
+        self.complete(self.first)  # undone
+        self.assertEqual(self.pointers()[0], self.first)
+
+    def test_next_lesson_follows_lesson_changes(self):
+        self.complete(self.first)
+        intro = Lesson.objects.create(course=self.course, title="Intro", content="-", order=0)
+        self.assertEqual(self.pointers()[0], intro)
+        intro.delete()
+        self.assertEqual(self.pointers()[0], self.second)
+
+    def test_opening_a_lesson_records_where_the_learner_was(self):
+        response = self.client.get(
+            reverse("courses:lesson", kwargs={"course_slug": self.course.slug, "pk": self.second.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.pointers(), (self.first, self.second))
+        self.assertIsNotNone(self.enrollment.last_accessed_at)
+
+
+class CourseRollupTests(EnrollmentTestCase):
+    def totals(self) -> dict:
+        return course_totals([self.course.pk]).get(self.course.pk, dict.fromkeys(COUNTERS, 0))
+
+    def toggle(self, lesson):
+        url = reverse("enrollments:mark-lesson-complete", kwargs={"lesson_id": lesson.pk})
+        self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def test_counters_follow_enrollment_completion_and_undo(self):
+        first = self.course.lessons.get()
+        second = Lesson.objects.create(course=self.course, title="Two", content="-", order=2)
+        enroll_user(self.student, self.course)
+        self.client.force_login(self.student)
+        self.assertEqual(self.totals(), {
+            "new_enrollments": 1, "completions": 0, "lessons_completed": 0, "active_learners": 0,
+        })
+
+        self.toggle(first)
+        self.toggle(second)  # finishes the course; same learner and day
+        expected = {"new_enrollments": 1, "completions": 1, "lessons_completed": 2, "active_learners": 1}
+        self.assertEqual(self.totals(), expected)
+        rebuild_course_stats([self.course.pk])
+        self.assertEqual(self.totals(), expected)
+
+        self.toggle(second)
+        self.assertEqual(self.totals(), {
+            "new_enrollments": 1, "completions": 0, "lessons_completed": 1, "active_learners": 1,
+        })
+        self.toggle(first)
+        self.assertEqual(self.totals(), {
+            "new_enrollments": 1, "completions": 0, "lessons_completed": 0, "active_learners": 0,
+        })
+
+        Enrollment.objects.get().delete()
+        self.assertEqual(self.totals()["new_enrollments"], 0)
+
+
+class CertificatePdfTests(EnrollmentTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        enrollment, _ = enroll_user(self.student, self.course)
+        Enrollment.objects.filter(pk=enrollment.pk).update(is_completed=True, progress=100)
+        self.certificate = Certificate.objects.create(enrollment=enrollment)
+        self.path = certificate_storage_path(self.certificate.certificate_id)
+        self.download_url = reverse("enrollments:certificate-download", kwargs={"slug": self.course.slug})
+        self.client.force_login(self.student)
+
+    def download(self, future):
+        with mock.patch("enrollments.views.submit_certificate_render", return_value=future) as submit:
+            response = self.client.get(self.download_url)
+        return response, submit
+
+    def test_renders_a_pdf_with_the_learner_and_course(self):
+        content = render_certificate_pdf({
+            "certificate_id": "CERT-ABC",
+            "learner_name": "Sam Lee",
+            "course_title": "Python",
+            "instructor_name": "Ivy",
+            "completed_on": "May 01, 2026",
+        })
+        self.assertTrue(content.startswith(b"%PDF-"))
+        self.assertTrue(content.rstrip().endswith(b"%%EOF"))
+        self.assertIn(b"Sam Lee", content)
+        self.assertIn(b"CERT-ABC", content)
+
+    def test_rendered_file_is_reused_until_the_template_version_changes(self):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertEqual(render_certificates([self.certificate], pool=pool), 1)
+            self.assertEqual(render_certificates([self.certificate], pool=pool), 0)
+        self.assertTrue(default_storage.exists(self.path))
+        self.assertIsNone(submit_certificate_render(self.certificate))
+        store_certificate_pdf(self.certificate.certificate_id, b"replaced")
+        with default_storage.open(self.path) as stored:
+            self.assertTrue(stored.read().startswith(b"%PDF-"))
+
+        with override_settings(CERTIFICATE_TEMPLATE_VERSION="2"):
+            self.assertNotEqual(certificate_storage_path(self.certificate.certificate_id), self.path)
+            self.assertFalse(default_storage.exists(certificate_storage_path(self.certificate.certificate_id)))
+
+    def test_download_serves_the_stored_file_without_rendering(self):
+        store_certificate_pdf(self.certificate.certificate_id, b"%PDF-stored")
+        response, submit = self.download(None)
+        submit.assert_not_called()
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-stored")
+
+    @override_settings(CERTIFICATE_RENDER_TIMEOUT=0.01)
+    def test_download_asks_to_retry_while_the_render_is_slow(self):
+        response, _ = self.download(Future())  # never resolves
+        self.assertRedirects(
+            response,
+            reverse("enrollments:certificate", kwargs={"slug": self.course.slug}),
+            fetch_redirect_response=False,
+        )
+        self.assertIn("being prepared", str(list(get_messages(response.wsgi_request))[0]))
+
+    def test_download_reports_a_failed_render(self):
+        failed = Future()
+        failed.set_exception(RuntimeError("renderer crashed"))
+        response, _ = self.download(failed)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("could not generate", str(list(get_messages(response.wsgi_request))[0]))
+
+
+class VerifyCertificateTests(TestCase):
+    def test_rate_limited_per_client_with_retry_after(self):
+        cache.clear()
+        url = reverse("verify-certificate", kwargs={"certificate_id": "CERT-000000000000"})
+        with mock.patch("EduLearnPro.ratelimit.time") as clock:
+            clock.time.return_value = 1000.0
+            for _ in range(30):
+                self.assertEqual(self.client.get(url, {"format": "json"}).status_code, 404)
+            response = self.client.get(url, {"format": "json"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "2")  # 30 tokens a minute: one every 2 seconds
+        self.assertEqual(response.json()["retry_after"], 2)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.2").status_code, 404)
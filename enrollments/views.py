@@ -1,14 +1,37 @@
 from __future__ import annotations
 
+import concurrent.futures
+import json
+import re
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.db import transaction
-from django.http import HttpResponseForbidden, JsonResponse
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from courses.models import Course, Lesson
-from .models import Certificate, Enrollment, LessonProgress, calculate_progress
+from EduLearnPro.ratelimit import ratelimit
+from users.achievements import LESSON_COMPLETED, award_achievements
+from users.activity import record_activity, undo_activity
+from users.dashboard import invalidate_student_dashboard
+from users.leaderboards import record_lesson_score
+from .certificates import certificate_storage_path, lookup_certificate, submit_certificate_render
+from .models import Certificate, Enrollment, LessonProgress, calculate_progress, with_lesson_counts
+from .rollups import record_lesson_completion
+from .services import bulk_enroll, enroll_user, resolve_user_ids
+
+CERTIFICATE_ID_RE = re.compile(r"^CERT-[0-9A-F]{12}$")
+# Read once at import, like every @ratelimit rate
+CERTIFICATE_VERIFY_RATE = (
+    f"{getattr(settings, 'CERTIFICATE_VERIFY_RATE_LIMIT', 30)}/"
+    f"{getattr(settings, 'CERTIFICATE_VERIFY_RATE_WINDOW', 60)}s"
+)
 
 
 def _ensure_lesson_progress(enrollment: Enrollment) -> None:
@@ -31,15 +54,18 @@ def _ensure_lesson_progress(enrollment: Enrollment) -> None:
 
 @login_required
 def my_courses(request):
-    enrollments = (
-        Enrollment.objects.filter(user=request.user)
-        .select_related("course", "course__instructor")
-        .order_by("-enrolled_at")
+    first_lesson = Lesson.objects.filter(course=OuterRef("course_id")).order_by("order", "id").values("id")[:1]
+    enrollments = list(
+        with_lesson_counts(
+            Enrollment.objects.filter(user=request.user)
+            .select_related("course", "course__instructor", "next_lesson", "last_lesson")
+            .annotate(first_lesson_id=Subquery(first_lesson))
+            .order_by("-enrolled_at")
+        )
     )
-
     for enrollment in enrollments:
-        _ensure_lesson_progress(enrollment)
-        calculate_progress(enrollment)
+        if enrollment.lesson_count:
+            enrollment.progress = min(100, int(enrollment.completed_count / enrollment.lesson_count * 100))
 
     context = {
         "enrolled_courses": enrollments,
@@ -100,6 +126,8 @@ def payment(request, slug: str):
     
     context = {
         "course": course,
+        # Identifies this payment attempt so double submits enroll only once
+        "idempotency_key": uuid.uuid4().hex,
         "final_price": final_price,
         "original_price": course.price,
         "has_discount": course.discounted_price and course.discounted_price < course.price,
@@ -115,29 +143,23 @@ def process_payment(request, slug: str):
         Course.objects.select_related("instructor"), slug=slug
     )
     
-    # Check if already enrolled
-    if Enrollment.objects.filter(user=request.user, course=course).exists():
-        messages.info(request, "You are already enrolled in this course.")
-        return redirect("enrollments:my-courses")
-    
-    # Only allow enrollment in published courses
-    if course.status != 'published':
-        messages.error(request, "This course is not not available for enrollment.")
-        return redirect("courses:detail", slug=slug)
-    
-    # Prevent instructors from enrolling in their own courses
-    if course.instructor == request.user:
-        messages.info(request, "You cannot enroll in your own course.")
-        return redirect("courses:detail", slug=slug)
-    
-    # Dummy payment processing - just enroll the user
-    enrollment, created = Enrollment.objects.get_or_create(
-        user=request.user,
-        course=course,
-    )
+    # Already enrolled (or replaying this payment attempt): answered below by
+    # enroll_user, even if the course has since been unpublished
+    if not Enrollment.objects.filter(user=request.user, course=course).exists():
+        # Only allow enrollment in published courses
+        if course.status != 'published':
+            messages.error(request, "This course is not not available for enrollment.")
+            return redirect("courses:detail", slug=slug)
 
-    _ensure_lesson_progress(enrollment)
-    calculate_progress(enrollment)
+        # Prevent instructors from enrolling in their own courses
+        if course.instructor == request.user:
+            messages.info(request, "You cannot enroll in your own course.")
+            return redirect("courses:detail", slug=slug)
+    
+    # Dummy payment processing - just enroll the user. Resubmitting the same
+    # payment attempt (same idempotency key) is answered like the original.
+    idempotency_key = request.POST.get("idempotency_key", "")[:64] or None
+    enrollment, created = enroll_user(request.user, course, idempotency_key=idempotency_key)
 
     if created:
         messages.success(request, f"Payment successful! You have been enrolled in '{course.title}'. Start learning now!")
@@ -147,6 +169,31 @@ def process_payment(request, slug: str):
     return redirect("enrollments:my-courses")
 
 
+@login_required
+@require_POST
+def bulk_enroll_api(request, slug: str):
+    """Enroll a cohort of users (JSON: {"users": [username or email, ...]})"""
+    course = get_object_or_404(Course, slug=slug)
+
+    if not (request.user.is_staff or course.instructor_id == request.user.pk):
+        return JsonResponse({'error': 'Only the course instructor or staff can enroll cohorts'}, status=403)
+    if course.status != 'published':
+        return JsonResponse({'error': 'This course is not available for enrollment'}, status=400)
+
+    try:
+        identifiers = json.loads(request.body or b"{}").get("users", [])
+    except (ValueError, AttributeError):
+        identifiers = None
+    # A bare string would otherwise be enrolled one character at a time
+    if not isinstance(identifiers, list) or not all(isinstance(identifier, str) for identifier in identifiers):
+        return JsonResponse({'error': 'Expected a JSON object like {"users": ["alice", "bob@example.com"]}'}, status=400)
+
+    user_ids, unknown = resolve_user_ids(identifiers)
+    result = bulk_enroll(course, user_ids)
+    result["unknown"] = unknown
+    return JsonResponse(result)
+
+
 @login_required
 @transaction.atomic
 def enroll(request, slug: str):
@@ -188,17 +235,27 @@ def mark_lesson_complete(request, lesson_id):
     )
     
     # Toggle completion status
+    previous_completed_at = lesson_progress.completed_at
     lesson_progress.completed = not lesson_progress.completed
     if lesson_progress.completed:
         from django.utils import timezone
         lesson_progress.completed_at = timezone.now()
         
-        # Update streak when lesson is completed
+        # Log the day's activity; the first completion of a day advances the streak
         if hasattr(request.user, 'profile'):
-            request.user.profile.update_streak()
+            record_activity(request.user.profile, lesson_progress.completed_at)
     else:
         lesson_progress.completed_at = None
+        if previous_completed_at and hasattr(request.user, 'profile'):
+            undo_activity(request.user.profile, previous_completed_at)
     lesson_progress.save()
+
+    if lesson_progress.completed:
+        record_lesson_completion(lesson_progress, course.pk, lesson_progress.completed_at)
+        record_lesson_score(request.user.pk, course, lesson_progress.completed_at)
+    elif previous_completed_at:
+        record_lesson_completion(lesson_progress, course.pk, previous_completed_at, delta=-1)
+        record_lesson_score(request.user.pk, course, previous_completed_at, delta=-1)
     
     # Recalculate course progress
     progress_percentage = calculate_progress(enrollment)
@@ -216,6 +273,13 @@ def mark_lesson_complete(request, lesson_id):
             enrollment=enrollment
         )
         certificate_created = created
+        if created:
+            # Pre-render the PDF in the background so the first download is instant
+            transaction.on_commit(lambda: submit_certificate_render(certificate))
+
+    if lesson_progress.completed:
+        award_achievements([request.user.pk], LESSON_COMPLETED)
+    invalidate_student_dashboard(request.user.pk)
     
     # AJAX request
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -270,7 +334,76 @@ def certificate_view(request, slug: str):
 
 @login_required
 def certificate_download(request, slug: str):
-    """Download certificate as PDF (future implementation)"""
-    # For now, redirect to certificate view
-    # PDF generation can be added later with libraries like reportlab or weasyprint
-    return redirect("enrollments:certificate", slug=slug)
+    """Download certificate as PDF, rendering it in the worker pool on first request"""
+    course = get_object_or_404(
+        Course.objects.select_related("instructor"), slug=slug
+    )
+    enrollment = get_object_or_404(
+        Enrollment.objects.select_related("course", "course__instructor", "user"),
+        user=request.user,
+        course=course,
+    )
+
+    if not enrollment.is_completed:
+        messages.warning(request, "You must complete the course to download your certificate.")
+        return redirect("courses:detail", slug=slug)
+
+    certificate, _ = Certificate.objects.get_or_create(enrollment=enrollment)
+    path = certificate_storage_path(certificate.certificate_id)
+
+    if not default_storage.exists(path):
+        future = submit_certificate_render(certificate)
+        if future is not None:
+            timeout = getattr(settings, "CERTIFICATE_RENDER_TIMEOUT", 10)
+            try:
+                path = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:  # not the builtin before Python 3.11
+                messages.info(request, "Your certificate PDF is being prepared. Please try again in a moment.")
+                return redirect("enrollments:certificate", slug=slug)
+            except Exception:
+                messages.error(request, "We could not generate your certificate PDF. Please try again later.")
+                return redirect("enrollments:certificate", slug=slug)
+
+    return FileResponse(
+        default_storage.open(path, "rb"),
+        as_attachment=True,
+        filename=f"{certificate.certificate_id}.pdf",
+        content_type="application/pdf",
+    )
+
+
+@require_GET
+@ratelimit("certificate-verify", per_ip=CERTIFICATE_VERIFY_RATE, methods=("GET",))
+def verify_certificate(request, certificate_id: str):
+    """Public certificate verification for employers (HTML or JSON)"""
+    wants_json = (
+        request.GET.get("format") == "json"
+        or request.headers.get("Accept", "").startswith("application/json")
+    )
+    certificate_id = certificate_id.strip().upper()
+
+    # Malformed ids can never exist, so they never reach the cache or database
+    details = lookup_certificate(certificate_id) if CERTIFICATE_ID_RE.match(certificate_id) else None
+
+    if wants_json:
+        if details is None:
+            return JsonResponse({"valid": False, "certificate_id": certificate_id}, status=404)
+        return JsonResponse({
+            "valid": True,
+            "certificate_id": details["certificate_id"],
+            "learner_name": details["learner_name"],
+            "course_title": details["course_title"],
+            "issued_at": details["issued_at"].isoformat(),
+            "completed_at": details["completed_at"].isoformat() if details["completed_at"] else None,
+        })
+
+    context = {
+        "certificate_id": certificate_id,
+        "details": details,
+    }
+    return render(
+        request,
+        "enrollments/certificate_verify.html",
+        context,
+        status=200 if details else 404,
+    )
@@ -0,0 +1,167 @@
+"""Event-driven achievement rules.
+
+Each rule is registered for the events that can change its outcome and
+decides, for a batch of users, which of them qualify. ``award_achievements``
+runs only the rules that listen to the fired events and that some user in
+the batch has not unlocked yet, and inserts every new unlock with one
+``bulk_create``. The same code path serves single-user events and the
+``award_achievements`` backfill command.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import tzinfo
+from functools import cached_property
+from typing import Callable, NamedTuple
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from enrollments.models import Enrollment, LessonProgress
+from .dashboard import invalidate_student_dashboard
+from .models import Achievement, Profile
+
+COURSE_COMPLETED = "course_completed"
+STREAK_UPDATED = "streak_updated"
+LESSON_COMPLETED = "lesson_completed"
+EVENTS = (COURSE_COMPLETED, STREAK_UPDATED, LESSON_COMPLETED)
+
+# Lessons completed before this local hour count towards "Early Bird"
+EARLY_BIRD_HOUR = 7
+# "Perfect Progress" needs every enrolled course completed, and at least this many
+PERFECT_PROGRESS_MIN_COURSES = 3
+
+
+class Facts:
+    """Per-evaluation lookups shared by rules; each is loaded at most once."""
+
+    def __init__(self, user_ids):
+        self.user_ids = list(user_ids)
+
+    @cached_property
+    def course_counts(self) -> dict[int, tuple[int, int]]:
+        """``{user_id: (enrolled, completed)}``."""
+        rows = (
+            Enrollment.objects.filter(user_id__in=self.user_ids)
+            .values("user_id")
+            .annotate(enrolled=Count("id"), completed=Count("id", filter=Q(is_completed=True)))
+            .values_list("user_id", "enrolled", "completed")
+        )
+        return {user_id: (enrolled, completed) for user_id, enrolled, completed in rows}
+
+    @cached_property
+    def longest_streaks(self) -> dict[int, int]:
+        return dict(
+            Profile.objects.filter(user_id__in=self.user_ids).values_list("user_id", "longest_streak")
+        )
+
+    @cached_property
+    def timezones(self) -> dict[int, tzinfo]:
+        """``{user_id: the learner's timezone}``, ``TIME_ZONE`` for users without a profile."""
+        profiles = Profile.objects.filter(user_id__in=self.user_ids).only("user_id", "time_zone")
+        zones = {profile.user_id: profile.tzinfo for profile in profiles}
+        default = timezone.get_default_timezone()
+        return {user_id: zones.get(user_id, default) for user_id in self.user_ids}
+
+    def completed_courses(self, user_id: int) -> int:
+        return self.course_counts.get(user_id, (0, 0))[1]
+
+
+class Rule(NamedTuple):
+    achievement_type: str
+    events: frozenset[str]
+    check: Callable[[Facts], set[int]]
+
+
+RULES: dict[str, Rule] = {}
+
+
+def rule(achievement_type: str, *events: str):
+    """Register the decorated ``check(facts) -> qualifying user ids`` for ``events``."""
+    def decorator(check: Callable[[Facts], set[int]]):
+        RULES[achievement_type] = Rule(achievement_type, frozenset(events), check)
+        return check
+
+    return decorator
+
+
+def _courses_completed_rule(achievement_type: str, threshold: int) -> None:
+    rule(achievement_type, COURSE_COMPLETED)(
+        lambda facts: {user_id for user_id in facts.user_ids if facts.completed_courses(user_id) >= threshold}
+    )
+
+
+def _streak_rule(achievement_type: str, days: int) -> None:
+    rule(achievement_type, STREAK_UPDATED)(
+        lambda facts: {user_id for user_id, streak in facts.longest_streaks.items() if streak >= days}
+    )
+
+
+_courses_completed_rule("first_course", 1)
+_courses_completed_rule("five_courses", 5)
+_courses_completed_rule("ten_courses", 10)
+_streak_rule("streak_7", 7)
+_streak_rule("streak_30", 30)
+_streak_rule("streak_100", 100)
+
+
+@rule("perfect_progress", COURSE_COMPLETED)
+def perfect_progress(facts: Facts) -> set[int]:
+    return {
+        user_id
+        for user_id, (enrolled, completed) in facts.course_counts.items()
+        if completed >= PERFECT_PROGRESS_MIN_COURSES and completed == enrolled
+    }
+
+
+@rule("early_bird", LESSON_COMPLETED)
+def early_bird(facts: Facts) -> set[int]:
+    # The hour is taken in each learner's own timezone: one query per zone
+    by_zone = defaultdict(list)
+    for user_id, zone in facts.timezones.items():
+        by_zone[zone].append(user_id)
+    qualified = set()
+    for zone, user_ids in by_zone.items():
+        with timezone.override(zone):
+            qualified.update(
+                LessonProgress.objects.filter(
+                    enrollment__user_id__in=user_ids,
+                    completed=True,
+                    completed_at__hour__lt=EARLY_BIRD_HOUR,
+                )
+                .values_list("enrollment__user_id", flat=True)
+                .distinct()
+            )
+    return qualified
+
+
+def award_achievements(user_ids, *events: str) -> list[Achievement]:
+    """Evaluate the rules listening to ``events`` (all rules if none) for ``user_ids``.
+
+    Returns the newly unlocked achievements.
+    """
+    user_ids = list(user_ids)
+    rules = [r for r in RULES.values() if not events or r.events.intersection(events)]
+    if not user_ids or not rules:
+        return []
+
+    unlocked = set(
+        Achievement.objects.filter(
+            user_id__in=user_ids, achievement_type__in=[r.achievement_type for r in rules]
+        ).values_list("user_id", "achievement_type")
+    )
+    facts = Facts(user_ids)
+    new_achievements = []
+    for r in rules:
+        if all((user_id, r.achievement_type) in unlocked for user_id in user_ids):
+            continue
+        new_achievements.extend(
+            Achievement(user_id=user_id, achievement_type=r.achievement_type)
+            for user_id in r.check(facts)
+            if (user_id, r.achievement_type) not in unlocked
+        )
+
+    if new_achievements:
+        Achievement.objects.bulk_create(new_achievements, ignore_conflicts=True)
+        invalidate_student_dashboard(*{achievement.user_id for achievement in new_achievements})
+    return new_achievements
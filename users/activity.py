@@ -0,0 +1,151 @@
+"""Daily activity log and the streaks derived from it.
+
+Every lesson completion increments the learner's ``DailyActivity`` row for
+its local day, and undoing it decrements the row of the day it was
+completed on (a streak already earned stands). The first activity of a day
+also advances the streak on ``Profile`` with a single conditional UPDATE (no
+read-modify-write), and the nightly ``decay_streaks`` command resets broken
+streaks for everyone in one statement. ``rebuild_streaks`` recomputes both
+streak counters from the log.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .leaderboards import ALL_TIME, GLOBAL, STREAK, set_score
+from .models import DailyActivity, Profile
+
+
+def record_activity(profile: Profile, when=None, lessons: int = 1) -> bool:
+    """Log ``lessons`` completed at ``when`` (default: now) for ``profile``'s user.
+
+    Returns ``True`` when this was the learner's first activity of that day.
+    """
+    day = profile.local_date(when)
+    rows = DailyActivity.objects.filter(user_id=profile.user_id, date=day)
+    if not rows.update(lessons_completed=F("lessons_completed") + lessons):
+        DailyActivity.objects.bulk_create([DailyActivity(user_id=profile.user_id, date=day)], ignore_conflicts=True)
+        rows.update(lessons_completed=F("lessons_completed") + lessons)
+
+    if profile.last_activity_date is not None and profile.last_activity_date >= day:
+        return False
+    advance_streak(profile, day)
+    return True
+
+
+def undo_activity(profile: Profile, when, lessons: int = 1) -> None:
+    """Take back ``lessons`` logged by ``record_activity`` for ``when``'s local day."""
+    DailyActivity.objects.filter(user_id=profile.user_id, date=profile.local_date(when)).update(
+        lessons_completed=Greatest(F("lessons_completed") - lessons, 0)
+    )
+
+
+def advance_streak(profile: Profile, day: date) -> None:
+    """Count ``day`` towards ``profile``'s streak.
+
+    The new values are computed in the UPDATE from the row's current state,
+    so concurrent calls for the same day are harmless; ``profile`` is kept
+    in step without reading the row back.
+    """
+    yesterday = day - timedelta(days=1)
+    streak = Case(
+        When(last_activity_date=day, then=F("current_streak")),
+        When(last_activity_date=yesterday, then=F("current_streak") + 1),
+        default=Value(1),
+    )
+    Profile.objects.filter(pk=profile.pk).filter(
+        Q(last_activity_date__isnull=True) | Q(last_activity_date__lte=day)
+    ).update(
+        current_streak=streak,
+        longest_streak=Greatest(F("longest_streak"), streak),
+        last_activity_date=day,
+    )
+
+    previous_longest = profile.longest_streak
+    profile.current_streak = profile.current_streak + 1 if profile.last_activity_date == yesterday else 1
+    profile.longest_streak = max(profile.longest_streak, profile.current_streak)
+    profile.last_activity_date = day
+    set_score(GLOBAL, ALL_TIME, STREAK, profile.user_id, profile.current_streak)
+
+    if profile.longest_streak > previous_longest:
+        from .achievements import STREAK_UPDATED, award_achievements
+        award_achievements([profile.user_id], STREAK_UPDATED)
+
+
+def decay_streaks(now=None) -> int:
+    """Reset the current streak of everyone who missed their local yesterday.
+
+    One UPDATE covers all learners; the cutoff date is resolved per
+    timezone in use. Returns the number of profiles reset.
+    """
+    active = Profile.objects.filter(current_streak__gt=0)
+    broken = Q(last_activity_date__isnull=True)
+    for time_zone in active.values_list("time_zone", flat=True).distinct():
+        yesterday = Profile(time_zone=time_zone).local_date(now) - timedelta(days=1)
+        broken |= Q(time_zone=time_zone, last_activity_date__lt=yesterday)
+    return active.filter(broken).update(current_streak=0)
+
+
+def rebuild_streaks(user_ids=None, now=None, batch_size: int = 1000) -> int:
+    """Recompute current and longest streaks from ``DailyActivity``.
+
+    Rebuilds every profile, or only those of ``user_ids``. Returns the
+    number of profiles updated.
+    """
+    profiles = Profile.objects.order_by("pk").only("id", "user_id", "time_zone")
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(profiles.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        last_pk = batch[-1].pk
+
+        days_by_user: dict[int, list[date]] = {}
+        for user_id, day in (
+            DailyActivity.objects.filter(user_id__in=[profile.user_id for profile in batch])
+            .order_by("user_id", "date")
+            .values_list("user_id", "date")
+        ):
+            days_by_user.setdefault(user_id, []).append(day)
+
+        for profile in batch:
+            days = days_by_user.get(profile.user_id, [])
+            run = longest = 0
+            previous = None
+            for day in days:
+                run = run + 1 if previous == day - timedelta(days=1) else 1
+                longest = max(longest, run)
+                previous = day
+            yesterday = profile.local_date(now) - timedelta(days=1)
+            profile.current_streak = run if previous and previous >= yesterday else 0
+            profile.longest_streak = longest
+            profile.last_activity_date = previous
+
+        updated += Profile.objects.bulk_update(batch, ["current_streak", "longest_streak", "last_activity_date"])
+
+
+def heatmap_data(user, profile: Profile, days: int = 365) -> dict:
+    """Per-day lesson counts for the last ``days`` days (one range query)."""
+    end = profile.local_date()
+    start = end - timedelta(days=days - 1)
+    rows = (
+        DailyActivity.objects.filter(user=user, date__range=(start, end))
+        .filter(lessons_completed__gt=0)
+        .order_by("date")
+        .values_list("date", "lessons_completed")
+    )
+    counts = [{"date": day.isoformat(), "count": count} for day, count in rows]
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "active_days": len(counts),
+        "total": sum(day["count"] for day in counts),
+        "days": counts,
+    }
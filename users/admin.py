@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import Achievement, Profile, User
+from .models import Achievement, DailyActivity, LeaderboardEntry, OutgoingEmail, Profile, User
 
 
 class ProfileInline(admin.StackedInline):
@@ -68,3 +68,29 @@ class AchievementAdmin(admin.ModelAdmin):
     readonly_fields = ('unlocked_at',)
     ordering = ('-unlocked_at',)
 
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'lessons_completed')
+    list_filter = ('date',)
+    search_fields = ('user__username', 'user__email')
+    raw_id_fields = ('user',)
+    ordering = ('-date',)
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'period', 'metric', 'rank', 'user', 'score')
+    list_filter = ('metric', 'period')
+    search_fields = ('scope', 'user__username')
+    raw_id_fields = ('user',)
+    ordering = ('scope', 'period', 'metric', 'rank')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    ordering = ('-created_at',)
@@ -6,5 +6,12 @@ class UsersConfig(AppConfig):
     name = 'users'
 
     def ready(self) -> None:
+        from django.contrib.auth.signals import user_logged_in
+
         from . import signals  # noqa: F401
+        from .backends import update_last_login
+
+        # Replace Django's save()-based last_login update with a plain UPDATE
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
+        user_logged_in.connect(update_last_login, dispatch_uid="update_last_login")
         return super().ready()
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .models import email_equals
+
+UserModel = get_user_model()
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """Authenticate with a username or an email address (case-insensitive).
+
+    The user and their profile are loaded in one query that can use both the
+    username unique index and the ``lower(email)`` index. An exact username
+    match wins over an email match.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        username = (username or "").strip()
+        if not username or password is None:
+            return None
+
+        user = (
+            UserModel._default_manager.filter(Q(username=username) | email_equals(username))
+            .select_related("profile")
+            .order_by(Case(When(username=username, then=Value(0)), default=Value(1)), "pk")
+            .first()
+        )
+        if user is None:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        """Load the session's user together with their profile.
+
+        ``AuthenticationMiddleware`` memoizes the result on the request, so
+        ``user.role`` and friends (checked by ``base.html`` on every page)
+        cost no further queries.
+        """
+        try:
+            user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def update_last_login(sender, user, **kwargs):
+    """``user_logged_in`` receiver writing ``last_login`` with a plain UPDATE.
+
+    Django's default receiver calls ``user.save()``, which sends ``post_save``
+    and wakes the profile sync for a column nothing listens to.
+    """
+    user.last_login = timezone.now()
+    UserModel._default_manager.filter(pk=user.pk).update(last_login=user.last_login)
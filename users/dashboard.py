@@ -0,0 +1,91 @@
+"""Student dashboard read model.
+
+Everything the student dashboard shows is computed in a fixed number of
+queries (independent of how many courses the student is enrolled in) and
+cached per user. The cache entry is dropped on progress events: enrollment
+changes, lesson completions, achievements and streak updates.
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+
+from courses.models import Course
+from enrollments.models import Enrollment, with_lesson_counts
+from .models import Achievement, Profile
+
+DASHBOARD_CACHE_TIMEOUT = 10 * 60
+RECENT_ACHIEVEMENTS = 6
+RECOMMENDATIONS = 6
+
+
+def dashboard_cache_key(user_id: int) -> str:
+    return f"users:student-dashboard:{user_id}"
+
+
+def invalidate_student_dashboard(*user_ids: int) -> None:
+    cache.delete_many([dashboard_cache_key(user_id) for user_id in user_ids])
+
+
+def _enrollments_with_progress(user) -> list[Enrollment]:
+    """The user's enrollments with lesson counts and their next lesson (one query)."""
+    enrollments = with_lesson_counts(
+        Enrollment.objects.filter(user=user).select_related("course", "course__instructor", "next_lesson")
+    )
+    return list(enrollments.order_by("-enrolled_at"))
+
+
+def _recommendations(user, enrollments: list[Enrollment], limit: int) -> list[Course]:
+    enrolled_categories = {enrollment.course.category for enrollment in enrollments}
+    enrolled_course_ids = {enrollment.course_id for enrollment in enrollments}
+    candidates = (
+        Course.objects.filter(status="published")
+        .exclude(id__in=enrolled_course_ids)
+        .exclude(instructor=user)
+        .select_related("instructor")
+    )
+    same_category = list(candidates.filter(category__in=enrolled_categories)[:limit // 2])
+    other_courses = list(candidates.exclude(category__in=enrolled_categories)[:limit // 2])
+    return (same_category + other_courses)[:limit]
+
+
+def build_student_dashboard(user) -> dict:
+    """Compute the dashboard for ``user`` in five queries, without writes."""
+    enrollments = _enrollments_with_progress(user)
+
+    # Progress is derived from the counts so the page never has to reconcile rows
+    for enrollment in enrollments:
+        if enrollment.lesson_count:
+            enrollment.progress = min(100, int(enrollment.completed_count / enrollment.lesson_count * 100))
+
+    in_progress = [enrollment for enrollment in enrollments if not enrollment.is_completed]
+    completed = [enrollment for enrollment in enrollments if enrollment.is_completed]
+
+    streak = (
+        Profile.objects.filter(user=user).values("current_streak", "longest_streak").first()
+        or {"current_streak": 0, "longest_streak": 0}
+    )
+
+    return {
+        "total_enrolled": len(enrollments),
+        "in_progress_courses": in_progress,
+        "completed_courses": completed,
+        "recent_enrollments": enrollments[:6],
+        "total_progress": round(sum(e.progress for e in enrollments) / len(enrollments), 1) if enrollments else 0,
+        "total_lessons_completed": sum(enrollment.completed_count for enrollment in enrollments),
+        "total_lessons": sum(enrollment.lesson_count for enrollment in enrollments),
+        "completed_count": len(completed),
+        "current_streak": streak["current_streak"],
+        "longest_streak": streak["longest_streak"],
+        "achievements": list(Achievement.objects.filter(user=user).order_by("-unlocked_at")[:RECENT_ACHIEVEMENTS]),
+        "recommendations": _recommendations(user, enrollments, RECOMMENDATIONS),
+    }
+
+
+def get_student_dashboard(user) -> dict:
+    """Return the cached dashboard for ``user``, building it on a miss."""
+    key = dashboard_cache_key(user.pk)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_student_dashboard(user)
+        cache.set(key, dashboard, DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
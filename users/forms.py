@@ -1,8 +1,10 @@
+import zoneinfo
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, SetPasswordForm
 from django.contrib.auth import get_user_model
 
-from .models import Profile, User, PasswordResetOTP
+from .models import Profile, User, email_equals
 
 User = get_user_model()
 
@@ -29,7 +31,7 @@ class UserRegistrationForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data["email"].lower()
-        if User.objects.filter(email__iexact=email).exists():
+        if User.objects.filter(email_equals(email)).exists():
             raise forms.ValidationError("This email is already registered. Please sign in instead.")
         return email
 
@@ -39,13 +41,10 @@ class UserRegistrationForm(UserCreationForm):
         user.first_name = self.cleaned_data["first_name"].strip()
         user.last_name = self.cleaned_data["last_name"].strip()
         user.phone = self.cleaned_data.get("phone") or ""
+        # The profile is created with this role by the post_save handler
+        user._profile_role = self.cleaned_data["role"]
         if commit:
             user.save()
-            profile = getattr(user, "profile", None) or Profile.objects.create(user=user)
-            profile.role = self.cleaned_data["role"]
-            profile.save()
-        else:
-            user._profile_role = self.cleaned_data["role"]
         return user
 
 
@@ -77,6 +76,13 @@ class ProfileEditForm(forms.ModelForm):
         label="Course / Year",
         widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., B.Tech CSE 3rd Year'})
     )
+    time_zone = forms.ChoiceField(
+        choices=[('', 'Site default')] + [(name, name) for name in sorted(zoneinfo.available_timezones())],
+        required=False,
+        label="Time Zone",
+        help_text="Used to decide which day your learning activity counts towards.",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
     profile_photo = forms.ImageField(
         required=False,
         label="Profile Photo",
@@ -106,13 +112,14 @@ class ProfileEditForm(forms.ModelForm):
                     self.fields['date_of_birth'].initial = getattr(profile, 'date_of_birth', None)
                     self.fields['gender'].initial = getattr(profile, 'gender', None)
                     self.fields['course_year'].initial = getattr(profile, 'course_year', None)
+                    self.fields['time_zone'].initial = getattr(profile, 'time_zone', '')
             except Exception:
                 # If profile doesn't exist or fields don't exist yet, just skip
                 pass
 
     def clean_email(self):
         email = self.cleaned_data["email"].lower()
-        if User.objects.filter(email__iexact=email).exclude(pk=self.instance.pk).exists():
+        if User.objects.filter(email_equals(email)).exclude(pk=self.instance.pk).exists():
             raise forms.ValidationError("This email is already registered.")
         return email
 
@@ -122,19 +129,27 @@ class ProfileEditForm(forms.ModelForm):
         user.last_name = self.cleaned_data["last_name"].strip()
         user.email = self.cleaned_data["email"].lower()
         if commit:
-            user.save()
+            # Only write what actually changed; an unchanged form saves nothing
+            changed = [name for name in self.Meta.fields if getattr(user, name) != self.initial.get(name)]
+            if changed:
+                user.save(update_fields=changed)
             # Update profile fields
             try:
-                # Get or create profile to ensure it exists
-                profile, created = Profile.objects.get_or_create(user=user)
-                # Update profile fields
-                profile.date_of_birth = self.cleaned_data.get('date_of_birth') or None
-                profile.gender = self.cleaned_data.get('gender') or None
-                profile.course_year = self.cleaned_data.get('course_year') or None
+                profile = getattr(user, 'profile', None) or Profile.objects.get_or_create(user=user)[0]
+                values = {
+                    'date_of_birth': self.cleaned_data.get('date_of_birth') or None,
+                    'gender': self.cleaned_data.get('gender') or None,
+                    'course_year': self.cleaned_data.get('course_year') or None,
+                    'time_zone': self.cleaned_data.get('time_zone') or '',
+                }
                 # Save profile photo if provided
-                if 'profile_photo' in self.cleaned_data and self.cleaned_data['profile_photo']:
-                    profile.profile_photo = self.cleaned_data['profile_photo']
-                profile.save()
+                if self.cleaned_data.get('profile_photo'):
+                    values['profile_photo'] = self.cleaned_data['profile_photo']
+                changed = [name for name, value in values.items() if getattr(profile, name) != value]
+                for name in changed:
+                    setattr(profile, name, values[name])
+                if changed:
+                    profile.save(update_fields=changed + ['updated_at'])
             except Exception as e:
                 # Log error for debugging but don't break the form
                 import logging
@@ -153,7 +168,7 @@ class PasswordResetRequestForm(forms.Form):
     
     def clean_email(self):
         email = self.cleaned_data.get('email').lower()
-        if not User.objects.filter(email__iexact=email).exists():
+        if not User.objects.filter(email_equals(email)).exists():
             raise forms.ValidationError("No account found with this email address.")
         return email
 
@@ -174,27 +189,6 @@ class OTPVerificationForm(forms.Form):
         if not otp.isdigit():
             raise forms.ValidationError("OTP must contain only numbers.")
         return otp
-    
-    def clean(self):
-        cleaned_data = super().clean()
-        otp = cleaned_data.get('otp')
-        email = cleaned_data.get('email')
-        
-        if otp and email:
-            # Get the most recent unverified OTP for this email
-            otp_obj = PasswordResetOTP.objects.filter(
-                email=email,
-                otp=otp,
-                is_verified=False
-            ).order_by('-created_at').first()
-            
-            if not otp_obj:
-                raise forms.ValidationError("Invalid OTP. Please check and try again.")
-            
-            if otp_obj.is_expired():
-                raise forms.ValidationError("OTP has expired. Please request a new one.")
-        
-        return cleaned_data
 
 
 class PasswordResetForm(SetPasswordForm):
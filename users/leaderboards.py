@@ -0,0 +1,219 @@
+"""Leaderboards with precomputed ranks.
+
+Boards exist per course, per category and globally, for the current ISO
+week and all time, ranking learners by completed lessons; a global all-time
+board ranks current streaks. Scores and ranks are stored in
+``LeaderboardEntry`` so "top 100" and "my rank" are single indexed lookups.
+
+``rebuild_leaderboards`` recomputes the live boards in batch and drops
+weekly boards older than ``WEEKS_KEPT`` (run it nightly); between rebuilds
+``set_score``/``record_lesson_score`` apply each progress event and shift
+only the ranks the change crosses, with a fixed handful of statements however
+many boards it touches (concurrent events can leave a rank briefly off by
+one until the next rebuild).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Func, OuterRef, Q, Subquery, When
+from django.utils import timezone
+
+from enrollments.models import LessonProgress
+from .models import LeaderboardEntry, Profile
+
+GLOBAL = "global"
+ALL_TIME = "all"
+LESSONS = "lessons"
+STREAK = "streak"
+TOP = 100
+# Past weekly boards are frozen; this many are kept besides the current week
+WEEKS_KEPT = 4
+
+
+def course_scope(course_id: int) -> str:
+    return f"course:{course_id}"
+
+
+def category_scope(category: str) -> str:
+    return f"category:{category}"
+
+
+def week_period(day=None) -> str:
+    year, week, _ = (day or timezone.localdate()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _board(scope: str, period: str, metric: str):
+    return LeaderboardEntry.objects.filter(scope=scope, period=period, metric=metric)
+
+
+def top_entries(scope: str, period: str = ALL_TIME, metric: str = LESSONS, limit: int = TOP) -> list[LeaderboardEntry]:
+    return list(
+        _board(scope, period, metric).filter(rank__lte=limit).select_related("user").order_by("rank", "user_id")[:limit]
+    )
+
+
+def entry_for(user, scope: str, period: str = ALL_TIME, metric: str = LESSONS) -> LeaderboardEntry | None:
+    return _board(scope, period, metric).filter(user=user).first()
+
+
+Board = tuple[str, str, str]
+
+
+def _board_q(scope: str, period: str, metric: str) -> Q:
+    return Q(scope=scope, period=period, metric=metric)
+
+
+@transaction.atomic
+def set_scores(user_id: int, boards, score: int | None = None, delta: int = 0) -> None:
+    """Move ``user_id`` to ``score`` (or by ``delta``) on each of ``boards``, adjusting everyone it passes.
+
+    ``boards`` are ``(scope, period, metric)`` tuples. With competition
+    ranking a learner's rank is one plus the number of learners with a higher
+    score, so only learners whose score lies between the old and new values
+    change rank, by exactly one. All boards are handled together: one read,
+    one rank shift, and at most one delete, update and insert of the
+    learner's own entries plus one statement re-ranking them.
+    """
+    boards = list(dict.fromkeys(boards))
+    entries = {
+        (entry.scope, entry.period, entry.metric): entry
+        for entry in LeaderboardEntry.objects.filter(
+            Q(*[_board_q(*board) for board in boards], _connector=Q.OR), user_id=user_id
+        ).only("id", "scope", "period", "metric", "score").order_by()
+    }
+
+    up, down = Q(), Q()
+    dropped, changed, added = [], [], []
+    for board in boards:
+        entry = entries.get(board)
+        old = entry.score if entry else 0
+        new = max(old + delta if score is None else score, 0)
+        if new == old:
+            continue
+        if new > old:
+            up |= _board_q(*board) & Q(score__gte=old, score__lt=new)
+        else:
+            down |= _board_q(*board) & Q(score__gte=new, score__lt=old)
+        if new == 0:
+            dropped.append(entry.pk)
+        elif entry:
+            entry.score = new
+            changed.append(entry)
+        else:
+            added.append(LeaderboardEntry(scope=board[0], period=board[1], metric=board[2], user_id=user_id, score=new))
+
+    if up or down:
+        if up and down:
+            shift = Case(When(up, then=F("rank") + 1), default=F("rank") - 1)
+        else:
+            shift = F("rank") + 1 if up else F("rank") - 1
+        LeaderboardEntry.objects.filter(up | down).exclude(user_id=user_id).update(rank=shift)
+    if dropped:
+        LeaderboardEntry.objects.filter(pk__in=dropped).delete()
+    if changed:
+        LeaderboardEntry.objects.bulk_update(changed, ["score"])
+    if added:
+        LeaderboardEntry.objects.bulk_create(added)
+    if changed or added:
+        higher = LeaderboardEntry.objects.filter(
+            scope=OuterRef("scope"), period=OuterRef("period"), metric=OuterRef("metric"), score__gt=OuterRef("score")
+        ).order_by().values(count=Func("pk", function="COUNT"))
+        LeaderboardEntry.objects.filter(
+            Q(*[_board_q(entry.scope, entry.period, entry.metric) for entry in changed + added], _connector=Q.OR),
+            user_id=user_id,
+        ).update(rank=Subquery(higher) + 1)
+
+
+def set_score(scope: str, period: str, metric: str, user_id: int, score: int | None = None, delta: int = 0) -> None:
+    """``set_scores`` for a single board."""
+    set_scores(user_id, [(scope, period, metric)], score=score, delta=delta)
+
+
+def record_lesson_score(user_id: int, course, completed_at, delta: int = 1) -> None:
+    """Apply a lesson completion (``delta=-1`` to undo one) to every board it counts on."""
+    periods = [ALL_TIME]
+    this_week = week_period()
+    if week_period(timezone.localdate(completed_at)) == this_week:
+        periods.append(this_week)  # past weeks are frozen
+    set_scores(
+        user_id,
+        [
+            (scope, period, LESSONS)
+            for scope in (course_scope(course.pk), category_scope(course.category), GLOBAL)
+            for period in periods
+        ],
+        delta=delta,
+    )
+
+
+def _ranked(scores: dict[int, int]) -> list[tuple[int, int, int]]:
+    """``(user_id, score, rank)`` with competition ranking, highest score first."""
+    ranked = []
+    previous_score = None
+    rank = 0
+    for position, (user_id, score) in enumerate(sorted(scores.items(), key=lambda item: (-item[1], item[0])), 1):
+        if score != previous_score:
+            rank, previous_score = position, score
+        ranked.append((user_id, score, rank))
+    return ranked
+
+
+def _replace_boards(boards: dict[tuple[str, str, str], dict[int, int]], stale) -> int:
+    stale.delete()
+    entries = [
+        LeaderboardEntry(scope=scope, period=period, metric=metric, user_id=user_id, score=score, rank=rank)
+        for (scope, period, metric), scores in boards.items()
+        for user_id, score, rank in _ranked(scores)
+        if score > 0
+    ]
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+@transaction.atomic
+def rebuild_streak_board() -> int:
+    scores = dict(Profile.objects.filter(current_streak__gt=0).values_list("user_id", "current_streak"))
+    return _replace_boards({(GLOBAL, ALL_TIME, STREAK): scores}, _board(GLOBAL, ALL_TIME, STREAK))
+
+
+@transaction.atomic
+def rebuild_leaderboards() -> int:
+    """Recompute the all-time and current-week lesson boards and the streak board,
+    and drop weekly boards older than ``WEEKS_KEPT``.
+
+    Returns the number of entries written.
+    """
+    today = timezone.localdate()
+    this_week = week_period(today)
+    week_start = timezone.make_aware(datetime.combine(today - timedelta(days=today.weekday()), time.min))
+
+    boards: dict[tuple[str, str, str], dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    rows = (
+        LessonProgress.objects.filter(completed=True)
+        .values("enrollment__user_id", "enrollment__course_id", "enrollment__course__category")
+        .annotate(
+            total=Count("id"),
+            this_week=Count("id", filter=Q(completed_at__gte=week_start)),
+        )
+    )
+    for row in rows:
+        user_id = row["enrollment__user_id"]
+        scopes = (
+            course_scope(row["enrollment__course_id"]),
+            category_scope(row["enrollment__course__category"]),
+            GLOBAL,
+        )
+        for scope in scopes:
+            boards[scope, ALL_TIME, LESSONS][user_id] += row["total"]
+            boards[scope, this_week, LESSONS][user_id] += row["this_week"]
+
+    stale = LeaderboardEntry.objects.filter(Q(period=ALL_TIME) | Q(period=this_week), metric=LESSONS)
+    # ISO week labels sort chronologically
+    LeaderboardEntry.objects.exclude(period=ALL_TIME).filter(
+        period__lt=week_period(today - timedelta(weeks=WEEKS_KEPT))
+    ).delete()
+    return _replace_boards(boards, stale) + rebuild_streak_board()
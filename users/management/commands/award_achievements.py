@@ -0,0 +1,49 @@
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.achievements import award_achievements
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Evaluate achievement rules for all users in batches and award anything missing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users evaluated per batch",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        started = time.perf_counter()
+        awarded = Counter()
+        users = 0
+        last_pk = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_pk = user_ids[-1]
+            users += len(user_ids)
+            # No events: every rule is evaluated
+            for achievement in award_achievements(user_ids):
+                awarded[achievement.achievement_type] += 1
+        elapsed = time.perf_counter() - started
+
+        for achievement_type, count in sorted(awarded.items()):
+            self.stdout.write(f"  {achievement_type}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Evaluated {users} users and awarded {sum(awarded.values())} achievements in {elapsed:.1f}s."
+        ))
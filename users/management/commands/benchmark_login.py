@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import email_equals
+
+User = get_user_model()
+
+PREFIX = "bench-login-"
+PASSWORD = "bench-login-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login latency (user lookup and full authenticate) against a table of "
+        "synthetic users, comparing the old iexact lookup with the indexed one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic users to have in the table (created once and reused)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of lookups timed per scenario",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Rows per INSERT when creating synthetic users",
+        )
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete the synthetic users and exit",
+        )
+
+    def handle(self, *args, **options):
+        synthetic = User.objects.filter(username__startswith=PREFIX)
+        if options["cleanup"]:
+            deleted, _ = synthetic.delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} rows."))
+            return
+        if options["users"] < 1 or options["iterations"] < 1:
+            raise CommandError("--users and --iterations must be at least 1.")
+
+        self._create_users(synthetic, options["users"], options["batch_size"])
+        total = options["users"]
+        step = max(1, total // options["iterations"])
+        samples = [f"{PREFIX}{n}" for n in range(0, total, step)][: options["iterations"]]
+
+        self._report("iexact email lookup (old)", samples, lambda name: User.objects.filter(
+            email__iexact=f"{name.upper()}@EXAMPLE.COM"
+        ).first())
+        self._report("lower(email) lookup", samples, lambda name: User.objects.filter(
+            email_equals(f"{name.upper()}@EXAMPLE.COM")
+        ).first())
+        # Full logins are dominated by password hashing, so time fewer of them
+        logins = samples[: max(1, len(samples) // 10)]
+        self._report("authenticate by email", logins, lambda name: authenticate(
+            username=f"{name.upper()}@EXAMPLE.COM", password=PASSWORD
+        ), expect_user=True)
+        self._report("authenticate by username", logins, lambda name: authenticate(
+            username=name, password=PASSWORD
+        ), expect_user=True)
+        self.stdout.write("Remove the synthetic users with: manage.py benchmark_login --cleanup")
+
+    def _create_users(self, synthetic, total, batch_size):
+        existing = synthetic.count()
+        if existing >= total:
+            self.stdout.write(f"Reusing {existing} synthetic users.")
+            return
+        # One hash for everyone; hashing a million passwords would take hours
+        password = make_password(PASSWORD)
+        started = time.perf_counter()
+        for start in range(existing, total, batch_size):
+            User.objects.bulk_create(
+                [
+                    User(username=f"{PREFIX}{n}", email=f"{PREFIX}{n}@example.com", password=password)
+                    for n in range(start, min(start + batch_size, total))
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f"Created {total - existing} synthetic users in {time.perf_counter() - started:.1f}s.")
+
+    def _report(self, label, names, run, expect_user=False):
+        timings = []
+        queries = 0
+        for name in names:
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                user = run(name)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+            if expect_user and user is None:
+                raise CommandError(f"{label}: login failed for {name}.")
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label:<28} n={len(timings):<5} p50={statistics.median(timings):8.2f}ms "
+            f"p95={p95:8.2f}ms queries/op={queries / len(timings):.1f}"
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from users.otp import DatabaseOTPStore
+
+
+class Command(BaseCommand):
+    help = "Delete expired password reset OTPs from the database (run every few minutes with DatabaseOTPStore)"
+
+    def handle(self, *args, **options):
+        # Clean the table whichever store is configured, so rows left over
+        # from a switch to the cache store do not linger
+        deleted = DatabaseOTPStore().cleanup()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired OTPs."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.activity import decay_streaks, rebuild_streaks
+from users.leaderboards import rebuild_streak_board
+
+
+class Command(BaseCommand):
+    help = "Reset broken learning streaks (run nightly); --rebuild recomputes streaks from the activity log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute current and longest streaks for every learner from daily activity",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["rebuild"]:
+            count = rebuild_streaks()
+            action = "Rebuilt streaks for"
+        else:
+            count = decay_streaks()
+            action = "Reset broken streaks for"
+        # Streaks change for many learners at once here, so re-rank the board in batch
+        rebuild_streak_board()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{action} {count} learners in {elapsed:.2f}s."))
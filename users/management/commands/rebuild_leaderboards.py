@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recompute leaderboard scores and ranks (all-time, current week and streaks)"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        entries = rebuild_leaderboards()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Ranked {entries} leaderboard entries in {elapsed:.2f}s."))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox over a reused mail connection (run from cron or with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Messages claimed per batch (default EMAIL_OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls with --loop",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        while True:
+            started = time.perf_counter()
+            sent, failed = process_outbox(options["batch_size"])
+            if sent or failed or not options["loop"]:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"Sent {sent} emails, {failed} failed, in {elapsed:.2f}s.")
+            if not options["loop"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+
+def backfill_activity(apps, schema_editor):
+    LessonProgress = apps.get_model("enrollments", "LessonProgress")
+    DailyActivity = apps.get_model("users", "DailyActivity")
+
+    rows = (
+        LessonProgress.objects.filter(completed=True, completed_at__isnull=False)
+        .annotate(day=TruncDate("completed_at"), user_id=F("enrollment__user_id"))
+        .values("user_id", "day")
+        .annotate(total=Count("id"))
+    )
+    DailyActivity.objects.bulk_create(
+        [DailyActivity(user_id=row["user_id"], date=row["day"], lessons_completed=row["total"]) for row in rows],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollments', '0007_enrollment_resume_pointer'),
+        ('users', '0006_profile_course_year_profile_date_of_birth_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='time_zone',
+            field=models.CharField(blank=True, default='', help_text='IANA timezone used to decide which day activity falls on (blank: site default)', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('lessons_completed', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily activity',
+                'ordering': ('user', 'date'),
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_daily_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64)),
+                ('period', models.CharField(max_length=10)),
+                ('metric', models.CharField(choices=[('lessons', 'Lessons Completed'), ('streak', 'Current Streak')], max_length=16)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'ordering': ('scope', 'period', 'metric', 'rank'),
+                'indexes': [models.Index(fields=['scope', 'period', 'metric', 'rank'], name='users_leade_scope_40d9dc_idx'), models.Index(fields=['scope', 'period', 'metric', 'score'], name='users_leade_scope_cd1ce7_idx')],
+                'unique_together': {('scope', 'period', 'metric', 'user')},
+            },
+        ),
+    ]
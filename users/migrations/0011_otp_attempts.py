@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='passwordresetotp',
+            name='users_passw_email_27a5af_idx',
+        ),
+        migrations.AddField(
+            model_name='passwordresetotp',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(fields=['email', 'created_at', 'is_verified', 'otp', 'attempts'], name='users_otp_email_covering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(fields=['created_at'], name='users_otp_created_idx'),
+        ),
+    ]
@@ -1,12 +1,30 @@
+import zoneinfo
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+
+def email_equals(email: str) -> Exact:
+    """Case-insensitive email filter that can use the ``lower(email)`` index.
+
+    ``email__iexact`` compiles to ``UPPER()``/``LIKE`` and scans the table.
+    """
+    return Exact(Lower("email"), email.lower())
 
 
 class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("email"), name="users_user_email_lower_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.username
 
@@ -44,6 +62,12 @@ class Profile(models.Model):
     current_streak = models.PositiveIntegerField(default=0)
     longest_streak = models.PositiveIntegerField(default=0)
     last_activity_date = models.DateField(blank=True, null=True)
+    time_zone = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="IANA timezone used to decide which day activity falls on (blank: site default)",
+    )
     # Profile fields
     date_of_birth = models.DateField(blank=True, null=True, verbose_name="Date of Birth")
     gender = models.CharField(
@@ -63,32 +87,78 @@ class Profile(models.Model):
     def __str__(self) -> str:
         return f"{self.user.username} - {self.get_role_display()}"
 
-    def update_streak(self):
-        """Update learning streak based on activity"""
-        from django.utils import timezone
-        today = timezone.now().date()
-        
-        if self.last_activity_date:
-            days_diff = (today - self.last_activity_date).days
-            
-            if days_diff == 1:
-                # Consecutive day
-                self.current_streak += 1
-            elif days_diff > 1:
-                # Streak broken
-                self.current_streak = 1
-            # days_diff == 0 means same day, keep streak
-        else:
-            # First activity
-            self.current_streak = 1
-        
-        self.last_activity_date = today
-        
-        # Update longest streak
-        if self.current_streak > self.longest_streak:
-            self.longest_streak = self.current_streak
-        
-        self.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date'])
+    @property
+    def tzinfo(self):
+        """The learner's timezone, falling back to ``TIME_ZONE``."""
+        try:
+            return zoneinfo.ZoneInfo(self.time_zone) if self.time_zone else timezone.get_default_timezone()
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return timezone.get_default_timezone()
+
+    def local_date(self, value=None):
+        """``value`` (default: now) as a date in the learner's timezone."""
+        return timezone.localdate(value, timezone=self.tzinfo)
+
+
+class DailyActivity(models.Model):
+    """One row per learner per active day (in the learner's timezone).
+
+    Rows are incremented per completion and decremented when one is undone
+    (see ``users.activity``); streaks and the activity heatmap are derived
+    from this table.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_activity",
+    )
+    date = models.DateField()
+    lessons_completed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("user", "date")
+        unique_together = ("user", "date")
+        verbose_name_plural = "Daily activity"
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.date} ({self.lessons_completed})"
+
+
+class LeaderboardEntry(models.Model):
+    """A learner's precomputed score and rank on one leaderboard.
+
+    A leaderboard is identified by ``scope`` (``global``, ``course:<id>`` or
+    ``category:<name>``), ``period`` (``all`` or an ISO week such as
+    ``2026-W07``) and ``metric``. Ranks use competition ranking (ties share
+    a rank) and are maintained by ``users.leaderboards``.
+    """
+    METRIC_CHOICES = (
+        ("lessons", "Lessons Completed"),
+        ("streak", "Current Streak"),
+    )
+
+    scope = models.CharField(max_length=64)
+    period = models.CharField(max_length=10)
+    metric = models.CharField(max_length=16, choices=METRIC_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries",
+    )
+    score = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        ordering = ("scope", "period", "metric", "rank")
+        unique_together = ("scope", "period", "metric", "user")
+        indexes = [
+            models.Index(fields=["scope", "period", "metric", "rank"]),
+            models.Index(fields=["scope", "period", "metric", "score"]),
+        ]
+        verbose_name_plural = "Leaderboard entries"
+
+    def __str__(self) -> str:
+        return f"{self.scope}/{self.period}/{self.metric}: #{self.rank} {self.user} ({self.score})"
 
 
 class Achievement(models.Model):
@@ -136,23 +206,69 @@ class Achievement(models.Model):
 
 
 class PasswordResetOTP(models.Model):
-    """OTP for password reset"""
+    """OTP for password reset, used by ``users.otp.DatabaseOTPStore``.
+
+    There is at most one row per email; expired rows are removed by the
+    ``cleanup_otps`` command.
+    """
     email = models.EmailField()
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     is_verified = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
     
     class Meta:
         ordering = ('-created_at',)
         indexes = [
-            models.Index(fields=['email', 'otp']),
+            # Covers every lookup the store makes by email
+            models.Index(fields=['email', 'created_at', 'is_verified', 'otp', 'attempts'], name='users_otp_email_covering_idx'),
+            models.Index(fields=['created_at'], name='users_otp_created_idx'),
         ]
     
     def __str__(self):
         return f"OTP for {self.email}"
     
     def is_expired(self):
-        """Check if OTP is expired (10 minutes)"""
-        from django.utils import timezone
+        """Check if OTP is expired (PASSWORD_RESET_OTP_TTL, 10 minutes by default)"""
         from datetime import timedelta
-        return timezone.now() > self.created_at + timedelta(minutes=10)
+        ttl = getattr(settings, 'PASSWORD_RESET_OTP_TTL', 600)
+        return timezone.now() > self.created_at + timedelta(seconds=ttl)
+
+
+class OutgoingEmail(models.Model):
+    """A queued email, delivered by the ``send_outbox`` worker (see ``users.outbox``).
+
+    ``next_attempt_at`` is when the row is next due: the retry time of a
+    ``pending`` row, or the lease expiry of a ``sending`` row claimed by a
+    worker (a worker that dies mid-batch releases its rows when it expires).
+    """
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,138 @@
+"""One-time codes for password reset.
+
+The store is pluggable through ``PASSWORD_RESET_OTP_STORE``:
+
+* ``CacheOTPStore`` keeps the code and its attempt counter in the
+  ``PASSWORD_RESET_OTP_CACHE`` cache, where they expire on their own. The
+  cache must be shared by every app server (e.g. Redis or Memcached), so
+  this is the default only when ``SHARED_CACHE`` is set.
+* ``DatabaseOTPStore`` (default otherwise) keeps one ``PasswordResetOTP``
+  row per email; run the ``cleanup_otps`` command periodically to delete
+  expired rows.
+
+Issuing a code replaces any outstanding one for that email. A code is valid
+for ``PASSWORD_RESET_OTP_TTL`` seconds and at most
+``PASSWORD_RESET_OTP_MAX_ATTEMPTS`` guesses; after that a new code has to
+be requested.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PasswordResetOTP
+
+TTL = 600
+MAX_ATTEMPTS = 5
+
+
+def generate_otp() -> str:
+    return f"{secrets.randbelow(900000) + 100000}"
+
+
+class BaseOTPStore:
+    def __init__(self):
+        self.ttl = getattr(settings, "PASSWORD_RESET_OTP_TTL", TTL)
+        self.max_attempts = getattr(settings, "PASSWORD_RESET_OTP_MAX_ATTEMPTS", MAX_ATTEMPTS)
+
+    def issue(self, email: str) -> str:
+        """Create a new code for ``email``, invalidating any previous one."""
+        raise NotImplementedError
+
+    def verify(self, email: str, otp: str) -> bool:
+        """Check a guess, counting it against the attempt limit."""
+        raise NotImplementedError
+
+    def is_verified(self, email: str) -> bool:
+        """Whether ``email`` has an unexpired, successfully verified code."""
+        raise NotImplementedError
+
+    def clear(self, email: str) -> None:
+        raise NotImplementedError
+
+    def cleanup(self, now=None) -> int:
+        """Delete expired codes; returns how many were removed."""
+        return 0
+
+
+class CacheOTPStore(BaseOTPStore):
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[getattr(settings, "PASSWORD_RESET_OTP_CACHE", "default")]
+
+    def _keys(self, email: str) -> tuple[str, str]:
+        digest = hashlib.sha256(email.lower().encode()).hexdigest()[:32]
+        return f"otp:{digest}", f"otp-attempts:{digest}"
+
+    def issue(self, email):
+        otp = generate_otp()
+        code_key, attempts_key = self._keys(email)
+        self.cache.set_many({code_key: {"otp": otp, "verified": False}, attempts_key: 0}, self.ttl)
+        return otp
+
+    def verify(self, email, otp):
+        code_key, attempts_key = self._keys(email)
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:  # no code issued, or it expired
+            return False
+        state = self.cache.get(code_key)
+        if state is None or state["verified"]:
+            return False
+        if attempts > self.max_attempts:
+            self.cache.delete(code_key)
+            return False
+        if not hmac.compare_digest(state["otp"], otp):
+            return False
+        self.cache.set(code_key, {**state, "verified": True}, self.ttl)
+        return True
+
+    def is_verified(self, email):
+        state = self.cache.get(self._keys(email)[0])
+        return bool(state and state["verified"])
+
+    def clear(self, email):
+        self.cache.delete_many(self._keys(email))
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    def _live(self, email: str, now=None):
+        cutoff = (now or timezone.now()) - timedelta(seconds=self.ttl)
+        return PasswordResetOTP.objects.filter(email=email.lower(), created_at__gte=cutoff)
+
+    def issue(self, email):
+        otp = generate_otp()
+        PasswordResetOTP.objects.filter(email=email.lower()).delete()
+        PasswordResetOTP.objects.create(email=email.lower(), otp=otp)
+        return otp
+
+    def verify(self, email, otp):
+        unverified = self._live(email).filter(is_verified=False)
+        # Count the guess first so concurrent guesses cannot exceed the limit
+        if not unverified.filter(attempts__lt=self.max_attempts).update(attempts=F("attempts") + 1):
+            return False
+        return bool(unverified.filter(otp=otp).update(is_verified=True))
+
+    def is_verified(self, email):
+        return self._live(email).filter(is_verified=True).exists()
+
+    def clear(self, email):
+        PasswordResetOTP.objects.filter(email=email.lower()).delete()
+
+    def cleanup(self, now=None):
+        cutoff = (now or timezone.now()) - timedelta(seconds=self.ttl)
+        deleted, _ = PasswordResetOTP.objects.filter(created_at__lt=cutoff).delete()
+        return deleted
+
+
+def get_otp_store() -> BaseOTPStore:
+    default = "users.otp.CacheOTPStore" if getattr(settings, "SHARED_CACHE", False) else "users.otp.DatabaseOTPStore"
+    return import_string(getattr(settings, "PASSWORD_RESET_OTP_STORE", default))()
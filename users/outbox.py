@@ -0,0 +1,161 @@
+"""Outbox for transactional email.
+
+Requests never talk to the mail server: ``enqueue_email`` stores an
+``OutgoingEmail`` row (in the caller's transaction) and returns. The
+``send_outbox`` worker claims due rows in batches and delivers them over a
+single connection of ``EMAIL_OUTBOX_BACKEND`` (default ``EMAIL_BACKEND``),
+so SMTP pays one TLS handshake per run instead of one per message.
+
+A failed message is retried after ``EMAIL_OUTBOX_RETRY_DELAY`` seconds,
+doubling each time up to ``EMAIL_OUTBOX_MAX_RETRY_DELAY``, and marked
+``failed`` after ``EMAIL_OUTBOX_MAX_ATTEMPTS`` attempts. Delivery is
+at-least-once: a worker that dies mid-batch leaves its claimed rows to be
+picked up again when their lease expires.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_DELAY = 30  # seconds before the first retry
+MAX_RETRY_DELAY = 3600
+LEASE = 300  # seconds a claimed batch stays reserved for its worker
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"EMAIL_OUTBOX_{name}", default)
+
+
+def enqueue_email(subject: str, body: str, recipients: list[str], from_email: str | None = None) -> OutgoingEmail:
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipients=list(recipients),
+        from_email=from_email or "",
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try of a message that has failed ``attempts`` times."""
+    seconds = _setting("RETRY_DELAY", RETRY_DELAY) * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, _setting("MAX_RETRY_DELAY", MAX_RETRY_DELAY)))
+
+
+def claim_batch(batch_size: int | None = None, now=None) -> list[OutgoingEmail]:
+    """Reserve up to ``batch_size`` due messages for this worker.
+
+    Due means pending and past its retry time, or claimed by a worker whose
+    lease has expired. The claim is a conditional UPDATE, so rows another
+    worker claimed in the meantime are skipped.
+    """
+    now = now or timezone.now()
+    due = OutgoingEmail.objects.filter(
+        Q(status=OutgoingEmail.PENDING) | Q(status=OutgoingEmail.SENDING),
+        next_attempt_at__lte=now,
+    )
+    ids = list(due.order_by("next_attempt_at", "pk").values_list("pk", flat=True)[: batch_size or _setting("BATCH_SIZE", BATCH_SIZE)])
+    if not ids:
+        return []
+    # The lease expiry doubles as the claim token: only our UPDATE wrote it
+    lease_until = now + timedelta(seconds=_setting("LEASE", LEASE))
+    due.filter(pk__in=ids).update(status=OutgoingEmail.SENDING, next_attempt_at=lease_until)
+    return list(
+        OutgoingEmail.objects.filter(pk__in=ids, status=OutgoingEmail.SENDING, next_attempt_at=lease_until).order_by("pk")
+    )
+
+
+def _message(email: OutgoingEmail, connection) -> EmailMessage:
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=email.recipients,
+        connection=connection,
+    )
+
+
+def _reschedule(email: OutgoingEmail, error: Exception, now) -> None:
+    attempts = email.attempts + 1
+    if attempts >= _setting("MAX_ATTEMPTS", MAX_ATTEMPTS):
+        status, next_attempt_at = OutgoingEmail.FAILED, now
+        logger.error("Giving up on email %s after %d attempts: %s", email.pk, attempts, error)
+    else:
+        status, next_attempt_at = OutgoingEmail.PENDING, now + retry_delay(attempts)
+        logger.warning("Email %s failed (attempt %d), retrying at %s: %s", email.pk, attempts, next_attempt_at, error)
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=status,
+        attempts=attempts,
+        next_attempt_at=next_attempt_at,
+        last_error=str(error)[:1000],
+    )
+
+
+def send_batch(emails: list[OutgoingEmail], connection) -> tuple[int, int]:
+    """Send claimed ``emails`` over ``connection``; return ``(sent, failed)``.
+
+    The connection must stay open between messages (the SMTP backend closes
+    connections it opened itself), so it is opened here and reopened only
+    after an error may have left it unusable.
+    """
+    now = timezone.now()
+    sent = []
+    failed = 0
+    for index, email in enumerate(emails):
+        try:
+            connection.open()
+        except Exception as exc:
+            # Server unreachable: the rest of the batch waits for its retry
+            for pending in emails[index:]:
+                _reschedule(pending, exc, now)
+            failed += len(emails) - index
+            break
+        try:
+            connection.send_messages([_message(email, connection)])
+        except Exception as exc:
+            _reschedule(email, exc, now)
+            failed += 1
+            with contextlib.suppress(Exception):
+                connection.close()
+        else:
+            sent.append(email.pk)
+
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT,
+        attempts=F("attempts") + 1,
+        sent_at=now,
+        last_error="",
+    )
+    return len(sent), failed
+
+
+def process_outbox(batch_size: int | None = None, connection=None) -> tuple[int, int]:
+    """Send every due message, batch by batch over one connection.
+
+    Stops early when a whole batch fails, since the server is most likely
+    down. Returns ``(sent, failed)``.
+    """
+    connection = connection or get_connection(_setting("BACKEND", None))
+    sent = failed = 0
+    try:
+        while batch := claim_batch(batch_size):
+            batch_sent, batch_failed = send_batch(batch, connection)
+            sent += batch_sent
+            failed += batch_failed
+            if not batch_sent:
+                break
+    finally:
+        with contextlib.suppress(Exception):
+            connection.close()
+    return sent, failed
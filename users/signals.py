@@ -1,22 +1,64 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Profile
+from courses.models import Lesson
+from EduLearnPro.deferred import deferred_receiver
+from enrollments.models import Enrollment
+from .dashboard import invalidate_student_dashboard
+from .models import Achievement, Profile
 
 User = get_user_model()
 
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+def _has_pending_role(user) -> bool:
+    return getattr(user, "_profile_role", None) is not None
 
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    # Ensure profile exists even if created outside the signal
-    profile, _ = Profile.objects.get_or_create(user=instance)
-    if hasattr(instance, "_profile_role"):
-        profile.role = instance._profile_role
-    profile.save()
+@deferred_receiver(post_save, sender=User, condition=lambda instance, created, **kwargs: created)
+def create_user_profiles(users):
+    """Give new users their profile (with any role chosen at sign-up) in one INSERT."""
+    Profile.objects.bulk_create(
+        [Profile(user_id=user.pk, role=user.__dict__.pop("_profile_role", None) or "student") for user in users],
+        ignore_conflicts=True,
+    )
+
+
+@deferred_receiver(
+    post_save,
+    sender=User,
+    condition=lambda instance, created, **kwargs: not created and _has_pending_role(instance),
+)
+def sync_profile_roles(users):
+    """Apply role changes set on existing users; other user saves never touch profiles.
+
+    One UPDATE per role, plus an INSERT only for users that somehow have no
+    profile yet.
+    """
+    by_role = {}
+    for user in users:
+        role = user.__dict__.pop("_profile_role", None)
+        if role is not None:  # not already applied when the user was created
+            by_role.setdefault(role, []).append(user.pk)
+    missing = []
+    for role, user_ids in by_role.items():
+        if Profile.objects.filter(user_id__in=user_ids).update(role=role) < len(user_ids):
+            missing.extend(Profile(user_id=user_id, role=role) for user_id in user_ids)
+    if missing:
+        Profile.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Achievement)
+def invalidate_dashboard_for_user(sender, instance, **kwargs) -> None:
+    invalidate_student_dashboard(instance.user_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_dashboards_for_lesson(sender, instance: Lesson, **kwargs) -> None:
+    # Lesson counts and next lessons change for everyone enrolled in the course
+    invalidate_student_dashboard(
+        *Enrollment.objects.filter(course_id=instance.course_id).values_list("user_id", flat=True)
+    )
@@ -1,3 +1,605 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Course, Lesson
+from EduLearnPro.deferred import DeferredHandler
+from EduLearnPro.ratelimit import TokenBucket
+from enrollments.models import Enrollment, LessonProgress
+from enrollments.services import enroll_user
+
+from . import leaderboards, outbox
+from .achievements import Facts, early_bird
+from .dashboard import get_student_dashboard
+from .imports import import_users
+from .models import LeaderboardEntry, OutgoingEmail, PasswordResetOTP, Profile, User
+from .otp import CacheOTPStore, DatabaseOTPStore, get_otp_store
+
+PASSWORD = "Zq!8xkdLw2"
+
+
+class AccountQueryCountTests(TestCase):
+    """Query budgets for the account flows; a change here should be deliberate.
+
+    Profile sync runs in ``on_commit`` handlers, so each request is wrapped in
+    ``captureOnCommitCallbacks`` to count those queries too.
+    """
+
+    def create_user(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return User.objects.create_user("ann", "ann@example.com", PASSWORD, first_name="Ann", last_name="Lee", **kwargs)
+
+    def test_registration_writes_user_and_profile_once(self):
+        data = {
+            "username": "ann",
+            "email": "Ann@Example.com",
+            "first_name": "Ann",
+            "last_name": "Lee",
+            "role": "instructor",
+            "password1": PASSWORD,
+            "password2": PASSWORD,
+        }
+        # Two username checks and one email check, then one INSERT each
+        with self.assertNumQueries(5), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("users:register"), data)
+
+        self.assertRedirects(response, reverse("users:login"), fetch_redirect_response=False)
+        self.assertEqual(Profile.objects.get(user__username="ann").role, "instructor")
+
+    def test_login(self):
+        self.create_user()
+        # User lookup, last_login UPDATE, and the session row created and rewritten
+        with self.assertNumQueries(9), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("users:login"), {"email": "ANN@example.com", "password": PASSWORD})
+
+        self.assertRedirects(response, reverse("users:student_dashboard"), fetch_redirect_response=False)
+
+    def test_saving_user_does_not_touch_profile(self):
+        user = self.create_user()
+        user.first_name = "Annie"
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_profile_edit_writes_only_changed_fields(self):
+        self.create_user()
+        self.client.force_login(User.objects.get())
+        data = {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com", "gender": "female"}
+
+        # Session, user + profile load, the email uniqueness check, one profile UPDATE
+        with self.assertNumQueries(4), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("users:profile"), data)
+        self.assertRedirects(response, reverse("users:profile"), fetch_redirect_response=False)
+        self.assertEqual(Profile.objects.get().gender, "female")
+
+        with self.assertNumQueries(3), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("users:profile"), data)
+
+    def test_profile_page_loads_user_and_profile_together(self):
+        self.client.force_login(self.create_user())
+        # Session (from the database without a shared cache) and one user +
+        # profile query
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("users:profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"].role, "student")
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_profile_page_creates_missing_profile_outside_budget(self):
+        user = self.create_user()
+        Profile.objects.filter(user=user).delete()
+        self.client.force_login(user)
+        response = self.client.get(reverse("users:profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_role_change_updates_profile(self):
+        user = self.create_user()
+        user._profile_role = "instructor"
+        with self.assertNumQueries(2), self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(Profile.objects.get().role, "instructor")
+
+
+class EmailOrUsernameBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = User.objects.create_user("ann", "Ann.Lee@Example.com", PASSWORD)
+        Profile.objects.create(user=cls.ann)
+        # Another account whose username is ann's email address
+        cls.lookalike = User.objects.create_user("ann.lee@example.com", "other@example.com", PASSWORD)
+
+    def test_username_or_email_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username="ann", password=PASSWORD), self.ann)
+        with self.assertNumQueries(1):
+            user = authenticate(username=" ANN.LEE@example.COM ", password=PASSWORD)
+        self.assertEqual(user, self.ann)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.role, "student")  # loaded with the user
+        # An exact username match wins over an email match
+        self.assertEqual(authenticate(username="ann.lee@example.com", password=PASSWORD), self.lookalike)
+
+    def test_rejects_unknown_wrong_password_and_inactive(self):
+        self.assertIsNone(authenticate(username="nobody", password=PASSWORD))
+        self.assertIsNone(authenticate(username="ann", password="wrong"))
+        User.objects.filter(pk=self.ann.pk).update(is_active=False)
+        self.assertIsNone(authenticate(username="ann", password=PASSWORD))
+
+    def test_login_updates_last_login_without_saving_the_user(self):
+        saves = []
+        post_save.connect(lambda **kwargs: saves.append(kwargs["instance"]), sender=User, weak=False, dispatch_uid="saves")
+        self.addCleanup(post_save.disconnect, sender=User, dispatch_uid="saves")
+        response = self.client.post(reverse("users:login"), {"email": "ANN.LEE@example.COM", "password": PASSWORD})
+        self.assertEqual(response.status_code, 302)
+        self.ann.refresh_from_db()
+        self.assertIsNotNone(self.ann.last_login)
+        self.assertEqual(saves, [])
+
+
+class DeferredReceiverTests(TransactionTestCase):
+    """Dispatch needs real commits and rollbacks, hence ``TransactionTestCase``."""
+
+    def setUp(self):
+        self.batches = []
+        handler = DeferredHandler(
+            lambda users: self.batches.append(sorted(user.username for user in users)),
+            condition=lambda created, **kwargs: created,
+        )
+        post_save.connect(handler, sender=User, weak=False, dispatch_uid="test-deferred")
+        self.addCleanup(post_save.disconnect, sender=User, dispatch_uid="test-deferred")
+
+    def create(self, username):
+        return User.objects.create_user(username, f"{username}@example.com", PASSWORD)
+
+    def test_outside_atomic_runs_on_each_save(self):
+        self.create("ann")
+        self.create("bob")
+        self.assertEqual(self.batches, [["ann"], ["bob"]])
+
+    def test_atomic_block_runs_once_on_commit(self):
+        with transaction.atomic():
+            self.create("ann")
+            user = self.create("bob")
+            user.first_name = "Bob"
+            user.save()  # not created, filtered out by the condition
+            self.assertEqual(self.batches, [])
+        self.assertEqual(self.batches, [["ann", "bob"]])
+
+    def test_rolled_back_saves_are_dropped(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            self.create("ann")
+            raise ValueError
+        with transaction.atomic():
+            self.create("bob")
+        self.create("cat")
+        self.assertEqual(self.batches, [["bob"], ["cat"]])
+
+    def test_rolled_back_savepoint_schedules_again(self):
+        with transaction.atomic():
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.create("ann")
+                raise ValueError
+            self.create("bob")
+        self.assertEqual(self.batches, [["bob"]])
+
+
+class AchievementRuleTests(TestCase):
+    def test_early_bird_uses_each_learners_timezone(self):
+        zones = {"nyc": "America/New_York", "akl": "Pacific/Auckland", "utc": ""}
+        with self.captureOnCommitCallbacks(execute=True):
+            instructor = User.objects.create_user("ivy", "ivy@example.com", PASSWORD)
+            users = {name: User.objects.create_user(name, f"{name}@example.com", PASSWORD) for name in zones}
+        course = Course.objects.create(title="Python", slug="python", description="-", instructor=instructor)
+        lesson = Lesson.objects.create(course=course, title="One", content="-", order=1)
+        # 10:00 UTC is 06:00 in New York and 23:00 in Auckland
+        completed_at = datetime(2026, 1, 5, 10, tzinfo=dt_timezone.utc)
+        for name, user in users.items():
+            Profile.objects.filter(user=user).update(time_zone=zones[name])
+            LessonProgress.objects.create(
+                enrollment=Enrollment.objects.create(user=user, course=course),
+                lesson=lesson,
+                completed=True,
+                completed_at=completed_at,
+            )
+
+        self.assertEqual(early_bird(Facts(user.pk for user in users.values())), {users["nyc"].pk})
+
+
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("sam", "sam@example.com", PASSWORD)
+        instructor = User.objects.create_user("ivy", "ivy@example.com", PASSWORD)
+        cls.courses = [
+            Course.objects.create(
+                title=f"Course {n}", slug=f"course-{n}", description="-", instructor=instructor, status="published"
+            )
+            for n in range(2)
+        ]
+        for course in cls.courses:
+            Lesson.objects.create(course=course, title="One", content="-", order=1)
+
+    def setUp(self):
+        cache.clear()
+        for course in self.courses:
+            enroll_user(self.student, course)
+
+    def test_built_in_fixed_queries_then_served_from_cache(self):
+        with self.assertNumQueries(5):
+            dashboard = get_student_dashboard(self.student)
+        self.assertEqual((dashboard["total_enrolled"], dashboard["total_lessons"]), (2, 2))
+        with self.assertNumQueries(0):
+            get_student_dashboard(self.student)
+
+    def test_lesson_completion_refreshes_the_dashboard(self):
+        get_student_dashboard(self.student)
+        self.client.force_login(self.student)
+        lesson = self.courses[0].lessons.get()
+        self.client.post(reverse("enrollments:mark-lesson-complete", kwargs={"lesson_id": lesson.pk}))
+
+        dashboard = get_student_dashboard(self.student)
+        self.assertEqual(dashboard["total_lessons_completed"], 1)
+        self.assertEqual([e.course for e in dashboard["completed_courses"]], [self.courses[0]])
+        self.assertEqual(dashboard["total_progress"], 50.0)
+
+    def test_new_lesson_refreshes_enrolled_students(self):
+        get_student_dashboard(self.student)
+        Lesson.objects.create(course=self.courses[1], title="Two", content="-", order=2)
+        self.assertEqual(get_student_dashboard(self.student)["total_lessons"], 3)
+
+
+class ActivityHeatmapTests(TestCase):
+    def test_user_without_a_profile_gets_an_empty_heatmap(self):
+        user = User.objects.create_user("ann", "ann@example.com", PASSWORD)
+        Profile.objects.filter(user=user).delete()
+        self.client.force_login(user)
+        response = self.client.get(reverse("users:activity_heatmap"), {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["active_days"], data["total"], data["current_streak"]), (0, 0, 0))
+
+
+class LeaderboardTests(TestCase):
+    BOARD = (leaderboards.GLOBAL, leaderboards.ALL_TIME, leaderboards.LESSONS)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [User.objects.create_user(name, f"{name}@example.com", PASSWORD).pk for name in "abcde"]
+
+    def set(self, user_id, **kwargs):
+        leaderboards.set_score(*self.BOARD, user_id, **kwargs)
+
+    def assertBoard(self, scores):
+        """The stored board matches a full competition ranking of ``scores``."""
+        expected = {user_id: (score, rank) for user_id, score, rank in leaderboards._ranked(scores) if score}
+        stored = {
+            entry.user_id: (entry.score, entry.rank)
+            for entry in LeaderboardEntry.objects.filter(scope=self.BOARD[0], period=self.BOARD[1], metric=self.BOARD[2])
+        }
+        self.assertEqual(stored, expected)
+
+    def test_ties_share_a_rank_and_split_when_passed(self):
+        a, b, c, d, _ = self.ids
+        for user_id, score in ((a, 5), (b, 3), (c, 3), (d, 1)):
+            self.set(user_id, score=score)
+        self.assertBoard({a: 5, b: 3, c: 3, d: 1})
+
+        self.set(d, score=3)  # joins the tie
+        self.assertBoard({a: 5, b: 3, c: 3, d: 3})
+        self.set(c, delta=1)  # leaves it upwards
+        self.assertBoard({a: 5, b: 3, c: 4, d: 3})
+        self.set(a, score=4)  # drops into a tie from above
+        self.assertBoard({a: 4, b: 3, c: 4, d: 3})
+
+    def test_dropping_to_zero_removes_the_entry(self):
+        a, b, c, _, _ = self.ids
+        for user_id, score in ((a, 2), (b, 2), (c, 1)):
+            self.set(user_id, score=score)
+        self.set(a, delta=-5)
+        self.assertBoard({b: 2, c: 1})
+        self.set(a, delta=-1)  # no entry and nothing to take away
+        self.assertBoard({b: 2, c: 1})
+
+    def test_undoing_a_lesson_restores_every_board(self):
+        a, b, c, _, _ = self.ids
+        course = Course.objects.create(
+            title="Python", slug="python", description="-", instructor_id=c, category="programming"
+        )
+        now = timezone.now()
+        for _ in range(2):
+            leaderboards.record_lesson_score(b, course, now)
+        leaderboards.record_lesson_score(a, course, now)
+        before = sorted(LeaderboardEntry.objects.values_list("scope", "period", "user_id", "score", "rank"))
+
+        # One savepoint, read, shift, score update and re-rank for all six boards
+        with self.assertNumQueries(6):
+            leaderboards.record_lesson_score(a, course, now)
+        self.assertEqual(
+            set(LeaderboardEntry.objects.filter(user_id=a).values_list("score", "rank")), {(2, 1)}
+        )
+        leaderboards.record_lesson_score(a, course, now, delta=-1)
+        self.assertEqual(
+            sorted(LeaderboardEntry.objects.values_list("scope", "period", "user_id", "score", "rank")), before
+        )
+
+    def test_rebuild_drops_old_weekly_boards(self):
+        a = self.ids[0]
+        today = timezone.localdate()
+        kept = leaderboards.week_period(today - timedelta(weeks=leaderboards.WEEKS_KEPT))
+        old = leaderboards.week_period(today - timedelta(weeks=leaderboards.WEEKS_KEPT + 1))
+        for period in (kept, old):
+            leaderboards.set_score(leaderboards.GLOBAL, period, leaderboards.LESSONS, a, score=1)
+
+        leaderboards.rebuild_leaderboards()
+        self.assertEqual(list(LeaderboardEntry.objects.values_list("period", flat=True)), [kept])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket("test", "2/10s")  # a token every 5 seconds
+
+    def test_burst_then_wait_for_refill(self):
+        self.assertEqual(self.bucket.consume("ann", now=100), 0)
+        self.assertEqual(self.bucket.consume("ann", now=100), 0)
+        self.assertEqual(self.bucket.consume("ann", now=100), 5)
+        self.assertEqual(self.bucket.consume("ann", now=103), 2)
+        self.assertEqual(self.bucket.consume("ann", now=105), 0)
+        self.assertEqual(self.bucket.consume("bob", now=105), 0)  # separate bucket
+
+    def test_refill_stops_at_capacity(self):
+        self.bucket.consume("ann", now=100)
+        for _ in range(2):
+            self.assertEqual(self.bucket.consume("ann", now=1000), 0)
+        self.assertEqual(self.bucket.consume("ann", now=1000), 5)
+
+
+class BouncingBackend(EmailBackend):
+    """Locmem delivery that rejects recipients at bounce.invalid."""
+
+    def send_messages(self, messages):
+        if any(address.endswith("@bounce.invalid") for message in messages for address in message.to):
+            raise ConnectionError("550 mailbox unavailable")
+        return super().send_messages(messages)
+
+
+class OutboxTests(TestCase):
+    def later(self, **kwargs):
+        return timezone.now() + timedelta(**kwargs)
+
+    def test_due_messages_are_sent_and_marked(self):
+        outbox.enqueue_email("Hi", "Body", ["ann@example.com"])
+        outbox.enqueue_email("Hi", "Body", ["bob@example.com"])
+        self.assertEqual(outbox.process_outbox(), (2, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["ann@example.com", "bob@example.com"])
+        self.assertEqual(set(OutgoingEmail.objects.values_list("status", "attempts")), {(OutgoingEmail.SENT, 1)})
+        self.assertEqual(outbox.process_outbox(), (0, 0))
+
+    def test_claimed_rows_wait_for_their_lease_to_expire(self):
+        email = outbox.enqueue_email("Hi", "Body", ["ann@example.com"])
+        now = self.later(seconds=1)
+        self.assertEqual(outbox.claim_batch(now=now), [email])
+        self.assertEqual(outbox.claim_batch(now=now), [])  # another worker
+        self.assertEqual(outbox.claim_batch(now=now + timedelta(seconds=outbox.LEASE - 1)), [])
+        # The first worker died: its rows are claimed again once the lease is up
+        self.assertEqual(outbox.claim_batch(now=now + timedelta(seconds=outbox.LEASE)), [email])
+
+    def test_failures_back_off_until_marked_failed(self):
+        self.assertEqual([outbox.retry_delay(n).total_seconds() for n in (1, 2, 3, 8, 20)], [30, 60, 120, 3600, 3600])
+
+        email = outbox.enqueue_email("Hi", "Body", ["ann@bounce.invalid"])
+        connection = BouncingBackend()
+        before = timezone.now()
+        with self.assertLogs("users.outbox", "WARNING"):
+            self.assertEqual(outbox.process_outbox(connection=connection), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.PENDING, 1))
+        self.assertIn("550", email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=30))
+        self.assertEqual(outbox.claim_batch(now=self.later(seconds=29)), [])
+
+        with self.assertLogs("users.outbox", "WARNING") as logs:
+            for _ in range(outbox.MAX_ATTEMPTS - 1):
+                outbox.send_batch(outbox.claim_batch(now=self.later(days=1)), connection)
+        self.assertTrue(logs.output[-1].startswith("ERROR:users.outbox:Giving up on email"))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.FAILED, outbox.MAX_ATTEMPTS))
+        self.assertEqual(outbox.claim_batch(now=self.later(days=30)), [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_failure_does_not_hold_back_the_batch(self):
+        outbox.enqueue_email("Hi", "Body", ["ann@bounce.invalid"])
+        outbox.enqueue_email("Hi", "Body", ["bob@example.com"])
+        with self.assertLogs("users.outbox", "WARNING"):
+            self.assertEqual(outbox.process_outbox(connection=BouncingBackend()), (1, 1))
+        self.assertEqual([message.to for message in mail.outbox], [["bob@example.com"]])
+
+
+class OTPStoreTestsMixin:
+    store_class = None
+
+    def setUp(self):
+        cache.clear()
+        self.store = self.store_class()
+        self.otp = self.store.issue("Ann@Example.com")
+
+    def expire(self):
+        raise NotImplementedError
+
+    def test_code_verifies_once(self):
+        self.assertFalse(self.store.is_verified("ann@example.com"))
+        self.assertTrue(self.store.verify("ann@example.com", self.otp))
+        self.assertTrue(self.store.is_verified("ANN@example.com"))
+        self.assertFalse(self.store.verify("ann@example.com", self.otp))
+
+    def test_attempt_limit(self):
+        wrong = "000000" if self.otp != "000000" else "111111"
+        for _ in range(self.store.max_attempts - 1):
+            self.assertFalse(self.store.verify("ann@example.com", wrong))
+        self.assertTrue(self.store.verify("ann@example.com", self.otp))
+
+        self.otp = self.store.issue("ann@example.com")
+        for _ in range(self.store.max_attempts):
+            self.assertFalse(self.store.verify("ann@example.com", wrong))
+        self.assertFalse(self.store.verify("ann@example.com", self.otp))
+
+    def test_expired_code_fails(self):
+        self.expire()
+        self.assertFalse(self.store.verify("ann@example.com", self.otp))
+
+    def test_verified_code_expires(self):
+        self.store.verify("ann@example.com", self.otp)
+        self.expire()
+        self.assertFalse(self.store.is_verified("ann@example.com"))
+
+    def test_clear(self):
+        self.store.verify("ann@example.com", self.otp)
+        self.store.clear("ann@example.com")
+        self.assertFalse(self.store.is_verified("ann@example.com"))
+        self.assertFalse(self.store.verify("ann@example.com", self.otp))
+
+
+class DatabaseOTPStoreTests(OTPStoreTestsMixin, TestCase):
+    store_class = DatabaseOTPStore
+
+    def expire(self):
+        PasswordResetOTP.objects.update(created_at=timezone.now() - timedelta(seconds=self.store.ttl + 1))
+
+    def test_cleanup_removes_expired_codes(self):
+        self.store.issue("bob@example.com")
+        self.expire()
+        self.store.issue("cat@example.com")
+        self.assertEqual(self.store.cleanup(), 2)
+        self.assertEqual(list(PasswordResetOTP.objects.values_list("email", flat=True)), ["cat@example.com"])
+
+
+class CacheOTPStoreTests(OTPStoreTestsMixin, SimpleTestCase):
+    store_class = CacheOTPStore
+
+    def expire(self):
+        clock = mock.patch("django.core.cache.backends.locmem.time.time", return_value=2 ** 40)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+
+class PasswordResetFlowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user("ann", "ann@example.com", PASSWORD)
+
+    def test_default_store_without_shared_cache(self):
+        self.assertIsInstance(get_otp_store(), DatabaseOTPStore)
+
+    def test_code_is_cleared_after_reset(self):
+        self.client.post(reverse("users:password_reset"), {"email": "Ann@Example.com"})
+        otp = OutgoingEmail.objects.get().body.split(": ", 1)[1][:6]
+        self.assertRedirects(
+            self.client.post(reverse("users:verify_otp"), {"otp": otp, "email": "ann@example.com"}),
+            reverse("users:reset_password"),
+            fetch_redirect_response=False,
+        )
+        new_password = "Nw!5tqpVz8"
+        response = self.client.post(
+            reverse("users:reset_password"), {"new_password1": new_password, "new_password2": new_password}
+        )
+        self.assertRedirects(response, reverse("users:login"), fetch_redirect_response=False)
+
+        self.assertFalse(PasswordResetOTP.objects.exists())
+        self.assertFalse(get_otp_store().is_verified("ann@example.com"))
+        self.assertTrue(User.objects.get().check_password(new_password))
+
+
+class SessionEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(User.objects.create_user("ann", "ann@example.com", PASSWORD))
+        self.url = reverse("users:profile")
+
+    def test_logout_elsewhere_ends_the_session_without_a_shared_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        # Another process handles the logout: the row goes, this process's cache is untouched
+        Session.objects.all().delete()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_shared_cache_serves_sessions(self):
+        self.client.force_login(User.objects.get())  # stored in the cache as well
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class ImportUsersTests(TestCase):
+    def row(self, username, **kwargs):
+        return {"username": username, "email": f"{username}@example.com", **kwargs}
+
+    def test_creates_users_with_profiles(self):
+        result = import_users([self.row("ann", role="instructor"), self.row("bob", password="pw")], workers=1)
+        self.assertEqual((result["created"], result["invalid"], result["errors"]), (2, 0, []))
+        self.assertEqual(dict(Profile.objects.values_list("user__username", "role")), {"ann": "instructor", "bob": "student"})
+        self.assertFalse(User.objects.get(username="ann").has_usable_password())
+        self.assertTrue(User.objects.get(username="bob").check_password("pw"))
+
+    def test_reports_invalid_and_duplicate_rows(self):
+        rows = [
+            self.row("ann"),
+            self.row("bob", email="not-an-email"),
+            self.row("cat", role="admin"),
+            ["dan", "dan@example.com"],
+            self.row("ann2", email="ANN@example.com"),
+        ]
+        result = import_users(rows, workers=1)
+        self.assertEqual((result["created"], result["invalid"]), (1, 4))
+        self.assertEqual([error.split(":")[0] for error in result["errors"]], ["row 2", "row 3", "row 4", "row 5"])
+        self.assertIn("expected an object", result["errors"][2])
+
+    def test_skips_existing_accounts(self):
+        User.objects.create_user("ann", "Ann@Example.com")
+        rows = [self.row("ann", email="ann@example.org"), self.row("zed", email="ann@example.com"), self.row("bob")]
+        result = import_users(rows, workers=1)
+        self.assertEqual((result["created"], result["skipped"]), (1, 2))
+
+    def test_conflicting_batch_is_reported_and_the_rest_imported(self):
+        insert = User.objects.bulk_create
+
+        def racing_insert(objs, **kwargs):
+            if objs[0].username == "ann":
+                raise IntegrityError("UNIQUE constraint failed: users_user.username")
+            return insert(objs, **kwargs)
+
+        rows = [(10, self.row("ann")), (11, self.row("bob")), (12, self.row("cat"))]
+        with mock.patch.object(User.objects, "bulk_create", racing_insert):
+            result = import_users(rows, batch_size=2, workers=1)
+        self.assertEqual((result["created"], result["failed"], result["skipped"]), (1, 2, 0))
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertTrue(result["errors"][0].startswith("rows 10-11: batch not imported"))
+        self.assertEqual(list(User.objects.values_list("username", flat=True)), ["cat"])
+
+    def test_command_reports_jsonl_line_numbers(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "users.jsonl"
+        path.write_text("\n".join([json.dumps(self.row("ann")), "", json.dumps([1, 2]), "{oops"]) + "\n")
+        with self.assertRaisesMessage(CommandError, "Invalid JSON on line 4"):
+            call_command("import_users", str(path), workers=1, stdout=StringIO())
+
+        path.write_text("\n".join([json.dumps(self.row("ann")), "", json.dumps([1, 2])]) + "\n")
+        out = StringIO()
+        call_command("import_users", str(path), workers=1, stdout=out)
+        self.assertIn("row 3: expected an object", out.getvalue())
+        self.assertIn("Created 1 of 2 accounts", out.getvalue())
@@ -8,6 +8,8 @@ urlpatterns = [
     path('login/', views.login_user, name='login'),
     path('register/', views.register_user, name='register'),
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('student/activity/', views.activity_heatmap, name='activity_heatmap'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('instructor/dashboard/', views.instructor_dashboard, name='instructor_dashboard'),
     path('profile/', views.profile, name='profile'),
     path('logout/', views.logout_view, name='logout'),
@@ -1,22 +1,29 @@
-import random
-import logging
-import traceback
 from django.contrib import messages
 from django.contrib.auth import authenticate, get_user_model, login, logout as auth_logout
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
 from django.db.models import Count, Q
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
+from django.views.decorators.http import require_GET
 from django.conf import settings
 
 from courses.models import Course
 from enrollments.models import Enrollment
+from enrollments.rollups import daily_series
+from EduLearnPro.querybudget import query_budget, unbudgeted
+from EduLearnPro.ratelimit import ratelimit
+from EduLearnPro.replicas import use_replica
+from .activity import heatmap_data
+from .dashboard import get_student_dashboard
 from .forms import ProfileEditForm, UserRegistrationForm, PasswordResetRequestForm, OTPVerificationForm, PasswordResetForm
-from .models import PasswordResetOTP
+from .models import email_equals
+from .otp import get_otp_store
+from .outbox import enqueue_email
 
 User = get_user_model()
 
 
+@ratelimit("login", per_ip="20/m", per_identifier="5/m", identifier="email")
 def login_user(request):
     if request.user.is_authenticated:
         destination = 'courses:instructor-dashboard' if request.user.role == "instructor" else 'users:student_dashboard'
@@ -31,12 +38,8 @@ def login_user(request):
         user = None
 
         if identifier and password:
-            UserModel = get_user_model()
-            matched_user = UserModel.objects.filter(email__iexact=identifier).first()
-            if matched_user:
-                user = authenticate(request, username=matched_user.username, password=password)
-            else:
-                user = authenticate(request, username=identifier, password=password)
+            # The backend accepts a username or an email address
+            user = authenticate(request, username=identifier, password=password)
 
         if user is not None:
             login(request, user)
@@ -57,6 +60,7 @@ def login_user(request):
     return render(request, 'users/login.html', context)
 
 
+@ratelimit("register", per_ip="10/h", per_identifier="3/h", identifier="email")
 def register_user(request):
     if request.user.is_authenticated:
         if request.user.role == "instructor":
@@ -78,131 +82,63 @@ def register_user(request):
     return render(request, "users/register.html", {"form": form})
 
 
-def check_and_award_achievements(user):
-    """Check and award achievements for a user"""
-    from .models import Achievement
-    from enrollments.models import Enrollment
-    
-    completed_count = Enrollment.objects.filter(user=user, is_completed=True).count()
-    profile = user.profile
-    
-    # Course completion achievements
-    if completed_count >= 1:
-        Achievement.objects.get_or_create(user=user, achievement_type='first_course')
-    if completed_count >= 5:
-        Achievement.objects.get_or_create(user=user, achievement_type='five_courses')
-    if completed_count >= 10:
-        Achievement.objects.get_or_create(user=user, achievement_type='ten_courses')
-    
-    # Streak achievements
-    if profile.current_streak >= 7:
-        Achievement.objects.get_or_create(user=user, achievement_type='streak_7')
-    if profile.current_streak >= 30:
-        Achievement.objects.get_or_create(user=user, achievement_type='streak_30')
-    if profile.current_streak >= 100:
-        Achievement.objects.get_or_create(user=user, achievement_type='streak_100')
-
-
-def get_course_recommendations(user, limit=6):
-    """Get course recommendations for a user"""
-    from courses.models import Course
-    from enrollments.models import Enrollment
-    
-    # Get user's enrolled course categories
-    enrolled_courses = Enrollment.objects.filter(user=user).select_related('course')
-    enrolled_categories = set(enrolled_courses.values_list('course__category', flat=True))
-    enrolled_course_ids = set(enrolled_courses.values_list('course_id', flat=True))
-    
-    # Recommend courses in same categories or popular courses
-    recommendations = Course.objects.filter(
-        status='published'
-    ).exclude(
-        id__in=enrolled_course_ids
-    ).exclude(
-        instructor=user
-    ).select_related('instructor').prefetch_related('lessons')
-    
-    # Prioritize courses in enrolled categories
-    same_category = recommendations.filter(category__in=enrolled_categories)
-    other_courses = recommendations.exclude(category__in=enrolled_categories)
-    
-    # Combine and limit
-    recommended = list(same_category[:limit//2]) + list(other_courses[:limit//2])
-    
-    return recommended[:limit]
-
-
 @login_required
+@query_budget(12)
 def student_dashboard(request):
     """Student Dashboard with enrolled courses, progress stats, and personal info"""
-    from enrollments.models import calculate_progress
-    from enrollments.views import _ensure_lesson_progress
-    from .models import Achievement
-    
-    enrollments = Enrollment.objects.filter(user=request.user).select_related('course', 'course__instructor').order_by('-enrolled_at')
-    
-    # Ensure lesson progress exists and recalculate progress for all enrollments
-    for enrollment in enrollments:
-        _ensure_lesson_progress(enrollment)
-        calculate_progress(enrollment)
-    
-    # Refresh enrollments from DB
-    enrollments = Enrollment.objects.filter(user=request.user).select_related('course', 'course__instructor').order_by('-enrolled_at')
-    
-    # Calculate stats
-    total_enrolled = enrollments.count()
-    in_progress_courses = enrollments.filter(is_completed=False).select_related('course', 'course__instructor')
-    completed_courses = enrollments.filter(is_completed=True).select_related('course', 'course__instructor')
-    
-    # Calculate overall progress
-    total_progress = 0
-    total_lessons_completed = 0
-    total_lessons = 0
-    
-    if enrollments.exists():
-        total_progress = sum(e.progress for e in enrollments) / enrollments.count()
-        # Calculate total lessons completed across all courses
-        for enrollment in enrollments:
-            total_lessons += enrollment.lesson_progress.count()
-            total_lessons_completed += enrollment.lesson_progress.filter(completed=True).count()
-    
-    # Get next lesson for in-progress courses
-    for enrollment in in_progress_courses:
-        next_lesson = enrollment.lesson_progress.filter(completed=False).select_related('lesson').order_by('lesson__order', 'lesson__id').first()
-        enrollment.next_lesson = next_lesson.lesson if next_lesson else None
-    
-    # Get recent activity (last 6 enrollments)
-    recent_enrollments = enrollments[:6]
-    
-    # Get streak info
-    profile = request.user.profile
-    current_streak = profile.current_streak
-    longest_streak = profile.longest_streak
-    
-    # Get achievements
-    achievements = Achievement.objects.filter(user=request.user).order_by('-unlocked_at')[:6]
-    
-    # Get recommendations
-    recommendations = get_course_recommendations(request.user, limit=6)
-    
-    # Check for new achievements
-    check_and_award_achievements(request.user)
-    
+    context = get_student_dashboard(request.user)
+    return render(request, 'users/student_dashboard.html', context)
+
+
+@login_required
+@require_GET
+def activity_heatmap(request):
+    """JSON activity heatmap (lessons completed per day) for the student dashboard."""
+    try:
+        days = min(max(int(request.GET.get('days', 365)), 1), 366)
+    except ValueError:
+        days = 365
+    profile = getattr(request.user, 'profile', None)
+    if profile is None:
+        from .models import Profile
+        profile = Profile.objects.get_or_create(user=request.user)[0]
+    data = heatmap_data(request.user, profile, days=days)
+    data.update(current_streak=profile.current_streak, longest_streak=profile.longest_streak)
+    return JsonResponse(data)
+
+
+@login_required
+@require_GET
+def leaderboard(request):
+    """Top learners on one leaderboard, plus the viewer's own rank"""
+    from . import leaderboards
+
+    metric = leaderboards.STREAK if request.GET.get('metric') == leaderboards.STREAK else leaderboards.LESSONS
+    period = leaderboards.week_period() if request.GET.get('period') == 'week' else leaderboards.ALL_TIME
+    course = None
+    category = request.GET.get('category', '')
+    if metric == leaderboards.STREAK:
+        scope, period, category = leaderboards.GLOBAL, leaderboards.ALL_TIME, ''
+    elif request.GET.get('course'):
+        course = Course.objects.filter(slug=request.GET['course']).only('id', 'title', 'slug').first()
+        scope = leaderboards.course_scope(course.pk) if course else leaderboards.GLOBAL
+        category = ''
+    elif category in dict(Course.CATEGORY_CHOICES):
+        scope = leaderboards.category_scope(category)
+    else:
+        scope, category = leaderboards.GLOBAL, ''
+
     context = {
-        'total_enrolled': total_enrolled,
-        'in_progress_courses': in_progress_courses,
-        'completed_courses': completed_courses,
-        'recent_enrollments': recent_enrollments,
-        'total_progress': round(total_progress, 1),
-        'total_lessons_completed': total_lessons_completed,
-        'total_lessons': total_lessons,
-        'completed_count': completed_courses.count(),
-        'current_streak': current_streak,
-        'longest_streak': longest_streak,
-        'achievements': achievements,
-        'recommendations': recommendations,
+        'entries': leaderboards.top_entries(scope, period, metric),
+        'my_entry': leaderboards.entry_for(request.user, scope, period, metric),
+        'metric': metric,
+        'weekly': period != leaderboards.ALL_TIME,
+        'course': course,
+        'category': category,
+        'categories': Course.CATEGORY_CHOICES,
+        'enrolled_courses': Course.objects.filter(enrollments__user=request.user).only('title', 'slug').order_by('title'),
     }
-    return render(request, 'users/student_dashboard.html', context)
+    return render(request, 'users/leaderboard.html', context)
 
 
 @login_required
@@ -212,88 +148,47 @@ def instructor_dashboard(request):
         messages.error(request, "You don't have permission to access this page.")
         return redirect('users:student_dashboard')
     
-    from django.db.models import Avg, Count, Q
-    from enrollments.models import calculate_progress
-    from enrollments.views import _ensure_lesson_progress
-    
-    # Get instructor's courses
-    instructor_courses = Course.objects.filter(instructor=request.user).annotate(
-        enrolled_count=Count('enrollments')
-    ).order_by('-created_at')
-    
-    # Calculate stats
-    total_courses = instructor_courses.count()
-    total_students = Enrollment.objects.filter(course__instructor=request.user).values('user').distinct().count()
-    total_enrollments = Enrollment.objects.filter(course__instructor=request.user).count()
-    
-    # Calculate completion stats
-    completed_enrollments = Enrollment.objects.filter(
-        course__instructor=request.user,
-        is_completed=True
-    ).count()
-    
-    # Calculate average progress across all enrollments
-    avg_progress = Enrollment.objects.filter(
-        course__instructor=request.user
-    ).aggregate(avg=Avg('progress'))['avg'] or 0
-    
-    # Get recent students with progress
-    recent_enrollments = Enrollment.objects.filter(
-        course__instructor=request.user
-    ).select_related('user', 'course').order_by('-enrolled_at')[:10]
-    
-    # Ensure progress is calculated for recent enrollments
-    for enrollment in recent_enrollments:
-        _ensure_lesson_progress(enrollment)
-        calculate_progress(enrollment)
-    
-    # Refresh to get updated progress
-    recent_enrollments = Enrollment.objects.filter(
-        course__instructor=request.user
-    ).select_related('user', 'course').order_by('-enrolled_at')[:10]
+    from courses.stats import get_instructor_stats
+
+    stats = get_instructor_stats(request.user)
+    instructor_courses = stats['courses']
     
-    # Get courses with student progress breakdown
-    courses_with_stats = []
-    for course in instructor_courses[:5]:  # Top 5 courses
-        course_enrollments = Enrollment.objects.filter(course=course)
-        course_avg_progress = course_enrollments.aggregate(avg=Avg('progress'))['avg'] or 0
-        course_completed = course_enrollments.filter(is_completed=True).count()
-        course_total = course_enrollments.count()
-        course_completion_rate = (course_completed / course_total * 100) if course_total > 0 else 0
-        
-        courses_with_stats.append({
+    # Top 5 courses with student progress breakdown
+    courses_with_stats = [
+        {
             'course': course,
-            'avg_progress': round(course_avg_progress, 1),
-            'completed_count': course_completed,
-            'total_enrollments': course_total,
-            'completion_rate': round(course_completion_rate, 1),
-        })
-    
-    # Calculate completion rate
-    completion_rate = (completed_enrollments / total_enrollments * 100) if total_enrollments > 0 else 0
-    
-    # Course metrics summary
-    published_courses = instructor_courses.filter(status='published').count()
-    draft_courses = instructor_courses.filter(status='draft').count()
-    total_lessons = sum(course.lessons.count() for course in instructor_courses)
+            'avg_progress': course.avg_progress,
+            'completed_count': course.completed_count,
+            'total_enrollments': course.enrolled_count,
+            'completion_rate': course.completion_rate,
+        }
+        for course in instructor_courses[:5]
+    ]
+    # The rollup aggregates are uncached and read-only; the cached stats above
+    # stay on the primary so a lagging replica never gets cached
+    with use_replica():
+        activity_series = daily_series([course.pk for course in instructor_courses], days=30)
     
     context = {
         'instructor_courses': instructor_courses,
-        'courses_count': total_courses,
-        'published_courses': published_courses,
-        'draft_courses': draft_courses,
-        'total_lessons': total_lessons,
-        'total_students': total_students,
-        'total_enrollments': total_enrollments,
-        'completed_enrollments': completed_enrollments,
-        'completion_rate': round(completion_rate, 1),
-        'avg_progress': round(avg_progress, 1),
-        'recent_students': recent_enrollments,
+        'courses_count': stats['courses_count'],
+        'published_courses': stats['published_courses'],
+        'draft_courses': stats['draft_courses'],
+        'total_lessons': stats['total_lessons'],
+        'total_students': stats['total_students'],
+        'total_enrollments': stats['total_enrollments'],
+        'completed_enrollments': stats['completed_enrollments'],
+        'completion_rate': stats['completion_rate'],
+        'avg_progress': stats['avg_progress'],
+        'recent_students': stats['recent_enrollments'],
         'courses_with_stats': courses_with_stats,
+        'activity_series': activity_series,
+        'activity_peak': max([day['new_enrollments'] for day in activity_series] + [1]),
     }
     return render(request, 'users/instructor_dashboard.html', context)
 
 
+@query_budget(2, methods=("GET",))  # outermost, so loading the user counts too
 @login_required
 def profile(request):
     """User profile page with editing capability"""
@@ -301,10 +196,6 @@ def profile(request):
         form = ProfileEditForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
             form.save()
-            # Refresh user and profile to get updated photo
-            request.user.refresh_from_db()
-            if hasattr(request.user, 'profile'):
-                request.user.profile.refresh_from_db()
             messages.success(request, "Profile updated successfully!")
             return redirect('users:profile')
         else:
@@ -312,10 +203,12 @@ def profile(request):
     else:
         form = ProfileEditForm(instance=request.user)
     
-    # Ensure profile exists
-    from .models import Profile
-    Profile.objects.get_or_create(user=request.user)
-    request.user.refresh_from_db()
+    # The authentication backend loads the profile with the user; only
+    # accounts created without one need queries here, once
+    if not hasattr(request.user, 'profile'):
+        from .models import Profile
+        with unbudgeted():
+            request.user.profile = Profile.objects.get_or_create(user=request.user)[0]
     
     context = {
         'form': form,
@@ -331,6 +224,7 @@ def logout_view(request):
     return redirect('home')
 
 
+@ratelimit("password-reset", per_ip="10/h", per_identifier="3/h", identifier="email")
 def password_reset_request(request):
     """Request OTP for password reset"""
     if request.user.is_authenticated:
@@ -343,84 +237,61 @@ def password_reset_request(request):
             
             # Check if user exists
             try:
-                user = User.objects.get(email__iexact=email)
+                user = User.objects.get(email_equals(email))
             except User.DoesNotExist:
                 # For security, show same message even if user doesn't exist
                 messages.success(request, f"If an account exists with {email}, an OTP has been sent. Please check your email.")
-                return redirect('users:password_reset_request')
-            
-            # Generate 6-digit OTP
-            otp = str(random.randint(100000, 999999))
+                return redirect('users:password_reset')
             
-            # Save OTP to database
-            PasswordResetOTP.objects.create(email=email, otp=otp)
-            
-            # Send OTP via email
-            try:
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@edulearnpro.com')
-                
-                # Check if email is configured (skip check if using console backend for testing)
-                email_backend = getattr(settings, 'EMAIL_BACKEND', '')
-                is_console_backend = 'console' in email_backend.lower()
-                
-                if not is_console_backend:
-                    email_user = getattr(settings, 'EMAIL_HOST_USER', '')
-                    if not email_user or email_user == 'your-email@gmail.com':
-                        messages.error(
-                            request, 
-                            "⚠️ Email is not configured! Please update EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in settings.py. "
-                            "Or use console backend for testing by setting: EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'"
-                        )
-                        form = PasswordResetRequestForm()
-                        return render(request, 'users/password_reset_request.html', {'form': form})
-                
-                send_mail(
-                    subject='Password Reset OTP - EduLearnPro',
-                    message=f'Your password reset OTP is: {otp}\n\nThis OTP will expire in 10 minutes.\n\nIf you did not request this, please ignore this email.',
-                    from_email=from_email,
-                    recipient_list=[email],
-                    fail_silently=False,
-                )
-                
-                # Store email in session for next step
-                request.session['reset_email'] = email
-                
-                # Show appropriate message based on backend
-                if is_console_backend:
-                    messages.success(request, f"OTP has been generated. Check your Django console/terminal for the OTP: {otp}")
-                    # Also print to console for easy access
-                    print(f"\n{'='*60}")
-                    print(f"PASSWORD RESET OTP for {email}")
-                    print(f"OTP: {otp}")
-                    print(f"This OTP expires in 10 minutes.")
-                    print(f"{'='*60}\n")
-                else:
-                    messages.success(request, f"OTP has been sent to {email}. Please check your email.")
-                
-                return redirect('users:verify_otp')
-            except Exception as e:
-                import traceback
-                error_details = str(e)
-                # Provide user-friendly error messages
-                if 'authentication failed' in error_details.lower() or 'invalid credentials' in error_details.lower():
-                    messages.error(request, "Email authentication failed. Please check your EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in settings.py")
-                elif 'connection' in error_details.lower() or 'timeout' in error_details.lower():
-                    messages.error(request, "Could not connect to email server. Please check your EMAIL_HOST and EMAIL_PORT settings.")
-                else:
-                    messages.error(request, f"Failed to send email: {error_details}. Please check your email configuration in settings.py.")
-                
-                # Log the full error for debugging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Email send error: {traceback.format_exc()}")
-                
-                form = PasswordResetRequestForm()
-                return render(request, 'users/password_reset_request.html', {'form': form})
+            # Check if email is configured (skip check if using console backend for testing)
+            email_backend = getattr(settings, 'EMAIL_BACKEND', '')
+            is_console_backend = 'console' in email_backend.lower()
+
+            if not is_console_backend:
+                email_user = getattr(settings, 'EMAIL_HOST_USER', '')
+                if not email_user or email_user == 'your-email@gmail.com':
+                    messages.error(
+                        request, 
+                        "⚠️ Email is not configured! Please update EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in settings.py. "
+                        "Or use console backend for testing by setting: EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'"
+                    )
+                    form = PasswordResetRequestForm()
+                    return render(request, 'users/password_reset_request.html', {'form': form})
+
+            # Generate a 6-digit OTP, replacing any outstanding one
+            otp_store = get_otp_store()
+            otp = otp_store.issue(email)
+
+            # Queue the OTP email; the send_outbox worker delivers it
+            enqueue_email(
+                subject='Password Reset OTP - EduLearnPro',
+                body=f'Your password reset OTP is: {otp}\n\nThis OTP will expire in {otp_store.ttl // 60} minutes.\n\nIf you did not request this, please ignore this email.',
+                recipients=[email],
+                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@edulearnpro.com'),
+            )
+
+            # Store email in session for next step
+            request.session['reset_email'] = email
+
+            # Show appropriate message based on backend
+            if is_console_backend:
+                messages.success(request, f"OTP has been generated. It will also appear in the send_outbox worker's console: {otp}")
+            else:
+                messages.success(request, f"OTP has been sent to {email}. Please check your email.")
+
+            return redirect('users:verify_otp')
     else:
         form = PasswordResetRequestForm()
     
     return render(request, 'users/password_reset_request.html', {'form': form})
 
 
+@ratelimit(
+    "verify-otp",
+    per_ip="20/h",
+    per_identifier="5/15m",
+    identifier=lambda request: request.session.get("reset_email"),
+)
 def verify_otp(request):
     """Verify OTP for password reset"""
     if request.user.is_authenticated:
@@ -429,31 +300,22 @@ def verify_otp(request):
     email = request.session.get('reset_email')
     if not email:
         messages.error(request, "Please request an OTP first.")
-        return redirect('users:password_reset_request')
+        return redirect('users:password_reset')
     
     if request.method == 'POST':
         form = OTPVerificationForm(request.POST, initial={'email': email})
         if form.is_valid():
             otp = form.cleaned_data['otp']
             
-            # Mark OTP as verified
-            otp_obj = PasswordResetOTP.objects.filter(
-                email=email,
-                otp=otp,
-                is_verified=False
-            ).order_by('-created_at').first()
-            
-            if otp_obj:
-                otp_obj.is_verified = True
-                otp_obj.save()
-                
+            # Check the OTP (expired codes and exhausted attempts fail too)
+            if get_otp_store().verify(email, otp):
                 # Store email and OTP in session for password reset
                 request.session['reset_email'] = email
                 request.session['otp_verified'] = True
                 messages.success(request, "OTP verified successfully. Please set your new password.")
                 return redirect('users:reset_password')
             else:
-                messages.error(request, "Invalid OTP. Please try again.")
+                messages.error(request, "Invalid or expired OTP. Please try again or request a new one.")
         else:
             messages.error(request, "Please correct the errors below.")
     else:
@@ -470,20 +332,22 @@ def reset_password(request):
     email = request.session.get('reset_email')
     otp_verified = request.session.get('otp_verified', False)
     
-    if not email or not otp_verified:
+    otp_store = get_otp_store()
+    if not email or not otp_verified or not otp_store.is_verified(email):
         messages.error(request, "Please verify OTP first.")
-        return redirect('users:password_reset_request')
+        return redirect('users:password_reset')
     
     try:
-        user = User.objects.get(email__iexact=email)
+        user = User.objects.get(email_equals(email))
     except User.DoesNotExist:
         messages.error(request, "User not found.")
-        return redirect('users:password_reset_request')
+        return redirect('users:password_reset')
     
     if request.method == 'POST':
         form = PasswordResetForm(user, request.POST)
         if form.is_valid():
             form.save()
+            otp_store.clear(email)
             
             # Clear session
             del request.session['reset_email']